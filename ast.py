@@ -1,133 +1,279 @@
 """
 Módulo de Árbol de Sintaxis Abstracta (AST) para el compilador Pascal.
 Define las clases de nodos que representan la estructura del programa.
+
+Los nodos usan __slots__ (sin __dict__ por instancia): el AST es la estructura
+más grande del compilador. tipo_nodo es un atributo de clase; cada nodo declara
+su tipo (lo fija el análisis semántico) y su posición en el fuente.
 """
 
 class NodoAST:
     """Clase base para todos los nodos del AST."""
-    def __init__(self, tipo_nodo):
-        self.tipo_nodo = tipo_nodo
+    __slots__ = ('tipo', 'linea', 'columna')
+    tipo_nodo = None
+
+    def __init__(self, linea=None, columna=None):
+        self.tipo = None        # Tipo de la expresión ('integer', 'boolean'), None en sentencias
+        self.linea = linea      # Posición del nodo en el fuente, para diagnósticos
+        self.columna = columna
 
 # --- Nodos de Expresiones ---
 
 class NodoIdentificador(NodoAST):
     """Nodo para identificadores (variables)."""
-    def __init__(self, nombre):
-        super().__init__('identificador')
+    __slots__ = ('nombre', 'nombre_id', 'simbolo')
+    tipo_nodo = 'identificador'
+
+    def __init__(self, nombre, nombre_id=None, simbolo=None, linea=None, columna=None):
+        super().__init__(linea, columna)
         self.nombre = nombre
+        self.nombre_id = nombre_id  # Id del nombre en la TablaNombres de la compilación
+        self.simbolo = simbolo      # Símbolo resuelto por el análisis semántico
 
 class NodoNumero(NodoAST):
     """Nodo para literales numéricos."""
-    def __init__(self, valor):
-        super().__init__('numero')
+    __slots__ = ('valor',)
+    tipo_nodo = 'numero'
+
+    def __init__(self, valor, linea=None, columna=None):
+        super().__init__(linea, columna)
         self.valor = valor
 
 class NodoBooleano(NodoAST):
     """Nodo para literales booleanos (true/false)."""
-    def __init__(self, valor):
-        super().__init__('booleano')
+    __slots__ = ('valor',)
+    tipo_nodo = 'booleano'
+
+    def __init__(self, valor, linea=None, columna=None):
+        super().__init__(linea, columna)
         self.valor = valor  # 'true' o 'false'
 
 class NodoOperacionBinaria(NodoAST):
     """Nodo para operaciones binarias (+, -, *, div, and, or, <, >, etc.)."""
-    def __init__(self, izquierda, operador, derecha):
-        super().__init__('operacion_binaria')
+    __slots__ = ('izquierda', 'operador', 'derecha')
+    tipo_nodo = 'operacion_binaria'
+
+    def __init__(self, izquierda, operador, derecha, linea=None, columna=None):
+        super().__init__(linea, columna)
         self.izquierda = izquierda
         self.operador = operador
         self.derecha = derecha
 
 class NodoOperacionUnaria(NodoAST):
     """Nodo para operaciones unarias (-, not)."""
-    def __init__(self, operador, operando):
-        super().__init__('operacion_unaria')
+    __slots__ = ('operador', 'operando')
+    tipo_nodo = 'operacion_unaria'
+
+    def __init__(self, operador, operando, linea=None, columna=None):
+        super().__init__(linea, columna)
         self.operador = operador
         self.operando = operando
 
 class NodoExpresion(NodoAST):
     """Nodo wrapper para expresiones entre paréntesis."""
-    def __init__(self, expresion):
-        super().__init__('expresion')
+    __slots__ = ('expresion',)
+    tipo_nodo = 'expresion'
+
+    def __init__(self, expresion, linea=None, columna=None):
+        super().__init__(linea, columna)
         self.expresion = expresion
 
 class NodoLlamadaFuncion(NodoAST):
     """Nodo para llamadas a funciones."""
-    def __init__(self, nombre, parametros):
-        super().__init__('llamada_funcion')
+    __slots__ = ('nombre', 'nombre_id', 'simbolo', 'parametros')
+    tipo_nodo = 'llamada_funcion'
+
+    def __init__(self, nombre, parametros, nombre_id=None, simbolo=None, linea=None, columna=None):
+        super().__init__(linea, columna)
         self.nombre = nombre
+        self.nombre_id = nombre_id
+        self.simbolo = simbolo
         self.parametros = parametros or []
 
 # --- Nodos de Sentencias ---
 
 class NodoAsignacion(NodoAST):
     """Nodo para asignaciones: id := expresion"""
-    def __init__(self, variable, expresion):
-        super().__init__('asignacion')
+    __slots__ = ('variable', 'expresion')
+    tipo_nodo = 'asignacion'
+
+    def __init__(self, variable, expresion, linea=None, columna=None):
+        super().__init__(linea, columna)
         self.variable = variable  # NodoIdentificador o string con nombre
         self.expresion = expresion
 
 class NodoBloque(NodoAST):
     """Nodo para bloques de sentencias (begin ... end)."""
-    def __init__(self, sentencias):
-        super().__init__('bloque')
+    __slots__ = ('sentencias',)
+    tipo_nodo = 'bloque'
+
+    def __init__(self, sentencias, linea=None, columna=None):
+        super().__init__(linea, columna)
         self.sentencias = sentencias or []
 
 class NodoIf(NodoAST):
     """Nodo para sentencias condicionales: if E then S1 [else S2]"""
-    def __init__(self, condicion, cuerpo_true, cuerpo_false=None):
-        super().__init__('if')
+    __slots__ = ('condicion', 'cuerpo_true', 'cuerpo_false')
+    tipo_nodo = 'if'
+
+    def __init__(self, condicion, cuerpo_true, cuerpo_false=None, linea=None, columna=None):
+        super().__init__(linea, columna)
         self.condicion = condicion
         self.cuerpo_true = cuerpo_true
         self.cuerpo_false = cuerpo_false
 
 class NodoWhile(NodoAST):
     """Nodo para bucles: while E do S"""
-    def __init__(self, condicion, cuerpo):
-        super().__init__('while')
+    __slots__ = ('condicion', 'cuerpo')
+    tipo_nodo = 'while'
+
+    def __init__(self, condicion, cuerpo, linea=None, columna=None):
+        super().__init__(linea, columna)
         self.condicion = condicion
         self.cuerpo = cuerpo
 
 class NodoLlamadaProcedimiento(NodoAST):
     """Nodo para llamadas a procedimientos."""
-    def __init__(self, nombre, parametros):
-        super().__init__('llamada_procedimiento')
+    __slots__ = ('nombre', 'nombre_id', 'simbolo', 'parametros')
+    tipo_nodo = 'llamada_procedimiento'
+
+    def __init__(self, nombre, parametros, nombre_id=None, simbolo=None, linea=None, columna=None):
+        super().__init__(linea, columna)
         self.nombre = nombre
+        self.nombre_id = nombre_id
+        self.simbolo = simbolo
         self.parametros = parametros or []
 
 class NodoRead(NodoAST):
     """Nodo para sentencias de lectura: read(id)"""
-    def __init__(self, variable):
-        super().__init__('read')
+    __slots__ = ('variable',)
+    tipo_nodo = 'read'
+
+    def __init__(self, variable, linea=None, columna=None):
+        super().__init__(linea, columna)
         self.variable = variable  # NodoIdentificador o string con nombre
 
 class NodoWrite(NodoAST):
     """Nodo para sentencias de escritura: write(E)"""
-    def __init__(self, expresion):
-        super().__init__('write')
+    __slots__ = ('expresion',)
+    tipo_nodo = 'write'
+
+    def __init__(self, expresion, linea=None, columna=None):
+        super().__init__(linea, columna)
         self.expresion = expresion
 
 class NodoPrograma(NodoAST):
     """Nodo raíz del programa."""
-    def __init__(self, nombre, declaraciones, bloque_principal):
-        super().__init__('programa')
+    __slots__ = ('nombre', 'declaraciones', 'bloque')
+    tipo_nodo = 'programa'
+
+    def __init__(self, nombre, declaraciones, bloque_principal, linea=None, columna=None):
+        super().__init__(linea, columna)
         self.nombre = nombre
         self.declaraciones = declaraciones
         self.bloque = bloque_principal
 
 class NodoDeclaracionProcedimiento(NodoAST):
     """Nodo para la *declaración* de un procedimiento."""
-    def __init__(self, nombre, parametros, declaraciones_internas, bloque_cuerpo):
-        super().__init__('declaracion_procedimiento')
+    __slots__ = ('nombre', 'parametros', 'declaraciones_internas', 'bloque_cuerpo', 'ambito')
+    tipo_nodo = 'declaracion_procedimiento'
+
+    def __init__(self, nombre, parametros, declaraciones_internas, bloque_cuerpo, ambito=None, linea=None, columna=None):
+        super().__init__(linea, columna)
         self.nombre = nombre
         self.parametros = parametros # Lista de dicts {'nombre': 'w', 'tipo': 'boolean'}
         self.declaraciones_internas = declaraciones_internas # Para anidamiento
         self.bloque_cuerpo = bloque_cuerpo # NodoBloque del begin...end
+        self.ambito = ambito # Ámbito (TablaSimbolos) de sus parámetros y locales
 
 class NodoDeclaracionFuncion(NodoAST):
     """Nodo para la *declaración* de una función."""
-    def __init__(self, nombre, parametros, tipo_retorno, declaraciones_internas, bloque_cuerpo):
-        super().__init__('declaracion_funcion')
+    __slots__ = ('nombre', 'parametros', 'tipo_retorno', 'declaraciones_internas', 'bloque_cuerpo', 'ambito')
+    tipo_nodo = 'declaracion_funcion'
+
+    def __init__(self, nombre, parametros, tipo_retorno, declaraciones_internas, bloque_cuerpo, ambito=None, linea=None, columna=None):
+        super().__init__(linea, columna)
         self.nombre = nombre
         self.parametros = parametros
         self.tipo_retorno = tipo_retorno
         self.declaraciones_internas = declaraciones_internas
-        self.bloque_cuerpo = bloque_cuerpo
\ No newline at end of file
+        self.bloque_cuerpo = bloque_cuerpo
+        self.ambito = ambito
+
+# --- Recorrido del AST ---
+
+def clases_nodo(clase=NodoAST):
+    """Todas las subclases concretas de NodoAST (las que tienen tipo_nodo)."""
+    for subclase in clase.__subclasses__():
+        if subclase.tipo_nodo is not None:
+            yield subclase
+        yield from clases_nodo(subclase)
+
+class Visitante:
+    """
+    Base de las pasadas sobre el AST. Una subclase define un método
+    <prefijo><tipo_nodo> por cada nodo que atiende (ej: generar_asignacion) y
+    al crearse arma una sola vez su tabla de despacho {clase de nodo: método}:
+    visitar(nodo) cuesta un único acceso a esa tabla. Visitar None no hace nada.
+    """
+    prefijo = 'visitar_'
+    despacho = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.despacho = {type(None): Visitante.visitar_nada}
+        for clase in clases_nodo():
+            metodo = getattr(cls, cls.prefijo + clase.tipo_nodo, None)
+            if metodo is not None:
+                cls.despacho[clase] = metodo
+
+    def visitar(self, nodo):
+        """Despacha nodo a su método (recursivo si el método visita a sus hijos)."""
+        try:
+            metodo = self.despacho[type(nodo)]
+        except KeyError:
+            metodo = self.resolver(type(nodo))
+        return metodo(self, nodo)
+
+    def recorrer(self, raiz):
+        """
+        Recorre el AST desde raiz con una pila explícita de trabajo, sin
+        recursión de Python: los métodos no visitan a sus hijos sino que los
+        programan (ver programar), así que la profundidad de anidamiento sólo
+        está limitada por la memoria.
+        """
+        pendientes = self.pendientes = [raiz]
+        despacho = self.despacho
+        while pendientes:
+            item = pendientes.pop()
+            if type(item) is tuple:
+                # Acción programada: (funcion, *argumentos)
+                item[0](*item[1:])
+                continue
+            try:
+                metodo = despacho[type(item)]
+            except KeyError:
+                metodo = self.resolver(type(item))
+            metodo(self, item)
+
+    def programar(self, *items):
+        """
+        Programa, para ejecutarse en este orden y antes que lo ya pendiente,
+        nodos a visitar y acciones (funcion, *argumentos).
+        """
+        self.pendientes.extend(reversed(items))
+
+    @classmethod
+    def resolver(cls, clase):
+        """Despacho de una clase de nodo que no estaba en la tabla (ej: definida después)."""
+        metodo = getattr(cls, cls.prefijo + str(getattr(clase, 'tipo_nodo', None)), None)
+        if metodo is None:
+            return cls.visitar_desconocido
+        cls.despacho[clase] = metodo
+        return metodo
+
+    def visitar_nada(self, nodo):
+        return None
+
+    def visitar_desconocido(self, nodo):
+        raise ValueError(f"{type(self).__name__}: no hay método para el tipo de nodo: {nodo.tipo_nodo}")
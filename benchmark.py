@@ -0,0 +1,877 @@
+"""
+Benchmarks del compilador Pascal.
+
+Uso: python3 benchmark.py <caso> [opciones]
+
+Casos:
+    lexico    Compara los motores del analizador léxico sobre pascal_test/
+              y sobre un programa sintético grande.
+    tokens    Compara tiempo y memoria de una lista de tuplas de next_token()
+              contra el BufferTokens de tokenize_all().
+    rss       Pico de memoria (RSS) del proceso al analizar (léxico,
+              sintáctico y semántico, hasta el AST) un archivo grande leído
+              en modo texto y mapeado en memoria.
+    expresiones
+              Compara los analizadores de expresiones (precedencia y recursivo)
+              sobre expresiones con miles de operadores.
+    listas    Escalado del análisis sintáctico de listas largas: sentencias,
+              variables, declaraciones, subrutinas y argumentos.
+    parentesis
+              Escalado del análisis de expresiones con paréntesis anidados:
+              el tipo de cada nodo se calcula una sola vez, así que el costo
+              por nivel debe mantenerse constante.
+    generacion
+              Escalado de la generación de código MEPA con miles de
+              subrutinas y variables globales.
+    nodos     Bytes por nodo del AST (tracemalloc) sobre un programa de
+              --elementos sentencias: nodos con __slots__ contra los mismos
+              nodos con __dict__ por instancia.
+    anidamiento
+              Genera código para un 'if ... else if ...' de miles de ramas y
+              una expresión con miles de paréntesis anidados, con el límite
+              de recursión por defecto de Python.
+    despacho  Throughput de la generación de código (nodos/s) con la tabla de
+              despacho de Visitante, contra el despacho por nombre de método
+              (f-string + hasattr + getattr por nodo).
+    emision   Tiempo y tamaño del código MEPA de un programa sintético: el
+              flujo de instrucciones en memoria contra su texto .mepa y su
+              bytecode binario (codificar y volver a cargar).
+    salida    Pico de memoria (tracemalloc, sin contar el AST) y tiempo de
+              escribir el .mepa: generando en memoria y escribiendo el texto
+              completo, contra escribir cada instrucción al emitirla.
+    mirilla   Tiempo del optimizador de mirilla y reporte de instrucciones
+              ahorradas por regla, sobre el programa sintético y una
+              escalera de if/else if.
+    plegado   Instrucciones generadas y tiempo de generación de un programa
+              con una tabla de constantes calculadas, con y sin plegado de
+              constantes en el AST.
+    muerto    Instrucciones generadas de un programa con trazas de depuración
+              desactivadas por condiciones constantes, con y sin eliminación
+              de código muerto.
+    biblioteca
+              Programa con una biblioteca de subrutinas de la que se usan
+              pocas: instrucciones y memoria reservada con y sin eliminar
+              subrutinas y variables no usadas, y tiempo del grafo de llamadas.
+    cortocircuito
+              Código generado para condiciones con and/or (guardas de bucles)
+              con evaluación completa y en cortocircuito.
+    maquina   Tiempo de ejecutar fib.pas con la máquina virtual MEPA (código
+              decodificado una vez, saltos resueltos) contra un intérprete que
+              parsea cada línea del .mepa y busca las etiquetas por nombre.
+    python    Verifica que el backend Python imprima lo mismo que la máquina
+              MEPA en pascal_test/mepa y compara el tiempo de ejecutar fib.pas
+              en los dos.
+    superinstrucciones
+              Bucles while ajustados en la máquina virtual, con MEPA estándar
+              y con el dialecto de superinstrucciones: instrucciones
+              despachadas por vuelta y tiempo.
+    perfil    Tiempo de ejecutar fib.pas en la máquina virtual y en el
+              perfilador (la máquina no cambia: perfilar sólo cuesta cuando
+              se pide) y el reporte del perfil.
+    mapa      Tiempo de generar el programa sintético sin y con mapa de
+              fuente, y el perfil por línea de fib.pas.
+"""
+import argparse
+import glob
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from lexico import AnalizadorLexico, MOTORES
+from sintactico import AnalizadorSintactico, EXPRESIONES
+from generador_mepa import GeneradorMEPA
+from codigo_mepa import CodigoMEPA, Instruccion, dividir
+from optimizador_mepa import OptimizadorMirilla
+from optimizador_ast import PlegadorConstantes, EliminadorCodigoMuerto, EliminadorNoUsados
+from ast import NodoAST
+from mepa_vm import MaquinaMEPA, ProgramaMEPA
+from generador_python import GeneradorPython
+from superinstrucciones import bajar
+from perfilador_mepa import PerfiladorMEPA
+
+
+def programa_sintetico(num_sentencias):
+    """Genera el texto de un programa Pascal válido con num_sentencias asignaciones."""
+    lineas = ["program sintetico;", "var a, b, c: integer;", "    ok: boolean;", "begin"]
+    for i in range(num_sentencias):
+        lineas.append(f"    a := (b + {i}) * c div 3 - a; {{ sentencia {i} }}")
+        lineas.append("    ok := (a <= b) and not (c <> 0);")
+    lineas.append("    write(a)")
+    lineas.append("end.")
+    return "\n".join(lineas)
+
+
+def medir(funcion, repeticiones=3):
+    """Devuelve el mejor tiempo (en segundos) de varias ejecuciones de funcion()."""
+    mejor = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        transcurrido = time.perf_counter() - inicio
+        if mejor is None or transcurrido < mejor:
+            mejor = transcurrido
+    return mejor
+
+
+def textos_pascal_test():
+    """Lee todos los fuentes .pas de pascal_test/."""
+    textos = []
+    for archivo in sorted(glob.glob("pascal_test/**/*.[pP][aA][sS]", recursive=True)):
+        with open(archivo, 'r') as f:
+            textos.append(f.read())
+    return textos
+
+
+def contar_tokens(motor, texto):
+    """Tokeniza texto completo con el motor indicado y devuelve la cantidad de tokens."""
+    analizador = AnalizadorLexico(motor)
+    analizador.texto = texto
+    cantidad = 0
+    try:
+        while analizador.next_token()[0] is not None:
+            cantidad += 1
+    except SyntaxError:
+        pass
+    return cantidad
+
+
+def bench_lexico(args):
+    corpus = {
+        'pascal_test': textos_pascal_test(),
+        f'sintetico({args.sentencias})': [programa_sintetico(args.sentencias)],
+    }
+    for nombre, textos in corpus.items():
+        print(f"{nombre}: {sum(len(t) for t in textos)} caracteres")
+        for motor in MOTORES:
+            tokens = sum(contar_tokens(motor, t) for t in textos)
+            segundos = medir(lambda: [contar_tokens(motor, t) for t in textos], args.repeticiones)
+            print(f"  {motor:8} {tokens:9} tokens  {segundos:8.4f} s  {tokens / segundos:12.0f} tokens/s")
+
+
+def memoria_pico(funcion):
+    """Ejecuta funcion() y devuelve (resultado, bytes retenidos por el resultado)."""
+    tracemalloc.start()
+    resultado = funcion()
+    actual, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return resultado, actual
+
+
+def lista_de_tuplas(texto):
+    analizador = AnalizadorLexico('regex')
+    analizador.texto = texto
+    lista = []
+    while True:
+        token = analizador.next_token()
+        lista.append(token)
+        if token[0] is None:
+            return lista
+
+
+def buffer_de_tokens(texto):
+    analizador = AnalizadorLexico('regex')
+    analizador.texto = texto
+    return analizador.tokenize_all()
+
+
+def bench_tokens(args):
+    texto = programa_sintetico(args.sentencias)
+    for nombre, funcion in (('tuplas', lista_de_tuplas), ('buffer', buffer_de_tokens)):
+        segundos = medir(lambda: funcion(texto), args.repeticiones)
+        resultado, memoria = memoria_pico(lambda: funcion(texto))
+        print(f"  {nombre:8} {len(resultado):9} tokens  {segundos:8.4f} s  "
+              f"{memoria / 1024:10.0f} KiB  {memoria / len(resultado):6.1f} bytes/token")
+
+
+# Se ejecuta en un proceso aparte para que cada medición tenga su propio pico de RSS
+# (ru_maxrss no sirve: Linux le traslada el pico del proceso padre a través de exec).
+_SCRIPT_RSS = """
+import sys
+from lexico import AnalizadorLexico
+from sintactico import AnalizadorSintactico
+analizador = AnalizadorLexico('regex')
+analizador.cargar_archivo(sys.argv[1], mapear=sys.argv[2] == 'mapeado')
+raiz = AnalizadorSintactico(analizador).analizar()
+with open('/proc/self/status') as status:
+    pico = next(linea for linea in status if linea.startswith('VmHWM:')).split()[1]
+print(len(raiz.bloque.sentencias), pico)
+"""
+
+
+def bench_rss(args):
+    with tempfile.TemporaryDirectory() as directorio:
+        for sentencias in (args.sentencias // 4, args.sentencias):
+            archivo = os.path.join(directorio, f"sintetico_{sentencias}.pas")
+            with open(archivo, 'w') as f:
+                f.write(programa_sintetico(sentencias))
+            print(f"sintetico({sentencias}): {os.path.getsize(archivo) / 2**20:.1f} MiB")
+            for modo in ('texto', 'mapeado'):
+                salida = subprocess.run([sys.executable, '-c', _SCRIPT_RSS, archivo, modo],
+                                        capture_output=True, text=True, check=True).stdout
+                sentencias_ast, rss_kib = map(int, salida.split())
+                print(f"  {modo:8} {sentencias_ast:9} sentencias  pico RSS {rss_kib / 1024:8.1f} MiB")
+
+
+def programa_expresion_larga(num_terminos):
+    """Genera un programa con una única asignación de num_terminos términos."""
+    terminos = " + ".join(f"a * {i} - b div 2" for i in range(num_terminos))
+    return f"program larga;\nvar a, b: integer;\nbegin\n    a := {terminos}\nend."
+
+
+def analizar(texto, **opciones):
+    """Analiza sintácticamente texto y devuelve el AST."""
+    analizador = AnalizadorLexico('regex')
+    analizador.texto = texto
+    return AnalizadorSintactico(analizador, **opciones).analizar()
+
+
+def bench_expresiones(args):
+    for num_terminos in (100, 1000, 10000, args.terminos):
+        texto = programa_expresion_larga(num_terminos)
+        print(f"expresión de {num_terminos} términos:")
+        for modo in EXPRESIONES:
+            try:
+                segundos = medir(lambda: analizar(texto, expresiones=modo), args.repeticiones)
+                print(f"  {modo:12} {segundos:8.4f} s  {num_terminos * 4 / segundos:12.0f} operandos/s")
+            except RecursionError:
+                print(f"  {modo:12} RecursionError")
+
+
+def programa_con_lista(lista, n):
+    """Genera un programa donde la lista indicada tiene n elementos."""
+    if lista == 'sentencias':
+        cuerpo = ";\n".join("    a := a + 1" for _ in range(n))
+        return f"program p;\nvar a: integer;\nbegin\n{cuerpo}\nend."
+    if lista == 'variables':
+        nombres = ", ".join(f"v{i}" for i in range(n))
+        return f"program p;\nvar {nombres}: integer;\nbegin\n    v0 := 1\nend."
+    if lista == 'declaraciones':
+        declaraciones = "\n".join(f"    v{i}: integer;" for i in range(n))
+        return f"program p;\nvar\n{declaraciones}\nbegin\n    v0 := 1\nend."
+    if lista == 'subrutinas':
+        subrutinas = ";\n".join(f"procedure p{i};\nbegin\n    a := {i}\nend" for i in range(n))
+        return f"program p;\nvar a: integer;\n{subrutinas}\nbegin\n    p0\nend."
+    if lista == 'argumentos':
+        parametros = ", ".join(f"x{i}" for i in range(n))
+        argumentos = ", ".join(str(i) for i in range(n))
+        return (f"program p;\nvar a: integer;\nprocedure q({parametros}: integer);\n"
+                f"begin\n    a := x0\nend\nbegin\n    q({argumentos})\nend.")
+    raise ValueError(lista)
+
+
+def bench_listas(args):
+    for lista in ('sentencias', 'variables', 'declaraciones', 'subrutinas', 'argumentos'):
+        print(f"{lista}:")
+        for n in (args.elementos // 100, args.elementos // 10, args.elementos):
+            texto = programa_con_lista(lista, n)
+            try:
+                segundos = medir(lambda: analizar(texto), args.repeticiones)
+                print(f"  n={n:8}  {segundos:8.4f} s  {segundos / n * 1e6:8.2f} µs/elemento")
+            except RecursionError:
+                print(f"  n={n:8}  RecursionError")
+
+
+def programa_parentesis(forma, profundidad):
+    """Genera un programa con una expresión de paréntesis anidados profundidad veces."""
+    if forma == 'sumas':
+        expresion = "(" * profundidad + "a" + " + 1)" * profundidad
+    else:
+        expresion = "(" * profundidad + "a" + ")" * profundidad + " + 1"
+    return f"program p;\nvar a: integer;\nbegin\n    a := {expresion}\nend."
+
+
+def bench_parentesis(args):
+    # Cada nivel de paréntesis consume varios marcos de la pila de Python
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 100000))
+    for forma in ('sumas', 'anidados'):
+        print(f"{forma}:")
+        for profundidad in (500, 1000, 2000, 4000):
+            texto = programa_parentesis(forma, profundidad)
+            try:
+                segundos = medir(lambda: analizar(texto), args.repeticiones)
+                print(f"  profundidad={profundidad:5}  {segundos:8.4f} s  {segundos / profundidad * 1e6:8.2f} µs/nivel")
+            except RecursionError:
+                print(f"  profundidad={profundidad:5}  RecursionError")
+
+
+def programa_con_subrutinas(n):
+    """Genera un programa con n variables globales y n procedimientos que las usan."""
+    globales = ", ".join(f"g{i}" for i in range(n))
+    subrutinas = ";\n".join(
+        f"procedure p{i}(x: integer);\nvar l: integer;\nbegin\n    l := x + g{i};\n    g{i} := l\nend"
+        for i in range(n))
+    llamadas = ";\n".join(f"    p{i}({i})" for i in range(n))
+    return f"program p;\nvar {globales}: integer;\n{subrutinas}\nbegin\n{llamadas}\nend."
+
+
+def bench_generacion(args):
+    for n in (args.elementos // 100, args.elementos // 25, args.elementos // 10):
+        analizador = AnalizadorLexico('regex')
+        analizador.texto = programa_con_subrutinas(n)
+        parser = AnalizadorSintactico(analizador)
+        raiz = parser.analizar()
+        segundos = medir(lambda: GeneradorMEPA(parser.semantico.tabla_simbolos).generar(raiz), args.repeticiones)
+        print(f"  n={n:8}  {segundos:8.4f} s  {segundos / n * 1e6:8.2f} µs/subrutina")
+
+
+def atributos_nodo(nodo):
+    """Nombres de los atributos (slots) de un nodo del AST, incluidos los heredados."""
+    return [nombre for clase in type(nodo).__mro__ for nombre in clase.__dict__.get('__slots__', ())]
+
+
+def nodos_ast(raiz):
+    """Lista todos los nodos del AST (recorrido con pila explícita)."""
+    nodos = []
+    pendientes = [raiz]
+    while pendientes:
+        nodo = pendientes.pop()
+        nodos.append(nodo)
+        for nombre in atributos_nodo(nodo):
+            valor = getattr(nodo, nombre)
+            if isinstance(valor, NodoAST):
+                pendientes.append(valor)
+            elif isinstance(valor, list):
+                pendientes.extend(v for v in valor if isinstance(v, NodoAST))
+    return nodos
+
+
+class NodoConDict:
+    """Nodo con __dict__ por instancia, como los del AST antes de usar __slots__."""
+
+
+def copia_con_slots(nodo):
+    copia = object.__new__(type(nodo))
+    for nombre in atributos_nodo(nodo):
+        setattr(copia, nombre, getattr(nodo, nombre))
+    return copia
+
+
+def copia_con_dict(nodo):
+    copia = NodoConDict()
+    copia.tipo_nodo = nodo.tipo_nodo
+    for nombre in atributos_nodo(nodo):
+        setattr(copia, nombre, getattr(nodo, nombre))
+    return copia
+
+
+def bench_nodos(args):
+    raiz = analizar(programa_con_lista('sentencias', args.elementos))
+    nodos = nodos_ast(raiz)
+    print(f"{args.elementos} sentencias: {len(nodos)} nodos")
+    # Se mide sólo lo que ocupa cada nodo: los atributos apuntan a los mismos
+    # hijos, strings y símbolos que el árbol original
+    for nombre, copiar in (('__dict__', copia_con_dict), ('__slots__', copia_con_slots)):
+        copias = [None] * len(nodos)
+        tracemalloc.start()
+        for i, nodo in enumerate(nodos):
+            copias[i] = copiar(nodo)
+        memoria, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"  {nombre:10} {memoria / 2**20:8.1f} MiB  {memoria / len(nodos):6.1f} bytes/nodo")
+
+
+class GeneradorPorNombre(GeneradorMEPA):
+    """GeneradorMEPA con el despacho anterior: arma el nombre del método en cada nodo."""
+
+    def visitar(self, nodo):
+        if not nodo:
+            return
+        metodo_generador = f"generar_{nodo.tipo_nodo}"
+        if hasattr(self, metodo_generador):
+            getattr(self, metodo_generador)(nodo)
+        else:
+            raise ValueError(f"No hay generador MEPA para el tipo de nodo: {nodo.tipo_nodo}")
+
+
+def bench_despacho(args):
+    for nombre, texto in (('sintetico', programa_sintetico(args.sentencias)),
+                          ('sentencias', programa_con_lista('sentencias', args.elementos))):
+        analizador = AnalizadorLexico('regex')
+        analizador.texto = texto
+        parser = AnalizadorSintactico(analizador)
+        raiz = parser.analizar()
+        cantidad = len(nodos_ast(raiz))
+        print(f"{nombre}: {cantidad} nodos")
+        for despacho, generador in (('nombre', GeneradorPorNombre), ('tabla', GeneradorMEPA)):
+            segundos = medir(lambda: generador(parser.semantico.tabla_simbolos).generar(raiz), args.repeticiones)
+            print(f"  {despacho:8} {segundos:8.4f} s  {cantidad / segundos:12.0f} nodos/s")
+
+
+def programa_anidado(forma, profundidad):
+    """Genera un programa con una escalera if/else if o paréntesis anidados profundidad veces."""
+    if forma == 'if':
+        ramas = " else ".join(f"if a = {i} then a := {i + 1}" for i in range(profundidad))
+        return f"program p;\nvar a: integer;\nbegin\n    {ramas}\nend."
+    return programa_parentesis('sumas', profundidad)
+
+
+def bench_anidamiento(args):
+    limite = sys.getrecursionlimit()
+    for forma in ('if', 'expresion'):
+        print(f"{forma}:")
+        for profundidad in (1000, 4000, 16000):
+            # El analizador sintáctico sigue siendo recursivo: sólo se le sube el límite a él
+            sys.setrecursionlimit(max(limite, 20 * profundidad))
+            analizador = AnalizadorLexico('regex')
+            analizador.texto = programa_anidado(forma, profundidad)
+            parser = AnalizadorSintactico(analizador)
+            raiz = parser.analizar()
+            sys.setrecursionlimit(limite)
+            try:
+                segundos = medir(lambda: GeneradorMEPA(parser.semantico.tabla_simbolos).generar(raiz), args.repeticiones)
+                print(f"  profundidad={profundidad:6}  {segundos:8.4f} s  {segundos / profundidad * 1e6:8.2f} µs/nivel")
+            except RecursionError:
+                print(f"  profundidad={profundidad:6}  RecursionError")
+
+
+def bench_emision(args):
+    analizador = AnalizadorLexico('regex')
+    analizador.texto = programa_sintetico(args.sentencias)
+    parser = AnalizadorSintactico(analizador)
+    raiz = parser.analizar()
+    generador = GeneradorMEPA(parser.semantico.tabla_simbolos)
+    generador.generar(raiz)
+    codigo = generador.codigo
+    texto = codigo.texto()
+    binario = codigo.a_bytes()
+    print(f"{len(codigo)} instrucciones")
+
+    tiempos = (
+        ('generar', lambda: GeneradorMEPA(parser.semantico.tabla_simbolos).generar(raiz)),
+        ('texto()', codigo.texto),
+        ('a_bytes()', codigo.a_bytes),
+        ('desde_bytes()', lambda: CodigoMEPA.desde_bytes(binario)),
+    )
+    for nombre, funcion in tiempos:
+        print(f"  {nombre:14} {medir(funcion, args.repeticiones):8.4f} s")
+
+    columnas = sum(arreglo.itemsize * len(arreglo) for arreglo in (codigo.opcodes, codigo.op1, codigo.op2))
+    _, lineas = memoria_pico(lambda: list(codigo.lineas()))
+    print(f"  {'en memoria':14} {columnas:10} bytes ({columnas / len(codigo):5.1f} bytes/instr)")
+    print(f"  {'lista de str':14} {lineas:10} bytes ({lineas / len(codigo):5.1f} bytes/instr)")
+    print(f"  {'texto .mepa':14} {len(texto.encode()):10} bytes ({len(texto.encode()) / len(codigo):5.1f} bytes/instr)")
+    print(f"  {'binario':14} {len(binario):10} bytes ({len(binario) / len(codigo):5.1f} bytes/instr)")
+
+
+def pico_generacion(funcion):
+    """Ejecuta funcion() y devuelve el pico de memoria (bytes) que alcanzó por encima de lo ya asignado."""
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    funcion()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return pico - base
+
+
+def bench_salida(args):
+    with tempfile.TemporaryDirectory() as directorio:
+        destino = os.path.join(directorio, "salida.mepa")
+
+        def en_memoria(tabla, raiz):
+            generador = GeneradorMEPA(tabla)
+            generador.generar(raiz)
+            with open(destino, "w") as f:
+                f.write(generador.obtener_codigo())
+
+        def directo(tabla, raiz):
+            with open(destino, "w", buffering=1 << 16) as f:
+                GeneradorMEPA(tabla, salida=f).generar(raiz)
+
+        for sentencias in (args.sentencias // 4, args.sentencias):
+            analizador = AnalizadorLexico('regex')
+            analizador.texto = programa_sintetico(sentencias)
+            parser = AnalizadorSintactico(analizador)
+            raiz = parser.analizar()
+            tabla = parser.semantico.tabla_simbolos
+            print(f"sentencias={sentencias}:")
+            for nombre, escribir in (('en memoria', en_memoria), ('directo', directo)):
+                segundos = medir(lambda: escribir(tabla, raiz), args.repeticiones)
+                pico = pico_generacion(lambda: escribir(tabla, raiz))
+                print(f"  {nombre:10} {segundos:8.4f} s  pico {pico / 1e6:8.2f} MB  ({os.path.getsize(destino)} bytes escritos)")
+
+
+def bench_mirilla(args):
+    programas = (
+        ('sintetico', programa_sintetico(args.sentencias)),
+        ('if', programa_anidado('if', 200)),
+    )
+    for nombre, texto in programas:
+        analizador = AnalizadorLexico('regex')
+        analizador.texto = texto
+        parser = AnalizadorSintactico(analizador)
+        raiz = parser.analizar()
+        generador = GeneradorMEPA(parser.semantico.tabla_simbolos)
+        generador.generar(raiz)
+        segundos = medir(lambda: OptimizadorMirilla().optimizar(generador.codigo), args.repeticiones)
+        optimizador = OptimizadorMirilla()
+        optimizador.optimizar(generador.codigo)
+        print(f"{nombre}: {segundos:8.4f} s  {len(generador.codigo) / segundos:12.0f} instrucciones/s")
+        print(optimizador.reporte())
+
+
+def programa_constantes(n):
+    """Programa que llena una "tabla" de n constantes calculadas con literales e identidades."""
+    lineas = ["program constantes;", "var a, b: integer;", "    ok: boolean;", "begin", "    read(b);"]
+    for i in range(n):
+        lineas.append(f"    a := ({i} * 60 + 15) div 4 - 2 * (3 + {i % 7});")
+        lineas.append(f"    a := (b + 0) * 1 + a * 0;")
+        lineas.append(f"    ok := ({i} > 3) and not false or (ok and true);")
+    lineas.append("    write(a)")
+    lineas.append("end.")
+    return "\n".join(lineas)
+
+
+def bench_plegado(args):
+    texto = programa_constantes(args.sentencias // 4)
+    for plegar in (False, True):
+        analizador = AnalizadorLexico('regex')
+        analizador.texto = texto
+        parser = AnalizadorSintactico(analizador)
+        raiz = parser.analizar()
+        plegador = PlegadorConstantes()
+        inicio = time.perf_counter()
+        if plegar:
+            plegador.plegar(raiz)
+        segundos_plegado = time.perf_counter() - inicio
+        generador = GeneradorMEPA(parser.semantico.tabla_simbolos)
+        segundos = medir(lambda: GeneradorMEPA(parser.semantico.tabla_simbolos).generar(raiz), args.repeticiones)
+        generador.generar(raiz)
+        print(f"{'con plegado' if plegar else 'sin plegado':12} {len(generador.codigo):8} instrucciones  "
+              f"plegado {segundos_plegado:8.4f} s  generación {segundos:8.4f} s")
+        if plegar:
+            print(f"  {plegador.reporte()}")
+
+
+def programa_depuracion(n):
+    """Programa con n pasos, cada uno con trazas de depuración bajo condiciones constantes falsas."""
+    lineas = ["program depuracion;", "var a, i: integer;", "begin", "    read(a);"]
+    for i in range(n):
+        lineas.append(f"    a := a + {i};")
+        lineas.append(f"    if 0 > 1 then begin write(a); write({i}) end;")
+        lineas.append(f"    while 1 = 2 do begin i := i + 1; write(i) end;")
+    lineas.append("    write(a)")
+    lineas.append("end.")
+    return "\n".join(lineas)
+
+
+def bench_muerto(args):
+    texto = programa_depuracion(args.sentencias // 4)
+    for podar in (False, True):
+        analizador = AnalizadorLexico('regex')
+        analizador.texto = texto
+        parser = AnalizadorSintactico(analizador)
+        raiz = parser.analizar()
+        PlegadorConstantes().plegar(raiz)
+        eliminador = EliminadorCodigoMuerto()
+        inicio = time.perf_counter()
+        if podar:
+            eliminador.podar(raiz)
+        segundos_poda = time.perf_counter() - inicio
+        generador = GeneradorMEPA(parser.semantico.tabla_simbolos)
+        generador.generar(raiz)
+        print(f"{'con poda' if podar else 'sin poda':9} {len(generador.codigo):8} instrucciones  poda {segundos_poda:8.4f} s")
+        if podar:
+            print(f"  {eliminador.reporte()}")
+
+
+def programa_biblioteca(n, usadas):
+    """Programa con n funciones de biblioteca (cada una llama a la anterior) y n globales; el principal usa las primeras."""
+    lineas = ["program biblioteca;", "var " + ", ".join(f"g{i}" for i in range(n)) + ": integer;"]
+    subrutinas = []
+    for i in range(n):
+        llamada = f"f{i - 1}(x) + " if i else ""
+        subrutinas.append(f"function f{i}(x: integer): integer;\nvar t, u: integer;\n"
+                          f"begin t := x * {i}; f{i} := {llamada}t end")
+    lineas.append(";\n".join(subrutinas))
+    lineas.append("begin")
+    lineas.extend(f"    g{i} := f{i}(g{i});" for i in range(usadas))
+    lineas.append("    write(g0)")
+    lineas.append("end.")
+    return "\n".join(lineas)
+
+
+def bench_biblioteca(args):
+    texto = programa_biblioteca(2000, 10)
+    for eliminar in (False, True):
+        analizador = AnalizadorLexico('regex')
+        analizador.texto = texto
+        parser = AnalizadorSintactico(analizador)
+        raiz = parser.analizar()
+        tabla = parser.semantico.tabla_simbolos
+        no_usados = EliminadorNoUsados()
+        inicio = time.perf_counter()
+        if eliminar:
+            no_usados.eliminar(raiz, tabla)
+        segundos = time.perf_counter() - inicio
+        generador = GeneradorMEPA(tabla)
+        generador.generar(raiz)
+        print(f"{'con eliminación' if eliminar else 'sin eliminación':16} {len(generador.codigo):8} instrucciones  "
+              f"{tabla.global_.num_locales:5} globales  {segundos:8.4f} s")
+        if eliminar:
+            print(f"  {no_usados.reporte().splitlines()[0]}")
+
+
+def programa_guardas(n):
+    """Programa con n bucles cuyas guardas combinan comparaciones y llamadas con and/or."""
+    lineas = ["program guardas;", "var i, n: integer;", "    ok: boolean;",
+              "function valida(x: integer): boolean;", "begin valida := x div 2 > 0 end",
+              "begin", "    read(n);"]
+    for i in range(n):
+        lineas.append("    i := 0;")
+        lineas.append(f"    while (i < n) and ((i <> {i}) or valida(i)) and not (i = n) do i := i + 1;")
+        lineas.append("    ok := (i > 0) and valida(i) or (n = 0);")
+    lineas.append("    write(i)")
+    lineas.append("end.")
+    return "\n".join(lineas)
+
+
+def bench_cortocircuito(args):
+    texto = programa_guardas(args.sentencias // 10)
+    for cortocircuito in (False, True):
+        analizador = AnalizadorLexico('regex')
+        analizador.texto = texto
+        parser = AnalizadorSintactico(analizador)
+        raiz = parser.analizar()
+        generador = GeneradorMEPA(parser.semantico.tabla_simbolos, cortocircuito=cortocircuito)
+        segundos = medir(lambda: GeneradorMEPA(parser.semantico.tabla_simbolos, cortocircuito=cortocircuito).generar(raiz),
+                         args.repeticiones)
+        generador.generar(raiz)
+        print(f"{'cortocircuito' if cortocircuito else 'completa':14} {len(generador.codigo):8} instrucciones  {segundos:8.4f} s")
+
+
+def interpretar_texto(texto, entrada):
+    """Intérprete MEPA ingenuo: parsea la línea de cada instrucción y busca las etiquetas por nombre."""
+    lineas = texto.splitlines()
+    M, D, s, i, impresos, entrada = [0] * 100000, [0] * 16, -1, 0, [], list(entrada)
+    binarias = {'SUMA': lambda a, b: a + b, 'SUST': lambda a, b: a - b, 'MULT': lambda a, b: a * b,
+                'DIVI': dividir, 'CONJ': lambda a, b: int(a == 1 and b == 1),
+                'DISJ': lambda a, b: int(a == 1 or b == 1), 'CMME': lambda a, b: int(a < b),
+                'CMMA': lambda a, b: int(a > b), 'CMIG': lambda a, b: int(a == b),
+                'CMDG': lambda a, b: int(a != b), 'CMNI': lambda a, b: int(a <= b),
+                'CMYI': lambda a, b: int(a >= b)}
+    while True:
+        partes = lineas[i].replace(',', ' ').split()
+        i += 1
+        nombre, operandos = (partes[1], partes[:1]) if partes[-1] == 'NADA' else (partes[0], partes[1:])
+        if nombre in ('DSVS', 'DSVF', 'LLPR'):
+            destino = lineas.index(f"{operandos[0]} NADA")
+        else:
+            operandos = [int(operando) for operando in operandos if operando.lstrip('-').isdigit()]
+        if nombre == 'APVL':
+            s += 1
+            M[s] = M[D[operandos[0]] + operandos[1]]
+        elif nombre == 'APCT':
+            s += 1
+            M[s] = operandos[0]
+        elif nombre == 'ALVL':
+            M[D[operandos[0]] + operandos[1]] = M[s]
+            s -= 1
+        elif nombre in binarias:
+            s -= 1
+            M[s] = binarias[nombre](M[s], M[s + 1])
+        elif nombre == 'DSVF':
+            if M[s] == 0:
+                i = destino
+            s -= 1
+        elif nombre == 'DSVS':
+            i = destino
+        elif nombre == 'LLPR':
+            s += 1
+            M[s] = i
+            i = destino
+        elif nombre == 'ENPR':
+            s += 1
+            M[s] = D[operandos[0]]
+            D[operandos[0]] = s + 1
+        elif nombre == 'RTPR':
+            D[operandos[0]] = M[s]
+            i = M[s - 1]
+            s -= operandos[1] + 2
+        elif nombre == 'UMEN':
+            M[s] = -M[s]
+        elif nombre == 'NEGA':
+            M[s] = 1 - M[s]
+        elif nombre == 'RMEM':
+            s += operandos[0]
+        elif nombre == 'LMEM':
+            s -= operandos[0]
+        elif nombre == 'LEER':
+            s += 1
+            M[s] = entrada.pop(0)
+        elif nombre == 'IMPR':
+            impresos.append(M[s])
+            s -= 1
+        elif nombre == 'PARA':
+            return impresos
+
+
+def bench_maquina(args):
+    analizador = AnalizadorLexico('regex')
+    analizador.cargar_archivo("pascal_test/mepa/fib.pas")
+    parser = AnalizadorSintactico(analizador)
+    raiz = parser.analizar()
+    generador = GeneradorMEPA(parser.semantico.tabla_simbolos)
+    generador.generar(raiz)
+    texto = generador.obtener_codigo()
+    for n in (15, 20):
+        segundos_texto = medir(lambda: interpretar_texto(texto, [n]), args.repeticiones)
+        segundos_decodificar = medir(lambda: ProgramaMEPA.desde_texto(texto), args.repeticiones)
+        programa = ProgramaMEPA.desde_texto(texto)
+        maquina = MaquinaMEPA()
+        resultado = maquina.ejecutar(programa, [n])
+        assert resultado == interpretar_texto(texto, [n])
+        segundos = medir(lambda: maquina.ejecutar(programa, [n]), args.repeticiones)
+        print(f"fib({n}) = {resultado[0]}")
+        print(f"  {'texto':10} {segundos_texto:8.4f} s")
+        print(f"  {'maquina':10} {segundos:8.4f} s  (+ {segundos_decodificar * 1000:.2f} ms al decodificar)  "
+              f"{segundos_texto / segundos:5.1f}x")
+
+
+def bench_python(args):
+    entrada = [7, 3, 5, 2, 4]
+    for archivo in sorted(glob.glob("pascal_test/mepa/*.pas")):
+        analizador = AnalizadorLexico('regex')
+        analizador.cargar_archivo(archivo)
+        parser = AnalizadorSintactico(analizador)
+        raiz = parser.analizar()
+        generador = GeneradorMEPA(parser.semantico.tabla_simbolos)
+        generador.generar(raiz)
+        generador_python = GeneradorPython(parser.semantico.tabla_simbolos)
+        generador_python.generar(raiz)
+        programa = ProgramaMEPA.desde_generador(generador)
+        programa_python = generador_python.compilar()
+        mepa = MaquinaMEPA().ejecutar(programa, entrada)
+        python = programa_python.ejecutar(entrada)
+        print(f"{os.path.basename(archivo):16} mepa {mepa}  python {python}  {'ok' if mepa == python else 'DISTINTO'}")
+        if os.path.basename(archivo) == "fib.pas":
+            fib = (programa, programa_python)
+
+    programa, programa_python = fib
+    for n in (20, 25):
+        segundos_mepa = medir(lambda: MaquinaMEPA().ejecutar(programa, [n]), args.repeticiones)
+        segundos_python = medir(lambda: programa_python.ejecutar([n]), args.repeticiones)
+        print(f"fib({n}) = {programa_python.ejecutar([n])[0]}")
+        print(f"  {'mepa':10} {segundos_mepa:8.4f} s")
+        print(f"  {'python':10} {segundos_python:8.4f} s  {segundos_mepa / segundos_python:5.1f}x")
+
+
+BUCLES = {
+    'contador': "while i < n do i := i + 1",
+    'acumulador': "while i < n do begin s := s + i; i := i + 1 end",
+    'anidado': "while i < n do begin j := 0; while j < 10 do begin s := s + 3; j := j + 1 end; i := i + 1 end",
+}
+
+
+def instrucciones_por_vuelta(codigo):
+    """Instrucciones (sin las NADA) del bucle más interno: del destino del DSVS hacia atrás más corto hasta él."""
+    bucles = [(codigo.direcciones[codigo.op1[i]], i) for i, opcode in enumerate(codigo.opcodes)
+              if opcode == Instruccion.DSVS and codigo.direcciones[codigo.op1[i]] < i]
+    inicio, fin = min(bucles, key=lambda bucle: bucle[1] - bucle[0])
+    return sum(1 for opcode in codigo.opcodes[inicio:fin + 1] if opcode != Instruccion.NADA)
+
+
+def bench_superinstrucciones(args):
+    for nombre, bucle in BUCLES.items():
+        texto = (f"program bucle;\nvar i, j, n, s: integer;\n"
+                 f"begin\n    read(n); i := 0; s := 0;\n    {bucle};\n    write(i); write(s)\nend.")
+        print(f"{nombre}: {bucle}")
+        for superinstrucciones in (False, True):
+            analizador = AnalizadorLexico('regex')
+            analizador.texto = texto
+            parser = AnalizadorSintactico(analizador)
+            raiz = parser.analizar()
+            generador = GeneradorMEPA(parser.semantico.tabla_simbolos, superinstrucciones=superinstrucciones)
+            generador.generar(raiz)
+            programa = ProgramaMEPA(generador.codigo)
+            vueltas = args.sentencias * 2
+            resultado = MaquinaMEPA().ejecutar(programa, [vueltas])
+            if superinstrucciones:
+                assert resultado == MaquinaMEPA().ejecutar(ProgramaMEPA(bajar(generador.codigo)), [vueltas])
+            segundos = medir(lambda: MaquinaMEPA().ejecutar(programa, [vueltas]), args.repeticiones)
+            print(f"  {'superinstrucciones' if superinstrucciones else 'estandar':18} "
+                  f"{instrucciones_por_vuelta(generador.codigo):3} instrucciones/vuelta  {segundos:8.4f} s  {resultado}")
+
+
+def bench_perfil(args):
+    analizador = AnalizadorLexico('regex')
+    analizador.cargar_archivo("pascal_test/mepa/fib.pas")
+    parser = AnalizadorSintactico(analizador)
+    raiz = parser.analizar()
+    generador = GeneradorMEPA(parser.semantico.tabla_simbolos)
+    generador.generar(raiz)
+    programa = ProgramaMEPA.desde_generador(generador)
+    perfilador = PerfiladorMEPA()
+    for n in (15, 20):
+        resultado = MaquinaMEPA().ejecutar(programa, [n])
+        assert resultado == perfilador.ejecutar(programa, [n])
+        segundos = medir(lambda: MaquinaMEPA().ejecutar(programa, [n]), args.repeticiones)
+        segundos_perfil = medir(lambda: perfilador.ejecutar(programa, [n]), args.repeticiones)
+        print(f"fib({n}) = {resultado[0]}")
+        print(f"  {'maquina':10} {segundos:8.4f} s")
+        print(f"  {'perfilador':10} {segundos_perfil:8.4f} s  {segundos_perfil / segundos:5.2f}x")
+    print(perfilador.perfil.reporte())
+
+
+def bench_mapa(args):
+    analizador = AnalizadorLexico('regex')
+    analizador.texto = programa_sintetico(args.sentencias)
+    parser = AnalizadorSintactico(analizador)
+    raiz = parser.analizar()
+    tabla = parser.semantico.tabla_simbolos
+    for mapa_fuente in (False, True):
+        generador = GeneradorMEPA(tabla, mapa_fuente=mapa_fuente)
+        generador.generar(raiz)
+        segundos = medir(lambda: GeneradorMEPA(tabla, mapa_fuente=mapa_fuente).generar(raiz), args.repeticiones)
+        print(f"{'con mapa' if mapa_fuente else 'sin mapa':10} {len(generador.codigo):8} instrucciones  {segundos:8.4f} s")
+
+    with open("pascal_test/mepa/fib.pas") as f:
+        fuente = f.read()
+    analizador = AnalizadorLexico('regex')
+    analizador.texto = fuente
+    parser = AnalizadorSintactico(analizador)
+    raiz = parser.analizar()
+    generador = GeneradorMEPA(parser.semantico.tabla_simbolos, mapa_fuente=True)
+    generador.generar(raiz)
+    perfilador = PerfiladorMEPA()
+    perfilador.ejecutar(ProgramaMEPA.desde_generador(generador), [15])
+    print(perfilador.perfil.reporte_lineas(generador.mapa, fuente))
+
+
+CASOS = {
+    'lexico': bench_lexico,
+    'tokens': bench_tokens,
+    'rss': bench_rss,
+    'expresiones': bench_expresiones,
+    'listas': bench_listas,
+    'parentesis': bench_parentesis,
+    'generacion': bench_generacion,
+    'nodos': bench_nodos,
+    'despacho': bench_despacho,
+    'anidamiento': bench_anidamiento,
+    'emision': bench_emision,
+    'salida': bench_salida,
+    'mirilla': bench_mirilla,
+    'plegado': bench_plegado,
+    'muerto': bench_muerto,
+    'biblioteca': bench_biblioteca,
+    'cortocircuito': bench_cortocircuito,
+    'maquina': bench_maquina,
+    'python': bench_python,
+    'superinstrucciones': bench_superinstrucciones,
+    'perfil': bench_perfil,
+    'mapa': bench_mapa,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks del compilador Pascal")
+    parser.add_argument('caso', choices=CASOS)
+    parser.add_argument('--sentencias', type=int, default=20000, help="tamaño del programa sintético")
+    parser.add_argument('--terminos', type=int, default=50000, help="términos de la expresión más larga")
+    parser.add_argument('--elementos', type=int, default=100000, help="largo de la lista más larga")
+    parser.add_argument('--repeticiones', type=int, default=3)
+    args = parser.parse_args()
+    CASOS[args.caso](args)
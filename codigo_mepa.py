@@ -0,0 +1,331 @@
+"""
+Representación del código MEPA generado.
+
+El generador no arma strings: agrega instrucciones (opcode, operando1,
+operando2) a arreglos compactos de CodigoMEPA. El texto .mepa se arma recién
+cuando se lo pide (texto()), y el mismo código se puede guardar y cargar en un
+formato binario de ancho fijo (a_bytes() / desde_bytes()) con las etiquetas ya
+resueltas a direcciones, que un cargador lee sin parsear texto. desde_texto()
+vuelve a cargar un listado .mepa.
+
+INCR, DCVV y DCVC son superinstrucciones del dialecto extendido (ver
+superinstrucciones.py): sus operandos no caben en op1/op2 y van en la tabla
+superoperandos, con op1 como índice.
+
+EscritorMEPA tiene la misma interfaz de emisión pero no guarda el código:
+escribe cada instrucción como texto en un archivo apenas se agrega.
+"""
+import struct
+import sys
+from array import array
+from enum import IntEnum
+
+
+class Instruccion(IntEnum):
+    """Opcodes de las instrucciones MEPA."""
+    NADA = 0  # Sin efecto; en el código marca la posición de una etiqueta
+    INPP = 1  # Iniciar programa principal
+    PARA = 2  # Parar la máquina
+    RMEM = 3  # Reservar memoria
+    LMEM = 4  # Liberar memoria
+    APCT = 5  # Apilar constante
+    APVL = 6  # Apilar valor (nivel, offset)
+    ALVL = 7  # Almacenar valor (nivel, offset)
+    SUMA = 8
+    SUST = 9
+    MULT = 10
+    DIVI = 11
+    UMEN = 12  # Menos unario
+    CONJ = 13  # Conjunción
+    DISJ = 14  # Disyunción
+    NEGA = 15  # Negación lógica
+    CMME = 16  # Comparar menor
+    CMMA = 17  # Comparar mayor
+    CMIG = 18  # Comparar igual
+    CMDG = 19  # Comparar desigual
+    CMNI = 20  # Comparar menor o igual
+    CMYI = 21  # Comparar mayor o igual
+    DSVS = 22  # Desviar siempre
+    DSVF = 23  # Desviar si es falso
+    LEER = 24
+    IMPR = 25
+    LLPR = 26  # Llamar a procedimiento
+    ENPR = 27  # Entrar a procedimiento (nivel)
+    RTPR = 28  # Retornar de procedimiento (nivel, num_parametros)
+    # Superinstrucciones (dialecto extendido)
+    INCR = 29  # Incrementar variable (nivel, offset, constante)
+    DCVV = 30  # Desviar si es falsa la comparación de dos variables (CMxx, nivel, offset, nivel, offset, etiqueta)
+    DCVC = 31  # Desviar si es falsa la comparación de variable y constante (CMxx, nivel, offset, constante, etiqueta)
+
+
+# Operandos de cada instrucción
+SIN_OPERANDOS, UN_OPERANDO, DOS_OPERANDOS, ETIQUETA, SUPEROPERANDOS = range(5)
+
+OPERANDOS = [SIN_OPERANDOS] * len(Instruccion)
+for _instruccion in (Instruccion.RMEM, Instruccion.LMEM, Instruccion.APCT, Instruccion.ENPR):
+    OPERANDOS[_instruccion] = UN_OPERANDO
+for _instruccion in (Instruccion.APVL, Instruccion.ALVL, Instruccion.RTPR):
+    OPERANDOS[_instruccion] = DOS_OPERANDOS
+for _instruccion in (Instruccion.NADA, Instruccion.DSVS, Instruccion.DSVF, Instruccion.LLPR):
+    OPERANDOS[_instruccion] = ETIQUETA
+for _instruccion in (Instruccion.INCR, Instruccion.DCVV, Instruccion.DCVC):
+    OPERANDOS[_instruccion] = SUPEROPERANDOS
+OPERANDOS = tuple(OPERANDOS)
+
+NOMBRE_INSTRUCCION = tuple(instruccion.name for instruccion in Instruccion)
+
+# Formato binario: cabecera, tabla de etiquetas y tres columnas de ancho fijo
+# (opcodes de 1 byte, operando1 y operando2 con el menor ancho que alcance)
+MAGICO = b'MEPA'
+VERSION = 1
+_CABECERA = struct.Struct('<4sHBBII')  # mágico, versión, ancho op1, ancho op2, instrucciones, etiquetas
+_ETIQUETA = struct.Struct('<iH')       # dirección, largo del nombre
+_TIPO_POR_ANCHO = {1: 'b', 2: 'h', 4: 'i', 8: 'q'}
+
+# Rango de los enteros MEPA: palabras de 64 bits con signo en la pila de la
+# máquina y en los operandos (array('q'))
+ENTERO_MINIMO = -(1 << 63)
+ENTERO_MAXIMO = (1 << 63) - 1
+
+
+def dividir(a, b):
+    """División entera de DIVI (div de Pascal): trunca hacia cero, no hacia -infinito como //."""
+    cociente = abs(a) // abs(b)
+    return cociente if (a < 0) == (b < 0) else -cociente
+
+
+def _ancho_minimo(columna):
+    """Menor ancho (en bytes) de entero con signo que representa todos los valores de columna."""
+    if not columna:
+        return 1
+    menor, mayor = min(columna), max(columna)
+    for ancho in (1, 2, 4, 8):
+        limite = 1 << (8 * ancho - 1)
+        if -limite <= menor and mayor < limite:
+            return ancho
+
+
+def formatear(opcode, op1, op2, etiquetas, superoperandos=()):
+    """Texto de una instrucción, como en un archivo .mepa (etiquetas: [id_etiqueta] -> nombre)."""
+    operandos = OPERANDOS[opcode]
+    nombre = NOMBRE_INSTRUCCION[opcode]
+    if operandos == SUPEROPERANDOS:
+        # DCVx: la comparación por nombre y la etiqueta al final
+        valores = superoperandos[op1]
+        if opcode != Instruccion.INCR:
+            valores = (NOMBRE_INSTRUCCION[valores[0]], *valores[1:-1], etiquetas[valores[-1]])
+        return f"{nombre} {', '.join(map(str, valores))}"
+    if operandos == SIN_OPERANDOS:
+        return nombre
+    if operandos == UN_OPERANDO:
+        return f"{nombre} {op1}"
+    if operandos == DOS_OPERANDOS:
+        return f"{nombre} {op1}, {op2}"
+    if opcode == Instruccion.NADA:
+        return f"{etiquetas[op1]} NADA"
+    return f"{nombre} {etiquetas[op1]}"
+
+
+class CodigoMEPA:
+    """
+    Flujo de instrucciones MEPA en arreglos paralelos: opcodes[i], op1[i], op2[i].
+    Las instrucciones con ETIQUETA guardan en op1 el id de la etiqueta; NADA
+    con etiqueta es su definición.
+    """
+
+    def __init__(self):
+        self.opcodes = array('B')
+        self.op1 = array('q')
+        self.op2 = array('q')
+        self.etiquetas = []       # map: [id_etiqueta] -> nombre
+        self.direcciones = []     # map: [id_etiqueta] -> índice de su NADA (-1 si no se definió)
+        self.ids_etiquetas = {}   # map: {nombre: id_etiqueta}
+        self.superoperandos = []  # map: [op1 de una superinstrucción] -> tupla de operandos
+
+    def __len__(self):
+        return len(self.opcodes)
+
+    def etiqueta(self, nombre):
+        """Devuelve el id de la etiqueta con ese nombre, creándola si no existe."""
+        id_etiqueta = self.ids_etiquetas.get(nombre)
+        if id_etiqueta is None:
+            id_etiqueta = self.ids_etiquetas[nombre] = len(self.etiquetas)
+            self.etiquetas.append(nombre)
+            self.direcciones.append(-1)
+        return id_etiqueta
+
+    def agregar(self, opcode, op1=0, op2=0):
+        self.opcodes.append(opcode)
+        self.op1.append(op1)
+        self.op2.append(op2)
+
+    def definir(self, id_etiqueta):
+        """Agrega la definición (NADA) de la etiqueta en la posición actual."""
+        self.direcciones[id_etiqueta] = len(self.opcodes)
+        self.agregar(Instruccion.NADA, id_etiqueta)
+
+    def agregar_superinstruccion(self, opcode, *operandos):
+        """Agrega una superinstrucción con sus operandos (en DCVx la etiqueta es un id)."""
+        self.agregar(opcode, len(self.superoperandos))
+        self.superoperandos.append(operandos)
+
+    # --- Texto ---
+
+    def linea(self, i):
+        """Texto de la instrucción i, como en un archivo .mepa."""
+        return formatear(self.opcodes[i], self.op1[i], self.op2[i], self.etiquetas, self.superoperandos)
+
+    def lineas(self):
+        return map(self.linea, range(len(self.opcodes)))
+
+    def texto(self):
+        """Devuelve el código como texto MEPA (una instrucción por línea)."""
+        return "\n".join(self.lineas())
+
+    @classmethod
+    def desde_texto(cls, texto):
+        """Carga un CodigoMEPA desde el texto de un archivo .mepa (como el de texto())."""
+        codigo = cls()
+        for numero, linea in enumerate(texto.splitlines(), 1):
+            partes = linea.replace(',', ' ').split()
+            if not partes:
+                continue
+            if len(partes) == 2 and partes[1] == 'NADA':
+                id_etiqueta = codigo.etiqueta(partes[0])
+                if codigo.direcciones[id_etiqueta] >= 0:
+                    raise ValueError(f"Etiqueta MEPA definida dos veces en la línea {numero}: {partes[0]}")
+                codigo.definir(id_etiqueta)
+                continue
+            try:
+                opcode = Instruccion[partes[0]]
+                operandos = OPERANDOS[opcode]
+                if opcode == Instruccion.INCR and len(partes) == 4:
+                    codigo.agregar_superinstruccion(opcode, *map(int, partes[1:]))
+                elif operandos == SUPEROPERANDOS and len(partes) == (7 if opcode == Instruccion.DCVV else 6):
+                    codigo.agregar_superinstruccion(opcode, int(Instruccion[partes[1]]), *map(int, partes[2:-1]),
+                                                    codigo.etiqueta(partes[-1]))
+                elif operandos == ETIQUETA and opcode != Instruccion.NADA and len(partes) == 2:
+                    codigo.agregar(opcode, codigo.etiqueta(partes[1]))
+                elif operandos < ETIQUETA and len(partes) == 1 + operandos:  # SIN/UN/DOS_OPERANDOS = 0/1/2
+                    codigo.agregar(opcode, *map(int, partes[1:]))
+                else:
+                    raise ValueError
+            except (KeyError, ValueError):
+                raise ValueError(f"Instrucción MEPA inválida en la línea {numero}: {linea.strip()}") from None
+        return codigo
+
+    def resolver_etiquetas(self):
+        """
+        Copia de op1 con los operandos de saltos y llamadas resueltos a la
+        dirección (índice de instrucción) de su etiqueta.
+        """
+        op1 = array('q', self.op1)
+        direcciones = self.direcciones
+        for i, opcode in enumerate(self.opcodes):
+            if OPERANDOS[opcode] == ETIQUETA:
+                direccion = direcciones[op1[i]]
+                if direccion < 0:
+                    raise ValueError(f"Etiqueta MEPA sin definir: {self.etiquetas[op1[i]]}")
+                op1[i] = direccion
+        return op1
+
+    # --- Binario ---
+
+    def a_bytes(self):
+        """
+        Codifica el código en el formato binario: los operandos de saltos y
+        llamadas quedan resueltos a la dirección (índice de instrucción) de su
+        etiqueta. La tabla de etiquetas se conserva para desensamblar.
+        """
+        if self.superoperandos:
+            raise ValueError("El bytecode MEPA no admite superinstrucciones: bajarlas antes a MEPA estándar")
+        op1 = self.resolver_etiquetas()
+        direcciones = self.direcciones
+
+        ancho1, ancho2 = _ancho_minimo(op1), _ancho_minimo(self.op2)
+        partes = [_CABECERA.pack(MAGICO, VERSION, ancho1, ancho2, len(self.opcodes), len(self.etiquetas))]
+        for nombre, direccion in zip(self.etiquetas, direcciones):
+            nombre_bytes = nombre.encode('utf-8')
+            partes.append(_ETIQUETA.pack(direccion, len(nombre_bytes)))
+            partes.append(nombre_bytes)
+        partes.append(self.opcodes.tobytes())
+        for columna, ancho in ((op1, ancho1), (self.op2, ancho2)):
+            columna = array(_TIPO_POR_ANCHO[ancho], columna)
+            if sys.byteorder == 'big':
+                columna.byteswap()
+            partes.append(columna.tobytes())
+        return b"".join(partes)
+
+    @classmethod
+    def desde_bytes(cls, datos):
+        """Carga un CodigoMEPA desde el formato binario de a_bytes()."""
+        datos = memoryview(datos)
+        magico, version, ancho1, ancho2, num_instrucciones, num_etiquetas = _CABECERA.unpack_from(datos)
+        if magico != MAGICO or version != VERSION:
+            raise ValueError("No es un archivo de bytecode MEPA válido")
+        codigo = cls()
+        posicion = _CABECERA.size
+        etiqueta_en = {}  # map: {dirección: id_etiqueta}
+        for id_etiqueta in range(num_etiquetas):
+            direccion, largo = _ETIQUETA.unpack_from(datos, posicion)
+            posicion += _ETIQUETA.size
+            codigo.etiquetas.append(str(datos[posicion:posicion + largo], 'utf-8'))
+            codigo.direcciones.append(direccion)
+            codigo.ids_etiquetas[codigo.etiquetas[-1]] = id_etiqueta
+            etiqueta_en[direccion] = id_etiqueta
+            posicion += largo
+
+        codigo.opcodes.frombytes(datos[posicion:posicion + num_instrucciones])
+        posicion += num_instrucciones
+        for destino, ancho in ((codigo.op1, ancho1), (codigo.op2, ancho2)):
+            columna = array(_TIPO_POR_ANCHO[ancho])
+            columna.frombytes(datos[posicion:posicion + ancho * num_instrucciones])
+            if sys.byteorder == 'big':
+                columna.byteswap()
+            destino.fromlist(columna.tolist())
+            posicion += ancho * num_instrucciones
+
+        # En memoria los operandos de etiqueta vuelven a ser ids de etiqueta
+        op1 = codigo.op1
+        for i, opcode in enumerate(codigo.opcodes):
+            if OPERANDOS[opcode] == ETIQUETA:
+                op1[i] = etiqueta_en[op1[i]]
+        return codigo
+
+
+class EscritorMEPA:
+    """
+    Destino de emisión que escribe cada instrucción como texto .mepa en
+    archivo (abierto en modo texto; su buffer agrupa las escrituras) en lugar
+    de guardarla: el listado completo nunca está en memoria. Las etiquetas se
+    escriben por nombre, así que no hace falta volver atrás a resolverlas. El
+    texto es el mismo que CodigoMEPA.texto().
+    """
+
+    def __init__(self, archivo):
+        self.escribir = archivo.write
+        self.etiquetas = []       # map: [id_etiqueta] -> nombre
+        self.ids_etiquetas = {}   # map: {nombre: id_etiqueta}
+        self.num_instrucciones = 0
+
+    def __len__(self):
+        return self.num_instrucciones
+
+    def etiqueta(self, nombre):
+        """Devuelve el id de la etiqueta con ese nombre, creándola si no existe."""
+        id_etiqueta = self.ids_etiquetas.get(nombre)
+        if id_etiqueta is None:
+            id_etiqueta = self.ids_etiquetas[nombre] = len(self.etiquetas)
+            self.etiquetas.append(nombre)
+        return id_etiqueta
+
+    def agregar(self, opcode, op1=0, op2=0):
+        # Separador antes de cada línea salvo la primera: sin salto de línea final, como texto()
+        if self.num_instrucciones:
+            self.escribir("\n")
+        self.escribir(formatear(opcode, op1, op2, self.etiquetas))
+        self.num_instrucciones += 1
+
+    def definir(self, id_etiqueta):
+        """Escribe la definición (NADA) de la etiqueta en la posición actual."""
+        self.agregar(Instruccion.NADA, id_etiqueta)
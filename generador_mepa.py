@@ -1,216 +1,197 @@
 from tabla_simbolos import TablaSimbolos
+from codigo_mepa import CodigoMEPA, EscritorMEPA, Instruccion
+from superinstrucciones import CodigoFusionado
+from mapa_fuente import MapaFuente
 from ast import * 
 
-class GeneradorMEPA:
+# Opcodes como enteros del módulo: leer un miembro de Instruccion por
+# instrucción emitida es notablemente más lento
+(NADA, INPP, PARA, RMEM, LMEM, APCT, APVL, ALVL, SUMA, SUST, MULT, DIVI, UMEN,
+ CONJ, DISJ, NEGA, CMME, CMMA, CMIG, CMDG, CMNI, CMYI, DSVS, DSVF, LEER, IMPR,
+ LLPR, ENPR, RTPR, INCR, DCVV, DCVC) = Instruccion
+
+# Instrucción MEPA de cada operador
+INSTRUCCION_BINARIA = {
+    '+': SUMA,
+    '-': SUST,
+    '*': MULT,
+    'div': DIVI,
+    'or': DISJ,   # Disyunción
+    'and': CONJ,  # Conjunción
+    '=': CMIG,    # Comparar igual
+    '<>': CMDG,   # Comparar desigual
+    '<': CMME,    # Comparar menor
+    '>': CMMA,    # Comparar mayor
+    '<=': CMNI,   # Comparar menor o igual
+    '>=': CMYI,   # Comparar mayor o igual
+}
+INSTRUCCION_UNARIA = {
+    '-': UMEN,    # Menos unario
+    'not': NEGA,  # Negación lógica
+}
+# Comparación opuesta: saltar si a < b es verdadero es saltar si a >= b es falso
+COMPARACION_OPUESTA = {
+    '=': '<>',
+    '<>': '=',
+    '<': '>=',
+    '>=': '<',
+    '>': '<=',
+    '<=': '>',
+}
+
+class GeneradorMEPA(Visitante):
     """
     Genera código MEPA (Máquina de Ejecución de PASCAL) a partir de un AST
-    y una Tabla de Símbolos ya poblada.
+    y una Tabla de Símbolos ya poblada. Cada nodo se despacha a su método
+    generar_<tipo_nodo> (ej: generar_asignacion) por la tabla de Visitante.
+
+    Con salida (un archivo de texto abierto) el código no se guarda en
+    memoria: cada instrucción se escribe en el archivo al emitirse.
+
+    Con cortocircuito, and/or se compilan a saltos (DSVF/DSVS) y no evalúan
+    el operando derecho si el izquierdo ya decide el resultado; en las
+    condiciones de if/while se salta directo a la rama. No es el modo por
+    defecto: cambia lo que se observa si el operando derecho llama a una
+    función con efectos.
+
+    Con superinstrucciones el código se emite en el dialecto extendido de
+    superinstrucciones.py (sólo en memoria): x := x + c y las comparaciones
+    de variables seguidas de DSVF salen fusionadas en una instrucción.
+
+    Con mapa_fuente se arma además, en self.mapa, el MapaFuente con la
+    posición en el fuente Pascal de cada instrucción emitida.
     """
-    def __init__(self, tabla_simbolos: TablaSimbolos):
+    prefijo = 'generar_'
+
+    def __init__(self, tabla_simbolos: TablaSimbolos, salida=None, cortocircuito=False, superinstrucciones=False,
+                 mapa_fuente=False):
         self.tabla_simbolos = tabla_simbolos
-        self.codigo_mepa = []  # Lista de líneas de código MEPA
+        self.cortocircuito = cortocircuito
+        # Instrucciones (opcode, op1, op2): en memoria (el texto se arma al
+        # pedirlo) o escritas directo en salida
+        if superinstrucciones:
+            if salida is not None:
+                raise ValueError("Superinstructions need the code in memory: they can not be written as emitted")
+            self.codigo = CodigoFusionado()
+        else:
+            self.codigo = CodigoMEPA() if salida is None else EscritorMEPA(salida)
         self.contador_etiquetas = 0
+        self.mapa = MapaFuente() if mapa_fuente else None
+        self.posicion = None  # (linea, columna) del nodo que se está generando, con mapa
         
-        # Estructuras para almacenar la información de direccionamiento MEPA
-        # Se llenarán durante el pre-cálculo
-        self.info_niveles = {}     # map: {ambito_nombre: nivel_lexico}
-        self.info_offsets = {}     # map: {clave_simbolo_unica: offset}
-        self.info_locales = {}     # map: {ambito_nombre: num_variables_locales}
-        self.info_params = {}      # map: {ambito_nombre: num_parametros}
+        # Etiquetas de las subrutinas: niveles y offsets ya vienen resueltos
+        # en los símbolos desde la declaración
+        self.etiquetas = {}        # map: {Ambito: etiqueta de la subrutina}
+        self.etiquetas_usadas = set()
         
         # Estado de la visita de generación de código
-        self.ambito_actual_gen = "global"
+        self.ambito_actual_gen = tabla_simbolos.global_
         self.nivel_actual_gen = 0
 
-    def nueva_etiqueta(self) -> str:
-        """Crea una nueva etiqueta para saltos (newlabel)."""
-        etiqueta = f"L{self.contador_etiquetas}"
+    def nueva_etiqueta(self) -> int:
+        """Crea una nueva etiqueta para saltos (newlabel) y devuelve su id."""
+        etiqueta = self.codigo.etiqueta(f"L{self.contador_etiquetas}")
         self.contador_etiquetas += 1
         return etiqueta
 
-    def emitir(self, instruccion: str, *operandos):
-        """Añade una instrucción MEPA al código."""
-        if operandos:
-            # Formatea operandos como "nivel,offset" o "etiqueta"
-            op_str = ", ".join(map(str, operandos))
-            self.codigo_mepa.append(f"  {instruccion} {op_str}")
-        else:
-            self.codigo_mepa.append(f"  {instruccion}")
+    def emitir(self, instruccion: int, op1=0, op2=0):
+        """Añade una instrucción MEPA al código: opcode y operandos (nivel, offset, constante o etiqueta)."""
+        self.codigo.agregar(instruccion, op1, op2)
 
-    def emitir_etiqueta(self, etiqueta: str):
+    def emitir_etiqueta(self, etiqueta: int):
         """Añade una etiqueta MEPA al código."""
-        self.codigo_mepa.append(f"{etiqueta} NADA")
+        self.codigo.definir(etiqueta)
 
     def imprimir_codigo(self):
         """Muestra el código MEPA generado de forma legible."""
-        for linea in self.codigo_mepa:
-            print(linea.strip())
+        for linea in self.codigo.lineas():
+            print(linea)
 
     def obtener_codigo(self):
-        """Devuelve el código MEPA como un único string."""
-        return "\n".join(linea.strip() for linea in self.codigo_mepa)
-
-    # --- PASO 1: PRE-CÁLCULO DE NIVELES Y DESPLAZAMIENTOS ---
-    
-    def precalculo(self, nodo_raiz: NodoPrograma):
-        """
-        Punto de entrada para la primera pasada. Recorre el AST para 
-        asignar niveles léxicos y desplazamientos (offsets) a todos
-        los símbolos.
-        """
-        # Inicializar nivel global
-        self.info_niveles['global'] = 0
-        
-        # Procesar variables globales primero
-        offset_local = 0
-        for clave, simbolo in self.tabla_simbolos.tabla.items():
-            if simbolo['ambito'] == 'global' and simbolo['categoria'] == 'variable':
-                self.info_offsets[clave] = offset_local
-                offset_local += 1
-        self.info_locales['global'] = offset_local
-        
-        # Ahora procesar recursivamente
-        self._precalculo_recursivo(nodo_raiz, 0, "global")
-
-
-    def _precalculo_recursivo(self, nodo, nivel: int, ambito: str):
-        """
-        Visitor recursivo para la primera pasada (Pre-cálculo).
-        """
-        if not nodo:
-            return
-
-        tipo_nodo = getattr(nodo, 'tipo_nodo', None)
-        
-        # Registra el nivel para el ámbito actual
-        self.info_niveles[ambito] = nivel
-        
-        # Asegurarse de que el ámbito esté en la lista de ámbitos de la tabla de símbolos
-        if ambito not in self.tabla_simbolos.ambitos and ambito != "global":
-            self.tabla_simbolos.ambitos.append(ambito)
-        
-        if tipo_nodo == 'programa':
-            # Las variables globales ya fueron procesadas, ahora procesar subrutinas
-            if nodo.declaraciones:
-                for decl in nodo.declaraciones:
-                    self._precalculo_recursivo(decl, nivel + 1, decl.nombre.lower())
-            
-        elif tipo_nodo in ('declaracion_procedimiento', 'declaracion_funcion'):
-            nombre_ambito = nodo.nombre.lower()
-            num_parametros = len(nodo.parametros)
-            self.info_params[nombre_ambito] = num_parametros
-            
-            # 1. Asignar offsets a parámetros (negativos)
-            for i, param_info in enumerate(nodo.parametros):
-                nombre_param = param_info['nombre']
-                clave_simbolo = f"{nombre_ambito}.{nombre_param}"
-                # Desplazamiento MEPA para parámetros: -(n+3-i)
-                offset_param = -(num_parametros + 3 - (i + 1))
-                self.info_offsets[clave_simbolo] = offset_param
-            
-            # 2. Asignar offset para el valor de retorno (si es función)
-            if tipo_nodo == 'declaracion_funcion':
-                clave_retorno = f"{nombre_ambito}.{nodo.nombre.lower()}"
-                # Desplazamiento MEPA para retorno: -(n+3)
-                offset_retorno = -(num_parametros + 3)
-                self.info_offsets[clave_retorno] = offset_retorno
-
-            # 3. Asignar offsets a variables locales (positivos)
-            offset_local = 0
-            for clave, simbolo in self.tabla_simbolos.tabla.items():
-                # Busca variables locales (ámbito = nombre de la subrutina)
-                if simbolo['ambito'] == nombre_ambito and simbolo['categoria'] == 'variable':
-                    # Si el símbolo no está ya en offsets (es decir, no es un param), asígnale uno
-                    if clave not in self.info_offsets:
-                        self.info_offsets[clave] = offset_local
-                        offset_local += 1
-            self.info_locales[nombre_ambito] = offset_local
-            
-            # 4. Recorrer declaraciones anidadas
-            if nodo.declaraciones_internas:
-                for decl_interna in nodo.declaraciones_internas:
-                    self._precalculo_recursivo(decl_interna, nivel + 1, decl_interna.nombre.lower())
+        """Devuelve el código MEPA como un único string (sólo si se generó en memoria, sin salida)."""
+        return self.codigo.texto()
 
+    def obtener_bytecode(self):
+        """Devuelve el código MEPA en el formato binario de CodigoMEPA.a_bytes()."""
+        return self.codigo.a_bytes()
 
     # --- Funciones de ayuda para la Generación de Código ---
 
-    def buscar_info_simbolo(self, nombre: str):
+    def etiqueta_subrutina(self, ambito):
         """
-        Busca un símbolo en la tabla de símbolos (respetando el ámbito)
-        y devuelve su información de nivel y offset calculada.
+        Etiqueta MEPA de una subrutina: su nombre, o el nombre con el id del
+        ámbito si otra subrutina anidada con el mismo nombre ya lo usa.
         """
-        # 1. Buscar en la tabla de símbolos original
-        simbolo_ts = self.tabla_simbolos.buscar(nombre, self.ambito_actual_gen)
-        if not simbolo_ts:
-            # Si no se encuentra en el ámbito actual, intentar buscar globalmente
-            simbolo_ts = self.tabla_simbolos.buscar(nombre, "global")
-            if not simbolo_ts:
-                raise Exception(f"Error interno del generador: Símbolo '{nombre}' no encontrado en la tabla de símbolos.")
-
-        # 2. Construir la clave única que usamos en el pre-cálculo
-        ambito_simbolo = simbolo_ts['ambito']
-        clave_unica = f"{ambito_simbolo}.{simbolo_ts['nombre']}" if ambito_simbolo != "global" else simbolo_ts['nombre']
-        
-        # 3. Para funciones/procedimientos, no necesitan offset
-        if simbolo_ts['categoria'] in ('funcion', 'procedimiento'):
-            # Si estamos en el contexto de una asignación a una función, 
-            # necesitamos el offset del slot de retorno
-            if self.ambito_actual_gen == simbolo_ts['nombre'] and simbolo_ts['categoria'] == 'funcion':
-                # Estamos asignando al nombre de la función dentro de su propio cuerpo
-                nombre_ambito = simbolo_ts['nombre']
-                num_params = self.info_params.get(nombre_ambito, 0)
-                offset_retorno = -(num_params + 3)
-                nivel = self.info_niveles[nombre_ambito]
-                return {'nivel': nivel, 'offset': offset_retorno, 'tipo': simbolo_ts['tipo'], 'categoria': simbolo_ts['categoria'], 'nombre': simbolo_ts['nombre']}
-            else:
-                # Uso normal de función/procedimiento (llamada)
-                return {'nivel': None, 'offset': None, 'tipo': simbolo_ts['tipo'], 'categoria': simbolo_ts['categoria'], 'nombre': simbolo_ts['nombre']}
-        
-        # 4. Verificar que el símbolo tiene offset asignado
-        if clave_unica not in self.info_offsets:
-            # Si es una variable global, intentar usar la clave simple
-            if ambito_simbolo == "global" and simbolo_ts['nombre'] in self.info_offsets:
-                clave_unica = simbolo_ts['nombre']
-            else:
-                raise Exception(f"Error interno del generador: Símbolo '{nombre}' (clave: {clave_unica}) no tiene offset asignado.")
-                
-        # 5. Obtener info de nivel y offset
-        if ambito_simbolo not in self.info_niveles:
-            raise Exception(f"Error interno del generador: Ámbito '{ambito_simbolo}' no tiene nivel asignado.")
-            
-        nivel = self.info_niveles[ambito_simbolo]
-        offset = self.info_offsets[clave_unica]
-        
-        return {'nivel': nivel, 'offset': offset, 'tipo': simbolo_ts['tipo'], 'categoria': simbolo_ts['categoria']}
-
+        nombre = ambito.nombre.lower()
+        if nombre in self.etiquetas_usadas:
+            nombre = f"{nombre}_{ambito.id}"
+        self.etiquetas_usadas.add(nombre)
+        etiqueta = self.etiquetas[ambito] = self.codigo.etiqueta(nombre)
+        return etiqueta
 
 
-    # --- PASO 2: GENERACIÓN DE CÓDIGO MEPA ---
+    # --- GENERACIÓN DE CÓDIGO MEPA ---
+    #
+    # Los generadores no se llaman recursivamente: programan (ver
+    # Visitante.programar) los hijos y las acciones que van después de ellos
+    # en la pila de trabajo de recorrer(), en el orden en que se emiten. Así
+    # la profundidad de anidamiento del programa no está limitada por la pila
+    # de Python. Las etiquetas se piden en el mismo punto de la emisión que en
+    # un recorrido recursivo, para que su numeración no cambie.
 
     def generar(self, nodo_raiz: NodoPrograma):
         """
         Punto de entrada principal para generar código.
         """
-        # PASO 1: Calcular niveles y offsets
-        self.precalculo(nodo_raiz)
-        
-        # PASO 2: Generar el código MEPA
-        self._generar_recursivo(nodo_raiz)
-
+        if self.mapa is None:
+            self.recorrer(nodo_raiz)
+        else:
+            self._recorrer_con_posiciones(nodo_raiz)
 
-    def _generar_recursivo(self, nodo):
+    def _recorrer_con_posiciones(self, raiz):
         """
-        Punto de entrada recursivo para generar código desde un nodo AST.
+        recorrer() que además anota en el mapa la posición de cada
+        instrucción: la del nodo más interno con posición que la emitió, él o
+        una acción que programó. Después de visitar un nodo se vuelve a la
+        posición anterior: en seguida si no programó nada, o si no con una
+        acción programada después de lo suyo. Así lo que el padre emite
+        después de sus hijos (ej: el operador después de los operandos) vuelve
+        a tener la posición del padre.
         """
-        if not nodo:
-            return
-
-        metodo_generador = f"generar_{nodo.tipo_nodo}"
-        if hasattr(self, metodo_generador):
-            # Llama al método específico (ej: generar_asignacion(nodo))
-            getattr(self, metodo_generador)(nodo)
-        else:
-            raise ValueError(f"No hay generador MEPA para el tipo de nodo: {nodo.tipo_nodo}")
+        pendientes = self.pendientes = [raiz]
+        despacho = self.despacho
+        posiciones = self.mapa.posiciones
+        anotar = posiciones.append
+        codigo = self.codigo
+        while pendientes:
+            item = pendientes.pop()
+            if type(item) is tuple:
+                item[0](*item[1:])
+                anterior = None
+            else:
+                anterior = self.posicion
+                if getattr(item, 'linea', None) is not None:
+                    self.posicion = (item.linea, item.columna)
+                programados = len(pendientes)
+                try:
+                    metodo = despacho[type(item)]
+                except KeyError:
+                    metodo = self.resolver(type(item))
+                metodo(self, item)
+            emitidas = len(codigo)
+            if emitidas != len(posiciones):
+                # Las superinstrucciones reemplazan instrucciones ya anotadas: quedan con la posición de la primera
+                del posiciones[emitidas:]
+                while len(posiciones) < emitidas:
+                    anotar(self.posicion)
+            if anterior is not self.posicion and type(item) is not tuple:
+                if len(pendientes) == programados:
+                    self.posicion = anterior
+                else:
+                    pendientes.insert(programados, (setattr, self, 'posicion', anterior))
+
+    def visitar_desconocido(self, nodo):
+        raise ValueError(f"No hay generador MEPA para el tipo de nodo: {nodo.tipo_nodo}")
 
     # --- Generadores de Sentencias (S) ---
 
@@ -218,34 +199,32 @@ class GeneradorMEPA:
         """Genera el wrapper del programa principal."""
         
         # Prólogo del programa principal
-        self.emitir('INPP') # Inicializar máquina 
-        num_globales = self.info_locales.get('global', 0)
+        self.emitir(INPP) # Inicializar máquina 
+        num_globales = self.tabla_simbolos.global_.num_locales
         if num_globales > 0:
-            self.emitir('RMEM', num_globales) # Reservar memoria para globales 
+            self.emitir(RMEM, num_globales) # Reservar memoria para globales 
         
         # Saltar sobre las definiciones de subrutinas
         etiqueta_main = self.nueva_etiqueta()
-        self.emitir('DSVS', etiqueta_main) # Desviar siempre a main 
+        self.emitir(DSVS, etiqueta_main) # Desviar siempre a main 
         
-        # Generar código para las subrutinas declaradas
-        if nodo_programa.declaraciones:
-            for decl in nodo_programa.declaraciones:
-                self._generar_recursivo(decl)
-                
+        # Generar código para las subrutinas declaradas y después el bloque principal
+        self.programar(*(nodo_programa.declaraciones or ()),
+                       (self._bloque_principal, nodo_programa, etiqueta_main, num_globales))
+
+    def _bloque_principal(self, nodo_programa, etiqueta_main, num_globales):
         # --- Comienzo del bloque principal ---
         self.emitir_etiqueta(etiqueta_main)
         
         # Estado de generación para el bloque principal
-        self.ambito_actual_gen = "global"
+        self.ambito_actual_gen = self.tabla_simbolos.global_
         self.nivel_actual_gen = 0
         
-        # Generar código del bloque principal
-        self._generar_recursivo(nodo_programa.bloque)
-        
-        # Epílogo del programa principal
+        # Generar código del bloque principal, luego el epílogo del programa
+        epilogo = [(self.emitir, PARA)] # Parar la máquina 
         if num_globales > 0:
-            self.emitir('LMEM', num_globales) # Liberar memoria de globales 
-        self.emitir('PARA') # Parar la máquina 
+            epilogo.insert(0, (self.emitir, LMEM, num_globales)) # Liberar memoria de globales 
+        self.programar(nodo_programa.bloque, *epilogo)
 
     def generar_declaracion_procedimiento(self, nodo_decl):
         """Genera el código para una definición de procedimiento."""
@@ -255,35 +234,21 @@ class GeneradorMEPA:
         nivel_anterior = self.nivel_actual_gen
         
         # Establecer nuevo estado
-        self.ambito_actual_gen = nodo_decl.nombre.lower()
-        self.nivel_actual_gen = self.info_niveles[self.ambito_actual_gen]
+        self.ambito_actual_gen = nodo_decl.ambito
+        self.nivel_actual_gen = nodo_decl.ambito.nivel
         
-        etiqueta_proc = self.ambito_actual_gen
-        num_locales = self.info_locales.get(self.ambito_actual_gen, 0)
-        num_params = self.info_params.get(self.ambito_actual_gen, 0)
+        etiqueta_proc = self.etiqueta_subrutina(nodo_decl.ambito)
+        num_locales = nodo_decl.ambito.num_locales
         
         # --- Prólogo del Procedimiento ---
         self.emitir_etiqueta(etiqueta_proc)
-        self.emitir('ENPR', self.nivel_actual_gen) # Entrar a procedimiento 
+        self.emitir(ENPR, self.nivel_actual_gen) # Entrar a procedimiento 
         if num_locales > 0:
-            self.emitir('RMEM', num_locales) # Reservar memoria local 
+            self.emitir(RMEM, num_locales) # Reservar memoria local 
             
-        # Generar código para declaraciones anidadas
-        if nodo_decl.declaraciones_internas:
-            for decl in nodo_decl.declaraciones_internas:
-                self._generar_recursivo(decl)
-                
-        # Generar código para el cuerpo
-        self._generar_recursivo(nodo_decl.bloque_cuerpo)
-        
-        # --- Epílogo del Procedimiento ---
-        if num_locales > 0:
-            self.emitir('LMEM', num_locales) # Liberar memoria local 
-        self.emitir('RTPR', self.nivel_actual_gen, num_params) # Retornar de procedimiento 
-        
-        # Restaurar estado anterior
-        self.ambito_actual_gen = ambito_anterior
-        self.nivel_actual_gen = nivel_anterior
+        # Generar código para declaraciones anidadas, el cuerpo y el epílogo
+        self.programar(*self._declaraciones_internas(nodo_decl), nodo_decl.bloque_cuerpo,
+                       (self._epilogo_subrutina, nodo_decl, ambito_anterior, nivel_anterior))
 
     def generar_declaracion_funcion(self, nodo_decl):
         """Genera el código para una definición de función."""
@@ -293,32 +258,43 @@ class GeneradorMEPA:
         nivel_anterior = self.nivel_actual_gen
         
         # Establecer nuevo estado
-        self.ambito_actual_gen = nodo_decl.nombre.lower()
-        self.nivel_actual_gen = self.info_niveles[self.ambito_actual_gen]
+        self.ambito_actual_gen = nodo_decl.ambito
+        self.nivel_actual_gen = nodo_decl.ambito.nivel
         
-        etiqueta_func = self.ambito_actual_gen
-        num_locales = self.info_locales.get(self.ambito_actual_gen, 0)
-        num_params = self.info_params.get(self.ambito_actual_gen, 0)
+        etiqueta_func = self.etiqueta_subrutina(nodo_decl.ambito)
+        num_locales = nodo_decl.ambito.num_locales
         
         # --- Prólogo de la Función ---
         self.emitir_etiqueta(etiqueta_func)
-        self.emitir('ENPR', self.nivel_actual_gen) # Entrar a procedimiento (función) 
+        self.emitir(ENPR, self.nivel_actual_gen) # Entrar a procedimiento (función) 
         if num_locales > 0:
-            self.emitir('RMEM', num_locales) # Reservar memoria local 
+            self.emitir(RMEM, num_locales) # Reservar memoria local 
             
-        # Generar código para declaraciones anidadas
-        if nodo_decl.declaraciones_internas:
-            for decl in nodo_decl.declaraciones_internas:
-                self._generar_recursivo(decl)
-                
-        # Generar código para el cuerpo
-        self._generar_recursivo(nodo_decl.bloque_cuerpo)
-        
-        # --- Epílogo de la Función ---
-        # El valor de retorno ya está en la pila, en el espacio reservado por el llamador
+        # Generar código para declaraciones anidadas, el cuerpo y el epílogo
+        # (el valor de retorno queda en la pila, en el espacio reservado por el llamador)
+        self.programar(*self._declaraciones_internas(nodo_decl), nodo_decl.bloque_cuerpo,
+                       (self._epilogo_subrutina, nodo_decl, ambito_anterior, nivel_anterior))
+
+    def _declaraciones_internas(self, nodo_decl):
+        """
+        Items a programar para las subrutinas anidadas de nodo_decl: como en
+        el programa principal, se saltan con un DSVS hasta el cuerpo, que
+        empieza en una etiqueta propia (sin él, la subrutina caería en el
+        código de la primera subrutina anidada).
+        """
+        if not nodo_decl.declaraciones_internas:
+            return ()
+        etiqueta_cuerpo = self.nueva_etiqueta()
+        self.emitir(DSVS, etiqueta_cuerpo) # Desviar siempre al cuerpo
+        return (*nodo_decl.declaraciones_internas, (self.emitir_etiqueta, etiqueta_cuerpo))
+
+    def _epilogo_subrutina(self, nodo_decl, ambito_anterior, nivel_anterior):
+        # --- Epílogo del Procedimiento / Función ---
+        num_locales = nodo_decl.ambito.num_locales
+        num_params = nodo_decl.ambito.num_params
         if num_locales > 0:
-            self.emitir('LMEM', num_locales) # Liberar memoria local 
-        self.emitir('RTPR', self.nivel_actual_gen, num_params) # Retornar (igual que proc) 
+            self.emitir(LMEM, num_locales) # Liberar memoria local 
+        self.emitir(RTPR, self.nivel_actual_gen, num_params) # Retornar de procedimiento 
         
         # Restaurar estado anterior
         self.ambito_actual_gen = ambito_anterior
@@ -326,59 +302,53 @@ class GeneradorMEPA:
 
     def generar_bloque(self, nodo_bloque):
         """Genera código para una secuencia de sentencias."""
-        for sentencia in nodo_bloque.sentencias:
-            self._generar_recursivo(sentencia)
+        self.programar(*nodo_bloque.sentencias)
 
     def generar_asignacion(self, nodo_asignacion):
         """Genera código para S -> id := E"""
         
         # 1. Generar código para la expresión E.
-        self._generar_recursivo(nodo_asignacion.expresion)
-        
-        # 2. Obtener la información del símbolo
-        nombre_var = nodo_asignacion.variable.nombre
-        info_var = self.buscar_info_simbolo(nombre_var)
-        
-        # 3. Handle function return assignment specially
-        if info_var['categoria'] == 'funcion':
-            # For function return assignment, use the special return slot offset
-            nombre_ambito = info_var['nombre']  # Function name is the ambit
-            num_params = self.info_params.get(nombre_ambito, 0)
-            offset_retorno = -(num_params + 3)
-            nivel = self.info_niveles[nombre_ambito]
-            self.emitir('ALVL', nivel, offset_retorno)
-        else:
-            # Regular variable assignment
-            self.emitir('ALVL', info_var['nivel'], info_var['offset'])
+        # 2. Almacenar en la dirección del símbolo (para la asignación de
+        # retorno de una función, el símbolo apunta al slot de retorno -(n+3))
+        simbolo = nodo_asignacion.variable.simbolo
+        self.programar(nodo_asignacion.expresion,
+                       (self.emitir, ALVL, simbolo['nivel'], simbolo['offset']))
 
     def generar_if(self, nodo_if):
         """Genera código para if E then S1 [else S2]"""
         
+        if self.cortocircuito:
+            # 1-2. La condición salta directo a la etiqueta 'false' si es falsa
+            etiqueta_false = self.nueva_etiqueta()
+            self.programar((self._saltar_si_falso, nodo_if.condicion, etiqueta_false),
+                           nodo_if.cuerpo_true, (self._if_sino, nodo_if, etiqueta_false))
+            return
+
         # 1. Generar código para la condición E
-        self._generar_recursivo(nodo_if.condicion)
-        # La pila ahora contiene 0 (false) o 1 (true)
-        
+        # La pila después contiene 0 (false) o 1 (true)
+        self.programar(nodo_if.condicion, (self._if_entonces, nodo_if))
+
+    def _if_entonces(self, nodo_if):
         etiqueta_false = self.nueva_etiqueta()
         
         # 2. Emitir salto condicional si es falso
-        self.emitir('DSVF', etiqueta_false) # Desviar si es falso 
+        self.emitir(DSVF, etiqueta_false) # Desviar si es falso 
         
         # 3. Código del 'then' (S1.code)
-        self._generar_recursivo(nodo_if.cuerpo_true)
+        self.programar(nodo_if.cuerpo_true, (self._if_sino, nodo_if, etiqueta_false))
 
+    def _if_sino(self, nodo_if, etiqueta_false):
         if nodo_if.cuerpo_false:
             # 4. Si hay 'else', saltar al final
             etiqueta_fin = self.nueva_etiqueta()
-            self.emitir('DSVS', etiqueta_fin) # Desviar siempre 
+            self.emitir(DSVS, etiqueta_fin) # Desviar siempre 
             
             # 5. Etiqueta para el 'false'
             self.emitir_etiqueta(etiqueta_false)
             
             # 6. Código del 'else' (S2.code)
-            self._generar_recursivo(nodo_if.cuerpo_false)
-            
             # 7. Etiqueta final
-            self.emitir_etiqueta(etiqueta_fin)
+            self.programar(nodo_if.cuerpo_false, (self.emitir_etiqueta, etiqueta_fin))
         else:
             # 3. Si no hay 'else', la etiqueta 'false' es el final
             self.emitir_etiqueta(etiqueta_false)
@@ -391,150 +361,162 @@ class GeneradorMEPA:
         # 1. Etiqueta de inicio del bucle
         self.emitir_etiqueta(etiqueta_inicio)
         
-        # 2. Código de la condición E
-        self._generar_recursivo(nodo_while.condicion)
-        # La pila contiene 0 (false) o 1 (true)
-        
-        # 3. Salir del bucle si es falso
-        self.emitir('DSVF', etiqueta_fin) # 
-        
-        # 4. Código del cuerpo (S.code)
-        self._generar_recursivo(nodo_while.cuerpo)
-        
-        # 5. Volver al inicio
-        self.emitir('DSVS', etiqueta_inicio) # 
-        
-        # 6. Etiqueta de salida del bucle
-        self.emitir_etiqueta(etiqueta_fin)
+        if self.cortocircuito:
+            # 2-3. La condición salta directo a la salida si es falsa
+            condicion = ((self._saltar_si_falso, nodo_while.condicion, etiqueta_fin),)
+        else:
+            # 2. Código de la condición E (la pila contiene 0 o 1)
+            # 3. Salir del bucle si es falso
+            condicion = (nodo_while.condicion, (self.emitir, DSVF, etiqueta_fin))
+        self.programar(
+            *condicion,
+            # 4. Código del cuerpo (S.code)
+            nodo_while.cuerpo,
+            # 5. Volver al inicio
+            (self.emitir, DSVS, etiqueta_inicio),
+            # 6. Etiqueta de salida del bucle
+            (self.emitir_etiqueta, etiqueta_fin),
+        )
 
     def generar_llamada_procedimiento(self, nodo_call):
         """Genera código para call id(Elist)"""
         
         # 1. Evaluar parámetros y apilarlos
-        if nodo_call.parametros:
-            for param in nodo_call.parametros:
-                self._generar_recursivo(param)
-        
         # 2. Emitir la llamada
-        etiqueta_proc = nodo_call.nombre.lower()
-        self.emitir('LLPR', etiqueta_proc) # Llamar a procedimiento 
+        etiqueta_proc = self.etiquetas[nodo_call.simbolo['ambito_interno']]
+        self.programar(*nodo_call.parametros, (self.emitir, LLPR, etiqueta_proc)) # Llamar a procedimiento 
 
     def generar_read(self, nodo_read):
         """Genera código para read(id)"""
         # 1. Leer valor de entrada y apilarlo
-        self.emitir('LEER') # 
+        self.emitir(LEER) # 
         
         # 2. Almacenar el valor apilado en la variable
-        nombre_var = nodo_read.variable.nombre
-        info_var = self.buscar_info_simbolo(nombre_var)
-        self.emitir('ALVL', info_var['nivel'], info_var['offset']) # 
+        simbolo = nodo_read.variable.simbolo
+        self.emitir(ALVL, simbolo['nivel'], simbolo['offset']) # 
     
     def generar_write(self, nodo_write):
         """Genera código para write(E)"""
         # 1. Evaluar la expresión E y apilar su valor
-        self._generar_recursivo(nodo_write.expresion)
-        
         # 2. Imprimir el valor del tope de la pila
-        self.emitir('IMPR') # 
+        self.programar(nodo_write.expresion, (self.emitir, IMPR))
     
     # --- Generadores de Expresiones (E) ---
     
     def generar_expresion(self, nodo_expresion):
         """Wrapper para expresiones entre paréntesis."""
-        self._generar_recursivo(nodo_expresion.expresion)
+        self.programar(nodo_expresion.expresion)
 
     def generar_identificador(self, nodo_id):
         """Genera código para E -> id"""
         # 1. Obtener la dirección (nivel, offset)
-        info_var = self.buscar_info_simbolo(nodo_id.nombre)
+        simbolo = nodo_id.simbolo
         
         # 2. Emitir APVL (Apilar Valor)
-        self.emitir('APVL', info_var['nivel'], info_var['offset']) # 
+        self.emitir(APVL, simbolo['nivel'], simbolo['offset']) # 
 
     def generar_numero(self, nodo_num):
         """Genera código para E -> numero"""
-        self.emitir('APCT', nodo_num.valor) # Apilar constante 
+        self.emitir(APCT, nodo_num.valor) # Apilar constante 
         
     def generar_booleano(self, nodo_bool):
         """Genera código para E -> true | false"""
         # MEPA representa true=1 y false=0 
         valor = 1 if nodo_bool.valor == 'true' else 0
-        self.emitir('APCT', valor) # 
+        self.emitir(APCT, valor) # 
 
     def generar_operacion_binaria(self, nodo_op):
         """Genera código para E -> E1 op E2"""
+        op = nodo_op.operador
+        if self.cortocircuito and (op == 'and' or op == 'or'):
+            # El valor (1 o 0) se arma con saltos: E1 and E2 no evalúa E2 si
+            # E1 es falso, E1 or E2 no lo evalúa si E1 es verdadero
+            etiqueta_false = self.nueva_etiqueta()
+            etiqueta_fin = self.nueva_etiqueta()
+            self.programar((self._saltar_si_falso, nodo_op, etiqueta_false),
+                           (self.emitir, APCT, 1), (self.emitir, DSVS, etiqueta_fin),
+                           (self.emitir_etiqueta, etiqueta_false),
+                           (self.emitir, APCT, 0), (self.emitir_etiqueta, etiqueta_fin))
+            return
+        instruccion = INSTRUCCION_BINARIA.get(op)
+        if instruccion is None:
+            raise ValueError(f"Operador binario MEPA no reconocido: {op}")
         
         # 1. Generar código para E1 (deja valor en la pila)
-        self._generar_recursivo(nodo_op.izquierda)
-        
         # 2. Generar código para E2 (deja valor en la pila)
-        self._generar_recursivo(nodo_op.derecha)
-        
         # Pila ahora: ..., valor(E1), valor(E2)
-        
-        # 3. Emitir la instrucción MEPA correspondiente
-        op = nodo_op.operador
-        if op == '+':
-            self.emitir('SUMA') # 
-        elif op == '-':
-            self.emitir('SUST') # 
-        elif op == '*':
-            self.emitir('MULT') # 
-        elif op == 'div':
-            self.emitir('DIVI') # 
-        elif op == 'or':
-            self.emitir('DISJ') # Disyunción 
-        elif op == 'and':
-            self.emitir('CONJ') # Conjunción 
-        elif op == '=':
-            self.emitir('CMIG') # Comparar igual 
-        elif op == '<>':
-            self.emitir('CMDG') # Comparar desigual 
-        elif op == '<':
-            self.emitir('CMME') # Comparar menor 
-        elif op == '>':
-            self.emitir('CMMA') # Comparar mayor 
-        elif op == '<=':
-            self.emitir('CMNI') # Comparar menor o igual 
-        elif op == '>=':
-            self.emitir('CMYI') # Comparar mayor o igual 
-        else:
-            raise ValueError(f"Operador binario MEPA no reconocido: {op}")
-        
-        # La instrucción MEPA consume los dos valores y apila el resultado
+        # 3. Emitir la instrucción MEPA correspondiente, que consume los dos
+        # valores y apila el resultado
+        self.programar(nodo_op.izquierda, nodo_op.derecha, (self.emitir, instruccion))
 
     def generar_operacion_unaria(self, nodo_op):
         """Genera código para E -> op E1"""
-        
-        # 1. Generar código para E1 (deja valor en la pila)
-        self._generar_recursivo(nodo_op.operando)
-        
-        # Pila ahora: ..., valor(E1)
-        
-        # 2. Emitir la instrucción MEPA
         op = nodo_op.operador
-        if op == '-':
-            self.emitir('UMEN') # Menos unario 
-        elif op == 'not':
-            self.emitir('NEGA') # Negación lógica 
-        else:
+        if op == '+':
+            # +E1 = E1: basta el valor de E1
+            self.programar(nodo_op.operando)
+            return
+        instruccion = INSTRUCCION_UNARIA.get(op)
+        if instruccion is None:
             raise ValueError(f"Operador unario MEPA no reconocido: {op}")
-            
-        # La instrucción consume el valor y apila el resultado
+        
+        # 1. Generar código para E1 (deja valor en la pila)
+        # 2. Emitir la instrucción MEPA, que consume el valor y apila el resultado
+        self.programar(nodo_op.operando, (self.emitir, instruccion))
 
     def generar_llamada_funcion(self, nodo_call):
         """Genera código para E -> id(Elist)"""
         
         # 1. Reservar espacio en la pila para el valor de retorno
-        self.emitir('RMEM', 1) # 
+        self.emitir(RMEM, 1) # 
         
         # 2. Evaluar parámetros y apilarlos
-        if nodo_call.parametros:
-            for param in nodo_call.parametros:
-                self._generar_recursivo(param)
-        
         # 3. Emitir la llamada
-        etiqueta_func = nodo_call.nombre.lower()
-        self.emitir('LLPR', etiqueta_func) # 
-        
-        # Al regresar, el valor de retorno está en el tope de la pila
\ No newline at end of file
+        # Al regresar, el valor de retorno está en el tope de la pila
+        etiqueta_func = self.etiquetas[nodo_call.simbolo['ambito_interno']]
+        self.programar(*nodo_call.parametros, (self.emitir, LLPR, etiqueta_func)) # 
+
+    # --- Condiciones en cortocircuito ---
+
+    def _saltar_si_falso(self, nodo, etiqueta):
+        """Código de la condición nodo que salta a etiqueta si es falsa y si no sigue."""
+        while type(nodo) is NodoExpresion:
+            nodo = nodo.expresion
+        op = getattr(nodo, 'operador', None)
+        if type(nodo) is NodoOperacionBinaria and op == 'and':
+            self.programar((self._saltar_si_falso, nodo.izquierda, etiqueta),
+                           (self._saltar_si_falso, nodo.derecha, etiqueta))
+        elif type(nodo) is NodoOperacionBinaria and op == 'or':
+            # Si E1 es verdadero se saltea E2
+            etiqueta_true = self.nueva_etiqueta()
+            self.programar((self._saltar_si_verdadero, nodo.izquierda, etiqueta_true),
+                           (self._saltar_si_falso, nodo.derecha, etiqueta),
+                           (self.emitir_etiqueta, etiqueta_true))
+        elif type(nodo) is NodoOperacionUnaria and op == 'not':
+            self.programar((self._saltar_si_verdadero, nodo.operando, etiqueta))
+        else:
+            self.programar(nodo, (self.emitir, DSVF, etiqueta))
+
+    def _saltar_si_verdadero(self, nodo, etiqueta):
+        """Código de la condición nodo que salta a etiqueta si es verdadera y si no sigue."""
+        while type(nodo) is NodoExpresion:
+            nodo = nodo.expresion
+        op = getattr(nodo, 'operador', None)
+        if type(nodo) is NodoOperacionBinaria and op == 'or':
+            self.programar((self._saltar_si_verdadero, nodo.izquierda, etiqueta),
+                           (self._saltar_si_verdadero, nodo.derecha, etiqueta))
+        elif type(nodo) is NodoOperacionBinaria and op == 'and':
+            # Si E1 es falso se saltea E2
+            etiqueta_false = self.nueva_etiqueta()
+            self.programar((self._saltar_si_falso, nodo.izquierda, etiqueta_false),
+                           (self._saltar_si_verdadero, nodo.derecha, etiqueta),
+                           (self.emitir_etiqueta, etiqueta_false))
+        elif type(nodo) is NodoOperacionUnaria and op == 'not':
+            self.programar((self._saltar_si_falso, nodo.operando, etiqueta))
+        elif type(nodo) is NodoOperacionBinaria and op in COMPARACION_OPUESTA:
+            # MEPA sólo salta por falso: se compara por la condición opuesta
+            self.programar(nodo.izquierda, nodo.derecha,
+                           (self.emitir, INSTRUCCION_BINARIA[COMPARACION_OPUESTA[op]]),
+                           (self.emitir, DSVF, etiqueta))
+        else:
+            self.programar(nodo, (self.emitir, NEGA), (self.emitir, DSVF, etiqueta))
@@ -0,0 +1,352 @@
+"""
+Backend Python: traduce el AST a código fuente Python y lo ejecuta con exec,
+sin pasar por MEPA.
+
+Cada subrutina Pascal es una función Python anidada en la de quien la
+declara, y el programa principal es la función programa(leer, imprimir) que
+las contiene a todas: parámetros y variables son variables locales de Python
+y el acceso a las de los ámbitos que la contienen usa las clausuras de
+Python (nonlocal para asignarlas). El valor de una función Pascal es una
+variable local que se devuelve al final.
+
+Los nombres Python son el nombre Pascal con el id de su ámbito (x_0, fib_0,
+n_1): los identificadores Pascal no tienen '_', así que no chocan entre sí
+ni con palabras reservadas ni con los nombres del backend.
+
+La semántica es la de GeneradorMEPA: div trunca hacia cero (dividir), and/or
+evalúan los dos operandos (& y | sobre bool) salvo con cortocircuito, write
+de un booleano imprime 0 o 1 y las variables empiezan en 0. Los enteros son
+los de Python (sin desborde), y la anidación de expresiones y bucles está
+limitada por el compilador de Python (compilar() lo informa con ValueError).
+Mientras corre el programa se sube el límite de recursión de Python a
+LIMITE_RECURSION, para que la profundidad de llamadas sea la de la máquina
+virtual.
+"""
+import sys
+import traceback
+
+from ast import *
+from codigo_mepa import dividir
+from mepa_vm import ErrorEjecucion, TAMANIO_PILA
+
+# Nombre de archivo del código generado, para ubicar los errores en el fuente
+ARCHIVO = '<pascal>'
+
+# Límite de recursión durante la ejecución: cada llamada MEPA usa al menos
+# cuatro palabras de la pila de la máquina virtual
+LIMITE_RECURSION = TAMANIO_PILA // 4
+
+# Precedencia de las expresiones Python generadas (mayor liga más fuerte)
+(PREC_O, PREC_Y, PREC_NO, PREC_COMPARACION, PREC_DISYUNCION, PREC_CONJUNCION,
+ PREC_SUMA, PREC_PRODUCTO, PREC_UNARIO, PREC_ATOMO) = range(10)
+
+# Operador Python y su precedencia para cada operador Pascal (div es una llamada)
+OPERADOR_BINARIO = {
+    '+': ('+', PREC_SUMA),
+    '-': ('-', PREC_SUMA),
+    '*': ('*', PREC_PRODUCTO),
+    'or': ('|', PREC_DISYUNCION),
+    'and': ('&', PREC_CONJUNCION),
+    '=': ('==', PREC_COMPARACION),
+    '<>': ('!=', PREC_COMPARACION),
+    '<': ('<', PREC_COMPARACION),
+    '>': ('>', PREC_COMPARACION),
+    '<=': ('<=', PREC_COMPARACION),
+    '>=': ('>=', PREC_COMPARACION),
+}
+OPERADOR_CORTOCIRCUITO = {
+    'or': ('or', PREC_O),
+    'and': ('and', PREC_Y),
+}
+OPERADOR_UNARIO = {
+    '+': ('+', PREC_UNARIO),
+    '-': ('-', PREC_UNARIO),
+    'not': ('not ', PREC_NO),
+}
+VALOR_INICIAL = {'integer': '0', 'boolean': 'False'}
+
+
+def nombre_python(simbolo):
+    """Nombre Python de una variable, parámetro o subrutina."""
+    return f"{simbolo['nombre']}_{simbolo['ambito'].id}"
+
+
+def nombre_valor(nombre_funcion):
+    """Variable local que guarda el valor de retorno de la función."""
+    return f"{nombre_funcion}_valor"
+
+
+def asignadas(bloque):
+    """Símbolos que asignan (:= o read) las sentencias de bloque, sin entrar en subrutinas anidadas."""
+    simbolos = []
+    pendientes = [bloque]
+    while pendientes:
+        nodo = pendientes.pop()
+        tipo = type(nodo)
+        if tipo is NodoBloque:
+            pendientes.extend(nodo.sentencias)
+        elif tipo is NodoIf:
+            pendientes.extend((nodo.cuerpo_true, nodo.cuerpo_false))
+        elif tipo is NodoWhile:
+            pendientes.append(nodo.cuerpo)
+        elif tipo is NodoAsignacion or tipo is NodoRead:
+            simbolos.append(nodo.variable.simbolo)
+    return simbolos
+
+
+class GeneradorPython(Visitante):
+    """
+    Genera el código fuente Python de un AST ya analizado. Como GeneradorMEPA,
+    recorre con la pila explícita de Visitante: cada expresión deja en
+    resultados su texto y su precedencia, y la sentencia que la usa la toma de
+    ahí. compilar() devuelve el ProgramaPython listo para ejecutar.
+    """
+    prefijo = 'generar_'
+
+    def __init__(self, tabla_simbolos, cortocircuito=False):
+        self.tabla_simbolos = tabla_simbolos
+        self.operadores = dict(OPERADOR_BINARIO)
+        if cortocircuito:
+            self.operadores.update(OPERADOR_CORTOCIRCUITO)
+        self.lineas = []          # Código Python, una línea por elemento
+        self.lineas_pascal = []   # map: [línea Python - 1] -> línea Pascal que la generó
+        self.resultados = []      # Pila de (texto de la expresión, precedencia)
+        self.sangria = 0
+        self.inicios = []         # Pila de len(lineas) al abrir cada bloque indentado
+
+    def generar(self, nodo_raiz: NodoPrograma):
+        self.recorrer(nodo_raiz)
+
+    def obtener_codigo(self):
+        return "\n".join(self.lineas) + "\n"
+
+    def compilar(self):
+        """Compila el código generado y devuelve el ProgramaPython."""
+        try:
+            codigo = compile(self.obtener_codigo(), ARCHIVO, 'exec')
+        except (SyntaxError, RecursionError, MemoryError) as e:
+            raise ValueError(f"Program too deeply nested for the Python backend: {e}") from None
+        espacio = {'dividir': dividir}
+        exec(codigo, espacio)
+        return ProgramaPython(espacio['programa'], self.lineas_pascal)
+
+    def visitar_desconocido(self, nodo):
+        raise ValueError(f"No hay generador Python para el tipo de nodo: {nodo.tipo_nodo}")
+
+    # --- Líneas ---
+
+    def _linea(self, texto, nodo):
+        self.lineas.append("    " * self.sangria + texto)
+        self.lineas_pascal.append(nodo.linea)
+
+    def _abrir(self):
+        self.sangria += 1
+        self.inicios.append(len(self.lineas))
+
+    def _cerrar(self, nodo):
+        # Un bloque Python no puede quedar vacío
+        if len(self.lineas) == self.inicios.pop():
+            self._linea("pass", nodo)
+        self.sangria -= 1
+
+    def _cuerpo(self, nodo, padre):
+        """Items que generan la sentencia nodo como bloque indentado."""
+        return ((self._abrir,), *self._sentencia(nodo), (self._cerrar, padre))
+
+    def _sentencia(self, nodo):
+        """Items de una sentencia (una llamada a función suelta descarta su valor)."""
+        if type(nodo) is NodoLlamadaFuncion:
+            return nodo, (self._descartar, nodo)
+        return (nodo,)
+
+    def _descartar(self, nodo):
+        self._linea(self.resultados.pop()[0], nodo)
+
+    # --- Declaraciones ---
+
+    def generar_programa(self, nodo_programa):
+        self._linea("def programa(leer, imprimir):", nodo_programa)
+        self._abrir()
+        self._variables(self.tabla_simbolos.global_, nodo_programa)
+        self.programar(*(nodo_programa.declaraciones or ()), *self._sentencia(nodo_programa.bloque),
+                       (self._cerrar, nodo_programa))
+
+    def _variables(self, ambito, nodo):
+        """Inicializa las variables locales del ámbito (no los parámetros)."""
+        for simbolo in list(ambito.simbolos.values())[ambito.num_params:]:
+            if simbolo['categoria'] == 'variable':
+                self._linea(f"{nombre_python(simbolo)} = {VALOR_INICIAL[simbolo['tipo']]}", nodo)
+
+    def generar_declaracion_procedimiento(self, nodo_decl):
+        ambito = nodo_decl.ambito
+        nombre = f"{ambito.nombre}_{ambito.padre.id}"
+        parametros = [nombre_python(simbolo) for simbolo in list(ambito.simbolos.values())[:ambito.num_params]]
+        self._linea(f"def {nombre}({', '.join(parametros)}):", nodo_decl)
+        self._abrir()
+
+        # Las variables de ámbitos exteriores que el cuerpo asigna
+        exteriores = sorted({nombre_python(simbolo) for simbolo in asignadas(nodo_decl.bloque_cuerpo)
+                             if simbolo['categoria'] == 'variable' and simbolo['ambito'] is not ambito})
+        if exteriores:
+            self._linea(f"nonlocal {', '.join(exteriores)}", nodo_decl)
+        self._variables(ambito, nodo_decl)
+        epilogo = ()
+        if type(nodo_decl) is NodoDeclaracionFuncion:
+            self._linea(f"{nombre_valor(nombre)} = {VALOR_INICIAL[nodo_decl.tipo_retorno]}", nodo_decl)
+            epilogo = ((self._linea, f"return {nombre_valor(nombre)}", nodo_decl),)
+
+        # Subrutinas anidadas, cuerpo y retorno
+        self.programar(*(nodo_decl.declaraciones_internas or ()), *self._sentencia(nodo_decl.bloque_cuerpo),
+                       *epilogo, (self._cerrar, nodo_decl))
+
+    generar_declaracion_funcion = generar_declaracion_procedimiento
+
+    # --- Sentencias ---
+
+    def generar_bloque(self, nodo_bloque):
+        self.programar(*(item for sentencia in nodo_bloque.sentencias for item in self._sentencia(sentencia)))
+
+    def _destino(self, simbolo):
+        if simbolo['categoria'] == 'funcion':
+            return nombre_valor(nombre_python(simbolo))
+        return nombre_python(simbolo)
+
+    def generar_asignacion(self, nodo):
+        self.programar(nodo.expresion, (self._asignacion, nodo))
+
+    def _asignacion(self, nodo):
+        self._linea(f"{self._destino(nodo.variable.simbolo)} = {self.resultados.pop()[0]}", nodo)
+
+    def generar_if(self, nodo_if, palabra="if"):
+        self.programar(nodo_if.condicion, (self._if, nodo_if, palabra))
+
+    def _if(self, nodo_if, palabra):
+        self._linea(f"{palabra} {self.resultados.pop()[0]}:", nodo_if)
+        sino = nodo_if.cuerpo_false
+        if sino is None:
+            self.programar(*self._cuerpo(nodo_if.cuerpo_true, nodo_if))
+        elif type(sino) is NodoIf:
+            # else if: elif al mismo nivel, sin anidar la sangría
+            self.programar(*self._cuerpo(nodo_if.cuerpo_true, nodo_if), (self.generar_if, sino, "elif"))
+        else:
+            self.programar(*self._cuerpo(nodo_if.cuerpo_true, nodo_if),
+                           (self._linea, "else:", nodo_if), *self._cuerpo(sino, nodo_if))
+
+    def generar_while(self, nodo_while):
+        self.programar(nodo_while.condicion, (self._while, nodo_while))
+
+    def _while(self, nodo_while):
+        self._linea(f"while {self.resultados.pop()[0]}:", nodo_while)
+        self.programar(*self._cuerpo(nodo_while.cuerpo, nodo_while))
+
+    def generar_llamada_procedimiento(self, nodo_call):
+        self.programar(*nodo_call.parametros, (self._llamada_procedimiento, nodo_call))
+
+    def _llamada_procedimiento(self, nodo_call):
+        self._linea(self._llamada(nodo_call), nodo_call)
+
+    def generar_read(self, nodo_read):
+        self._linea(f"{self._destino(nodo_read.variable.simbolo)} = int(leer())", nodo_read)
+
+    def generar_write(self, nodo_write):
+        self.programar(nodo_write.expresion, (self._write, nodo_write))
+
+    def _write(self, nodo_write):
+        texto = self.resultados.pop()[0]
+        if nodo_write.expresion.tipo == 'boolean':
+            texto = f"int({texto})"  # MEPA imprime los booleanos como 0 o 1
+        self._linea(f"imprimir({texto})", nodo_write)
+
+    # --- Expresiones: cada una deja (texto, precedencia) en resultados ---
+
+    def generar_expresion(self, nodo):
+        # Los paréntesis necesarios los pone la precedencia
+        self.programar(nodo.expresion)
+
+    def generar_identificador(self, nodo):
+        self.resultados.append((nombre_python(nodo.simbolo), PREC_ATOMO))
+
+    def generar_numero(self, nodo):
+        self.resultados.append((str(nodo.valor), PREC_ATOMO if nodo.valor >= 0 else PREC_UNARIO))
+
+    def generar_booleano(self, nodo):
+        self.resultados.append(('True' if nodo.valor == 'true' else 'False', PREC_ATOMO))
+
+    def generar_llamada_funcion(self, nodo_call):
+        self.programar(*nodo_call.parametros, (self._llamada_funcion, nodo_call))
+
+    def _llamada_funcion(self, nodo_call):
+        self.resultados.append((self._llamada(nodo_call), PREC_ATOMO))
+
+    def _llamada(self, nodo_call):
+        """Texto de la llamada, con los argumentos que dejaron sus expresiones en resultados."""
+        argumentos = []
+        if nodo_call.parametros:
+            argumentos = [texto for texto, _ in self.resultados[-len(nodo_call.parametros):]]
+            del self.resultados[-len(nodo_call.parametros):]
+        return f"{nombre_python(nodo_call.simbolo)}({', '.join(argumentos)})"
+
+    def generar_operacion_unaria(self, nodo):
+        self.programar(nodo.operando, (self._unaria, nodo))
+
+    def _unaria(self, nodo):
+        operador, precedencia = OPERADOR_UNARIO[nodo.operador]
+        texto, precedencia_operando = self.resultados.pop()
+        if precedencia_operando < precedencia:
+            texto = f"({texto})"
+        self.resultados.append((operador + texto, precedencia))
+
+    def generar_operacion_binaria(self, nodo):
+        self.programar(nodo.izquierda, nodo.derecha, (self._binaria, nodo))
+
+    def _binaria(self, nodo):
+        derecha, precedencia_derecha = self.resultados.pop()
+        izquierda, precedencia_izquierda = self.resultados.pop()
+        if nodo.operador == 'div':
+            self.resultados.append((f"dividir({izquierda}, {derecha})", PREC_ATOMO))
+            return
+        operador, precedencia = self.operadores[nodo.operador]
+        # Asociativos a izquierda; las comparaciones no se encadenan como en Python
+        if precedencia_izquierda < precedencia or precedencia_izquierda == precedencia == PREC_COMPARACION:
+            izquierda = f"({izquierda})"
+        if precedencia_derecha <= precedencia:
+            derecha = f"({derecha})"
+        self.resultados.append((f"{izquierda} {operador} {derecha}", precedencia))
+
+
+class ProgramaPython:
+    """Programa compilado por GeneradorPython: ejecutar() tiene la interfaz de MaquinaMEPA.ejecutar."""
+
+    def __init__(self, funcion, lineas_pascal):
+        self.funcion = funcion
+        self.lineas_pascal = lineas_pascal
+
+    def ejecutar(self, entrada=(), salida=None):
+        """
+        Ejecuta el programa leyendo de entrada (iterable de enteros o textos
+        que los representen) y escribiendo cada write en una línea de salida;
+        sin salida, devuelve la lista de valores impresos.
+        """
+        impresos = []
+        imprimir = impresos.append if salida is None else (lambda valor: salida.write(f"{valor}\n"))
+        limite = sys.getrecursionlimit()
+        sys.setrecursionlimit(max(limite, LIMITE_RECURSION))
+        try:
+            self.funcion(iter(entrada).__next__, imprimir)
+        except ZeroDivisionError as e:
+            raise self._error(e, "division by zero") from None
+        except RecursionError as e:
+            raise self._error(e, "stack overflow") from None
+        except StopIteration as e:
+            raise self._error(e, "read past the end of the input") from None
+        except ValueError as e:
+            raise self._error(e, "input is not an integer") from None
+        finally:
+            sys.setrecursionlimit(limite)
+        return impresos if salida is None else None
+
+    def _error(self, excepcion, mensaje):
+        """ErrorEjecucion con la línea Pascal de la sentencia que falló."""
+        lineas = [marco.lineno for marco in traceback.extract_tb(excepcion.__traceback__) if marco.filename == ARCHIVO]
+        linea = self.lineas_pascal[lineas[-1] - 1] if lineas else None
+        return ErrorEjecucion(f"Runtime error at line {linea}: {mensaje}")
@@ -1,3 +1,8 @@
+import mmap
+import re
+from array import array
+from enum import IntEnum
+
 # Tabla de palabras reservadas y operadores
 palabras_reservadas = {
     'program': 'program',
@@ -43,19 +48,276 @@ simbolos = {
     '<>': ('oper_relacional', 'distinto')
 }
 
-class AnalizadorLexico:
+# Motor 'regex': una única expresión regular maestra que, en cada llamada, salta
+# blancos y comentarios y reconoce el token completo (identificador, número u
+# operador) para extraerlo con un slice, en lugar de avanzar carácter a carácter.
+# Sólo reconoce identificadores y números ASCII: las clases de letras y dígitos
+# de re no son las de isalpha() e isdigit() del motor clásico ('½' es una letra
+# para re, '²' un dígito para isdigit()), así que un lexema con caracteres no
+# ASCII no coincide y el motor lo reconoce con _lexema_clasico.
+_PATRON_TOKEN = re.compile(r"""
+    (?:[ \t\n]+|\{[^}]*\}?)*                   # blancos y comentarios { ... }
+    (?:
+        (?P<ident>[A-Za-z][A-Za-z0-9]*)(?![A-Za-z0-9\x80-\U0010ffff])   # letra (letra | dígito)*
+      | (?P<numero>[0-9]+)(?![0-9\x80-\U0010ffff])
+      | (?P<simbolo>:=|<=|<>|>=|[:;,.()+\-*/=<>])
+    )?
+""", re.VERBOSE)
+
+# Variante de _PATRON_TOKEN sobre bytes, para analizar un archivo mapeado en memoria
+# sin decodificarlo entero; '\r' cuenta como salto de línea, igual que en la lectura
+# en modo texto (universal newlines). Sólo reconoce identificadores y números ASCII:
+# si el lexema sigue con un byte no ASCII, el motor lo decodifica y lo reconoce con
+# _lexema_clasico, con el mismo alfabeto que los motores de texto.
+_PATRON_TOKEN_BYTES = re.compile(rb"""
+    (?:[ \t\r\n]+|\{[^}]*\}?)*
+    (?:
+        (?P<ident>[A-Za-z][A-Za-z0-9]*)
+      | (?P<numero>[0-9]+)
+      | (?P<simbolo>:=|<=|<>|>=|[:;,.()+\-*/=<>])
+    )?
+""", re.VERBOSE)
+
+
+def _lexema_clasico(texto, inicio):
+    """
+    Identificador o número que empieza en texto[inicio], reconocido como en el
+    motor clásico (is_letter e is_digit sobre cada carácter en minúsculas), para
+    los lexemas no ASCII que los patrones no reconocen. Devuelve el tipo
+    ('ident' o 'numero') y el fin del lexema, o (None, inicio) si texto[inicio]
+    no empieza ninguno.
+    """
+    caracter = texto[inicio].lower()
+    if caracter.isdigit():
+        tipo = 'numero'
+    elif caracter.isalpha():
+        tipo = 'ident'
+    else:
+        return None, inicio
+    fin = inicio + 1
+    while fin < len(texto):
+        caracter = texto[fin].lower()
+        if not (caracter.isdigit() or tipo == 'ident' and caracter.isalpha()):
+            break
+        fin += 1
+    return tipo, fin
+
+
+def _minusculas(lexema):
+    """lexema en minúsculas carácter a carácter, como el motor clásico (lower() de la palabra cambia la sigma final)."""
+    return "".join(caracter.lower() for caracter in lexema)
+
+# Letras y dígitos ASCII y bytes no ASCII: hasta dónde decodificar un lexema no ASCII
+_PATRON_PALABRA_BYTES = re.compile(rb"[A-Za-z0-9\x80-\xff]*")
+
+# Cantidad de bytes ya analizados que se mantienen mapeados antes de devolver sus
+# páginas al sistema operativo (ver AnalizadorLexico._liberar_paginas)
+VENTANA_MAPEO = 16 * 1024 * 1024
+
+# Palabras reservadas ya resueltas a su (tipo, valor) de token
+_TOKENS_RESERVADOS = {
+    palabra: ((info[1] if isinstance(info, tuple) else info), palabra)
+    for palabra, info in palabras_reservadas.items()
+}
+
+# Símbolo -> (tipo, valor, desplazamiento de columna). El desplazamiento replica la
+# posición que informa el motor clásico: los símbolos que requieren mirar un
+# carácter más (':', '<', '>' y los de dos caracteres) informan la columna siguiente.
+_TOKENS_SIMBOLO = {
+    ';': ('punto_coma', ';', 0),
+    ',': ('coma', ',', 0),
+    '.': ('punto', '.', 0),
+    '(': ('parentesis_izq', '(', 0),
+    ')': ('parentesis_der', ')', 0),
+    '+': ('+', '+', 0),
+    '-': ('-', '-', 0),
+    '*': ('*', '*', 0),
+    '/': ('div', '/', 0),
+    '=': ('=', '=', 0),
+    ':': ('asignacion_de_tipo', ':', 1),
+    ':=': ('asignacion', ':=', 1),
+    '<': ('<', '<', 1),
+    '<=': ('<=', '<=', 1),
+    '<>': ('<>', '<>', 1),
+    '>': ('>', '>', 1),
+    '>=': ('>=', '>=', 1),
+}
+
+MOTORES = ('clasico', 'regex')  # El primero es el motor por defecto
+
+class TipoToken(IntEnum):
+    """Tipos de token como enteros, para el buffer de tokens y el analizador sintáctico."""
+    FIN = 0
+    ERROR = 1
+    IDENT = 2
+    NUMERO = 3
+    PROGRAM = 4
+    VAR = 5
+    PROCEDURE = 6
+    FUNCTION = 7
+    INTEGER = 8
+    BOOLEAN = 9
+    BEGIN = 10
+    END = 11
+    IF = 12
+    THEN = 13
+    ELSE = 14
+    WHILE = 15
+    DO = 16
+    READ = 17
+    WRITE = 18
+    OR = 19
+    AND = 20
+    NOT = 21
+    TRUE = 22
+    FALSE = 23
+    DIV = 24
+    PUNTO_COMA = 25
+    COMA = 26
+    PUNTO = 27
+    PARENTESIS_IZQ = 28
+    PARENTESIS_DER = 29
+    ASIGNACION = 30
+    ASIGNACION_DE_TIPO = 31
+    MAS = 32
+    MENOS = 33
+    POR = 34
+    IGUAL = 35
+    DISTINTO = 36
+    MENOR = 37
+    MENOR_IGUAL = 38
+    MAYOR = 39
+    MAYOR_IGUAL = 40
+
+# Nombre (tipo en formato string de next_token) de cada TipoToken, indexado por su valor
+NOMBRE_TOKEN = (
+    None, 'error', 'ident', 'numero',
+    'program', 'var', 'procedure', 'function', 'integer', 'boolean', 'begin', 'end',
+    'if', 'then', 'else', 'while', 'do', 'read', 'write', 'or', 'and', 'not',
+    'true', 'false', 'div',
+    'punto_coma', 'coma', 'punto', 'parentesis_izq', 'parentesis_der',
+    'asignacion', 'asignacion_de_tipo',
+    '+', '-', '*', '=', '<>', '<', '<=', '>', '>=',
+)
+
+# Tipo string -> TipoToken ('div' es tanto la palabra reservada como '/')
+TIPO_POR_NOMBRE = {nombre: TipoToken(i) for i, nombre in enumerate(NOMBRE_TOKEN)}
+
+# Valores enteros de los tipos de palabras reservadas y símbolos para tokenize_all
+_TIPOS_RESERVADOS = {palabra: int(TIPO_POR_NOMBRE[tipo]) for palabra, (tipo, _) in _TOKENS_RESERVADOS.items()}
+_TIPOS_SIMBOLO = {
+    simbolo: (int(TIPO_POR_NOMBRE[tipo]), desplazamiento)
+    for simbolo, (tipo, _, desplazamiento) in _TOKENS_SIMBOLO.items()
+}
+
+class TablaNombres:
+    """
+    Tabla de identificadores internados de una compilación: cada grafía distinta
+    recibe un id entero pequeño, y todas sus apariciones comparten el mismo string.
+    """
     def __init__(self):
+        self.ids = {}      # grafía -> id
+        self.nombres = []  # id -> grafía
+
+    def __len__(self):
+        return len(self.nombres)
+
+    def __getitem__(self, nombre_id):
+        return self.nombres[nombre_id]
+
+    def interna(self, nombre):
+        """Devuelve el id de nombre, asignándole uno nuevo si es la primera aparición."""
+        nombre_id = self.ids.get(nombre)
+        if nombre_id is None:
+            nombre_id = self.ids[nombre] = len(self.nombres)
+            self.nombres.append(nombre)
+        return nombre_id
+
+class BufferTokens:
+    """
+    Tokens de un archivo completo guardados en columnas paralelas array('i'):
+    tipo (TipoToken), offset de inicio y longitud en el texto, línea y columna.
+    El valor de un token se obtiene recién cuando se pide, cortando el texto; los
+    identificadores guardan además su id en la TablaNombres de la compilación.
+    """
+    def __init__(self, texto, nombres):
+        self.texto = texto
+        self.nombres = nombres   # TablaNombres compartida con el analizador léxico
+        self.ids = array('i')    # Id del identificador en nombres, -1 si el token no es IDENT
+        self.tipos = array('i')
+        self.inicios = array('i')
+        self.longitudes = array('i')
+        self.lineas = array('i')
+        self.columnas = array('i')
+        self.error = None  # SyntaxError léxico asociado al token ERROR, si lo hay
+
+    def __len__(self):
+        return len(self.tipos)
+
+    def agregar(self, tipo, inicio, longitud, linea, columna, nombre_id=-1):
+        """Agrega un token al final del buffer."""
+        self.ids.append(nombre_id)
+        self.tipos.append(tipo)
+        self.inicios.append(inicio)
+        self.longitudes.append(longitud)
+        self.lineas.append(linea)
+        self.columnas.append(columna)
+
+    def valor(self, i):
+        """Devuelve el valor (lexema en minúsculas) del token i."""
+        nombre_id = self.ids[i]
+        if nombre_id >= 0:
+            return self.nombres.nombres[nombre_id]
+        inicio = self.inicios[i]
+        valor = self.texto[inicio:inicio + self.longitudes[i]]
+        if isinstance(valor, bytes):  # Texto mapeado en memoria
+            valor = valor.decode('utf-8')
+        return valor.lower()
+
+    def token(self, i):
+        """Devuelve el token i con el formato (tipo, valor, línea, columna) de next_token."""
+        tipo = self.tipos[i]
+        valor = self.valor(i) if tipo != TipoToken.FIN else None
+        return (NOMBRE_TOKEN[tipo], valor, self.lineas[i], self.columnas[i])
+
+class AnalizadorLexico:
+    def __init__(self, motor='clasico'):
+        if motor not in MOTORES:
+            raise ValueError(f"Unknown lexer engine '{motor}', expected one of {MOTORES}")
+        self.motor = motor
         self.linea = 1
         self.columna = 1
         self.posicion = 0
         self.texto = ""
         self.current_token = ""
         self.state = "start"
+        self.inicio_linea = 0  # Offset del primer carácter de la línea actual (motor regex)
+        self.nombres = TablaNombres()  # Identificadores internados de esta compilación
+        # El motor se enlaza una sola vez para no pagar un despacho por token
+        self.next_token = getattr(self, f"_next_token_{motor}")
 
-    def cargar_archivo(self, archivo):
-        """Lee el contenido del archivo .txt"""
-        with open(archivo, 'r') as file:
-            self.texto = file.read()
+    def cargar_archivo(self, archivo, mapear=False):
+        """
+        Lee el contenido del archivo .txt. Con mapear=True el archivo no se lee:
+        se mapea en memoria (mmap) y se analiza directamente desde sus bytes, y
+        el analizador sintáctico pide los tokens de a uno (sin BufferTokens), de
+        modo que ni el texto ni los tokens ocupan memoria que crezca con el
+        tamaño del archivo.
+        """
+        if not mapear:
+            with open(archivo, 'r') as file:
+                self.texto = file.read()
+            return
+
+        with open(archivo, 'rb') as file:
+            try:
+                self.texto = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # Un archivo vacío no se puede mapear
+                self.texto = b""
+        self.motor = 'mapeado'
+        self.ajuste_columna = 0  # Bytes de continuación UTF-8 entre inicio_linea y la posición
+        self.liberado = 0        # Offset hasta el cual ya se devolvieron las páginas
+        self.next_token = self._next_token_mapeado
 
     def is_letter(self, char):
         """Verifica si el carácter es una letra"""
@@ -82,7 +344,217 @@ class AnalizadorLexico:
             return char.lower()
         return None
 
-    def next_token(self):
+    def tokenize_all(self):
+        """
+        Analiza el texto completo en una sola pasada y devuelve un BufferTokens.
+        El buffer termina con un token FIN, o con un token ERROR si hubo un error
+        léxico: la excepción se guarda en buffer.error para lanzarla recién cuando
+        el analizador sintáctico llegue a ese punto, igual que con next_token().
+        """
+        if self.motor != 'regex':
+            return self._tokenize_all_generico()
+
+        texto = self.texto
+        buffer = BufferTokens(texto, self.nombres)
+        ids_nombres, interna = self.nombres.ids, self.nombres.interna
+        agregar_id, agregar_tipo, agregar_inicio = buffer.ids.append, buffer.tipos.append, buffer.inicios.append
+        agregar_longitud, agregar_linea = buffer.longitudes.append, buffer.lineas.append
+        agregar_columna = buffer.columnas.append
+        match = _PATRON_TOKEN.match
+        tipos_reservados, tipos_simbolo = _TIPOS_RESERVADOS, _TIPOS_SIMBOLO
+        FIN, ERROR, IDENT, NUMERO = TipoToken.FIN, TipoToken.ERROR, TipoToken.IDENT, TipoToken.NUMERO
+        linea, inicio_linea = self.linea, self.inicio_linea
+        posicion = self.posicion
+
+        while True:
+            m = match(texto, posicion)
+            grupo = m.lastgroup
+            inicio = m.start(grupo) if grupo else m.end()
+            if inicio > posicion:
+                saltos = texto.count('\n', posicion, inicio)
+                if saltos:
+                    linea += saltos
+                    inicio_linea = texto.rfind('\n', posicion, inicio) + 1
+            posicion = m.end()
+            columna = inicio - inicio_linea + 1
+            longitud = posicion - inicio
+
+            nombre_id = -1
+            if grupo is None and posicion < len(texto):
+                # Identificador o número con caracteres no ASCII
+                grupo, posicion = _lexema_clasico(texto, posicion)
+                longitud = posicion - inicio
+                valor = _minusculas(texto[inicio:posicion])
+            elif grupo == 'ident':
+                valor = texto[inicio:posicion].lower()
+            if grupo == 'ident':
+                tipo = tipos_reservados.get(valor, IDENT)
+                if tipo == IDENT:
+                    nombre_id = ids_nombres.get(valor)
+                    if nombre_id is None:
+                        nombre_id = interna(valor)
+                columna += longitud
+            elif grupo == 'numero':
+                tipo = NUMERO
+                columna += longitud
+            elif grupo == 'simbolo':
+                tipo, desplazamiento = tipos_simbolo[texto[inicio:posicion]]
+                columna += desplazamiento
+            elif posicion < len(texto):
+                buffer.error = SyntaxError(f"Lexical error at line {linea}, column {columna}: invalid character '{texto[posicion].lower()}'")
+                tipo, longitud = ERROR, 1
+            else:
+                tipo = FIN
+
+            agregar_id(nombre_id)
+            agregar_tipo(tipo)
+            agregar_inicio(inicio)
+            agregar_longitud(longitud)
+            agregar_linea(linea)
+            agregar_columna(columna)
+            if tipo == FIN or tipo == ERROR:
+                break
+
+        self.posicion, self.linea, self.inicio_linea, self.columna = posicion, linea, inicio_linea, columna
+        return buffer
+
+    def _tokenize_all_generico(self):
+        """tokenize_all() construido sobre next_token(), para motores sin versión en bloque."""
+        buffer = BufferTokens(self.texto, self.nombres)
+        while True:
+            try:
+                tipo, valor, linea, columna = self.next_token()
+            except SyntaxError as e:
+                buffer.error = e
+                buffer.agregar(TipoToken.ERROR, self.posicion, 1, self.linea, self.columna)
+                return buffer
+            if tipo is None:
+                buffer.agregar(TipoToken.FIN, self.posicion, 0, linea, columna)
+                return buffer
+            # Al devolver un token, la posición queda justo después de su lexema
+            # (en el texto mapeado, medido en bytes)
+            nombre_id = self.nombres.interna(valor) if tipo == 'ident' else -1
+            longitud = len(valor.encode('utf-8')) if self.motor == 'mapeado' else len(valor)
+            buffer.agregar(TIPO_POR_NOMBRE[tipo], self.posicion - longitud, longitud, linea, columna, nombre_id)
+
+    def _next_token_regex(self):
+        """Genera el siguiente token (tipo, valor, línea, columna) con la expresión regular maestra"""
+        texto = self.texto
+        inicio = self.posicion
+        m = _PATRON_TOKEN.match(texto, inicio)
+        grupo = m.lastgroup
+        fin_blancos = m.start(grupo) if grupo else m.end()
+        if fin_blancos > inicio:
+            saltos = texto.count('\n', inicio, fin_blancos)
+            if saltos:
+                self.linea += saltos
+                self.inicio_linea = texto.rfind('\n', inicio, fin_blancos) + 1
+        self.posicion = fin = m.end()
+        columna = fin_blancos - self.inicio_linea + 1
+
+        if grupo is None and fin < len(texto):
+            # Identificador o número con caracteres no ASCII
+            grupo, fin = _lexema_clasico(texto, fin)
+            self.posicion = fin
+            valor = _minusculas(texto[fin_blancos:fin])
+        elif grupo == 'ident':
+            valor = texto[fin_blancos:fin].lower()
+        if grupo == 'ident':
+            # La posición informada es la del carácter que sigue al identificador
+            columna += fin - fin_blancos
+            tipo, valor = _TOKENS_RESERVADOS.get(valor, ('ident', valor))
+            return (tipo, valor, self.linea, columna)
+        elif grupo == 'numero':
+            return ('numero', texto[fin_blancos:fin], self.linea, columna + fin - fin_blancos)
+        elif grupo == 'simbolo':
+            tipo, valor, desplazamiento = _TOKENS_SIMBOLO[texto[fin_blancos:fin]]
+            return (tipo, valor, self.linea, columna + desplazamiento)
+
+        if fin < len(texto):
+            raise SyntaxError(f"Lexical error at line {self.linea}, column {columna}: invalid character '{texto[fin].lower()}'")
+        self.columna = columna
+        return (None, None, self.linea, self.columna)  # End of input
+
+    def _saltar_bytes(self, inicio, fin):
+        """Actualiza línea, inicio de línea y ajuste de columna al saltar texto[inicio:fin] (motor mapeado)"""
+        region = self.texto[inicio:fin]
+        if b'\r' in region:
+            saltos = region.replace(b'\r\n', b'\n').count(b'\n') + region.count(b'\r') - region.count(b'\r\n')
+            ultimo = max(region.rfind(b'\n'), region.rfind(b'\r'))
+        else:
+            saltos = region.count(b'\n')
+            ultimo = region.rfind(b'\n')
+        if saltos:
+            self.linea += saltos
+            self.inicio_linea = inicio + ultimo + 1
+            self.ajuste_columna = 0
+            region = region[ultimo + 1:]
+        # Las columnas se cuentan en caracteres: los comentarios pueden tener UTF-8
+        if not region.isascii():
+            self.ajuste_columna += len(region) - len(region.decode('utf-8', 'replace'))
+
+    def _liberar_paginas(self):
+        """Devuelve al sistema operativo las páginas del archivo mapeado que ya se analizaron"""
+        hasta = self.posicion - self.posicion % mmap.PAGESIZE
+        if hasta - self.liberado >= VENTANA_MAPEO:
+            if hasattr(mmap, 'MADV_DONTNEED'):
+                self.texto.madvise(mmap.MADV_DONTNEED, self.liberado, hasta - self.liberado)
+            self.liberado = hasta
+
+    def _next_token_mapeado(self):
+        """Genera el siguiente token (tipo, valor, línea, columna) desde el archivo mapeado en memoria"""
+        texto = self.texto
+        inicio = self.posicion
+        m = _PATRON_TOKEN_BYTES.match(texto, inicio)
+        grupo = m.lastgroup
+        fin_blancos = m.start(grupo) if grupo else m.end()
+        if fin_blancos > inicio:
+            self._saltar_bytes(inicio, fin_blancos)
+        self.posicion = fin = m.end()
+        if fin - self.liberado >= VENTANA_MAPEO and isinstance(texto, mmap.mmap):
+            self._liberar_paginas()
+        columna = fin_blancos - self.inicio_linea - self.ajuste_columna + 1
+        if grupo != 'simbolo' and fin < len(texto) and texto[fin] >= 0x80:
+            return self._token_no_ascii(fin_blancos, columna)
+
+        if grupo == 'ident':
+            valor = texto[fin_blancos:fin].decode('ascii').lower()
+            columna += fin - fin_blancos
+            tipo, valor = _TOKENS_RESERVADOS.get(valor, ('ident', valor))
+            return (tipo, valor, self.linea, columna)
+        elif grupo == 'numero':
+            return ('numero', texto[fin_blancos:fin].decode('ascii'), self.linea, columna + fin - fin_blancos)
+        elif grupo == 'simbolo':
+            tipo, valor, desplazamiento = _TOKENS_SIMBOLO[texto[fin_blancos:fin].decode('ascii')]
+            return (tipo, valor, self.linea, columna + desplazamiento)
+
+        if fin < len(texto):
+            caracter = texto[fin:fin + 4].decode('utf-8', 'replace')[0]
+            raise SyntaxError(f"Lexical error at line {self.linea}, column {columna}: invalid character '{caracter.lower()}'")
+        self.columna = columna
+        return (None, None, self.linea, self.columna)  # End of input
+
+    def _token_no_ascii(self, inicio, columna):
+        """
+        Identificador o número del motor mapeado que empieza en inicio y tiene
+        bytes no ASCII: decodifica la palabra y lo reconoce como los motores de texto.
+        """
+        palabra = self.texto[inicio:_PATRON_PALABRA_BYTES.match(self.texto, inicio).end()].decode('utf-8', 'replace')
+        grupo, fin = _lexema_clasico(palabra, 0)
+        if grupo is None:
+            self.posicion = inicio
+            raise SyntaxError(f"Lexical error at line {self.linea}, column {columna}: invalid character '{palabra[0].lower()}'")
+        lexema = palabra[:fin]
+        longitud = len(lexema.encode('utf-8'))
+        self.posicion = inicio + longitud
+        self.ajuste_columna += longitud - len(lexema)  # Las columnas se cuentan en caracteres
+        if grupo == 'numero':
+            return ('numero', lexema, self.linea, columna + len(lexema))
+        valor = _minusculas(lexema)
+        tipo, valor = _TOKENS_RESERVADOS.get(valor, ('ident', valor))
+        return (tipo, valor, self.linea, columna + len(lexema))
+
+    def _next_token_clasico(self):
         """Genera y devuelve el siguiente token junto con su valor y posición (tipo, valor, línea, columna)"""
         while self.posicion < len(self.texto):
             input_char = self.texto[self.posicion].lower()
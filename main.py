@@ -1,38 +1,152 @@
-import sys
+import argparse
 import os
-from lexico import AnalizadorLexico
-from sintactico import sintactico
+import sys
+from lexico import AnalizadorLexico, MOTORES
+from sintactico import AnalizadorSintactico
 from generador_mepa import GeneradorMEPA
+from optimizador_mepa import OptimizadorMirilla, REGLAS
+from optimizador_ast import PlegadorConstantes, EliminadorCodigoMuerto, EliminadorNoUsados
+from mepa_vm import MaquinaMEPA, ProgramaMEPA, ErrorEjecucion, valores_entrada
+from perfilador_mepa import PerfiladorMEPA
+from generador_python import GeneradorPython
+from superinstrucciones import fusionar, bajar
+
+TAMANIO_BUFFER = 1 << 16  # Buffer de escritura del .mepa
 
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Uso: python3 main.py <input_file>")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(usage="python3 main.py [opciones] <input_file>")
+    parser.add_argument("input_file")
+    parser.add_argument("--lexico", choices=MOTORES, default=MOTORES[0],
+                        help="motor del analizador léxico: el autómata clásico o la expresión regular "
+                             "maestra, más rápida, que dan los mismos tokens (por defecto clasico; sin "
+                             "efecto con --mmap)")
+    parser.add_argument("--mmap", action="store_true",
+                        help="analizar el archivo mapeado en memoria en lugar de leerlo completo")
+    parser.add_argument("--binario", action="store_true",
+                        help="guardar además el bytecode MEPA binario (.mepab)")
+    parser.add_argument("--cortocircuito", action="store_true",
+                        help="evaluar and/or en cortocircuito (no evalúa el operando derecho si no hace falta; "
+                             "cambia el comportamiento si ese operando llama a funciones con efectos)")
+    parser.add_argument("--superinstrucciones", action="store_true",
+                        help="emitir el dialecto MEPA extendido con superinstrucciones (INCR, DCVV, DCVC), "
+                             "que sólo ejecuta la máquina virtual de mepa_vm; el bytecode se baja a MEPA estándar")
+    parser.add_argument("-O", dest="optimizar", action="store_true",
+                        help="plegar constantes y eliminar código muerto y subrutinas y variables no usadas en el AST, y aplicar el optimizador de mirilla al código MEPA")
+    parser.add_argument("--reglas", default=",".join(REGLAS),
+                        help=f"reglas de mirilla a aplicar con -O, separadas por coma (por defecto todas: {','.join(REGLAS)})")
+    parser.add_argument("--ejecutar", action="store_true",
+                        help="ejecutar el programa en la máquina virtual MEPA después de compilarlo "
+                             "(lee los valores de read de la entrada estándar)")
+    parser.add_argument("--motor", choices=("mepa", "python"), default="mepa",
+                        help="con --ejecutar: ejecutar el código MEPA en la máquina virtual o "
+                             "traducir el AST a Python y ejecutarlo (por defecto mepa)")
+    parser.add_argument("--perfil", action="store_true",
+                        help="ejecutar perfilando en la máquina virtual MEPA: imprime las instrucciones "
+                             "ejecutadas por opcode y por subrutina y guarda el perfil completo (.perfil.json)")
+    parser.add_argument("--mapa", action="store_true",
+                        help="guardar junto al .mepa el mapa de fuente (.mepa.map): la línea y columna "
+                             "del fuente Pascal de cada instrucción")
+    parser.add_argument("--perfil-lineas", action="store_true",
+                        help="ejecutar perfilando en la máquina virtual MEPA e imprimir el fuente Pascal "
+                             "con las veces que se ejecutó cada línea")
+    args = parser.parse_args()
+    if (args.perfil or args.perfil_lineas) and args.motor != "mepa":
+        parser.error("--perfil and --perfil-lineas profile the MEPA virtual machine: use them with --motor mepa")
+    if (args.mapa or args.perfil_lineas) and args.optimizar:
+        parser.error("source maps do not follow the peephole optimizer: --mapa and --perfil-lineas can not be used with -O")
+    args.ejecutar = args.ejecutar or args.perfil or args.perfil_lineas
+    mapa_fuente = args.mapa or args.perfil_lineas
 
-    input_file = sys.argv[1]
+    input_file = args.input_file
 
-    analizador = AnalizadorLexico()
-    analizador.cargar_archivo(input_file)
+    analizador = AnalizadorLexico(args.lexico)
+    analizador.cargar_archivo(input_file, mapear=args.mmap)
 
     try:
         # Análisis sintáctico y semántico (construye AST)
-        ast = sintactico(analizador)
+        parser = AnalizadorSintactico(analizador)
+        ast = parser.analizar()
         
         # Obtener la tabla de símbolos del analizador semántico
-        from sintactico import semantico
-        tabla_simbolos = semantico.tabla_simbolos
-        
-        # Generar código intermedio
-        generador = GeneradorMEPA(tabla_simbolos)
-        generador.generar(ast)
+        tabla_simbolos = parser.semantico.tabla_simbolos
+
+        # Optimizaciones sobre el AST
+        if args.optimizar:
+            plegador = PlegadorConstantes()
+            plegador.plegar(ast)
+            print(plegador.reporte())
+            eliminador = EliminadorCodigoMuerto()
+            eliminador.podar(ast)
+            print(eliminador.reporte())
+            no_usados = EliminadorNoUsados()
+            no_usados.eliminar(ast, tabla_simbolos)
+            print(no_usados.reporte())
         
-        # Mostrar código intermedio generado
-        codigo = generador.obtener_codigo()
+        # Generar código intermedio: se escribe en el .mepa a medida que se
+        # emite, salvo que haga falta el código en memoria para optimizarlo,
+        # para el bytecode, para ejecutarlo o para fusionar superinstrucciones
         output_file = os.path.splitext(input_file)[0] + ".mepa"
-        with open(output_file, "w") as f:
-            f.write(codigo)
+        if args.optimizar or args.binario or args.ejecutar or args.superinstrucciones:
+            # Con -O se fusiona después de la mirilla, que trabaja sobre MEPA estándar
+            generador = GeneradorMEPA(tabla_simbolos, cortocircuito=args.cortocircuito,
+                                      superinstrucciones=args.superinstrucciones and not args.optimizar,
+                                      mapa_fuente=mapa_fuente)
+            generador.generar(ast)
+            if args.optimizar:
+                optimizador = OptimizadorMirilla(args.reglas.split(",") if args.reglas else ())
+                generador.codigo = optimizador.optimizar(generador.codigo)
+                print(optimizador.reporte())
+                if args.superinstrucciones:
+                    generador.codigo = fusionar(generador.codigo)
+            if args.superinstrucciones:
+                print(generador.codigo.reporte())
+            with open(output_file, "w") as f:
+                f.write(generador.obtener_codigo())
+        else:
+            with open(output_file, "w", buffering=TAMANIO_BUFFER) as f:
+                generador = GeneradorMEPA(tabla_simbolos, salida=f, cortocircuito=args.cortocircuito,
+                                          mapa_fuente=mapa_fuente)
+                generador.generar(ast)
 
         print(f"MEPA code saved to: {output_file}")
 
-    except SyntaxError as e:
+        if args.mapa:
+            output_file += ".map"
+            with open(output_file, "w") as f:
+                f.write(generador.mapa.texto())
+            print(f"Source map saved to: {output_file}")
+
+        if args.binario:
+            output_file = os.path.splitext(input_file)[0] + ".mepab"
+            with open(output_file, "wb") as f:
+                f.write(bajar(generador.codigo).a_bytes() if args.superinstrucciones else generador.obtener_bytecode())
+            print(f"MEPA bytecode saved to: {output_file}")
+
+        if args.ejecutar and args.motor == "python":
+            generador_python = GeneradorPython(tabla_simbolos, cortocircuito=args.cortocircuito)
+            generador_python.generar(ast)
+            try:
+                programa = generador_python.compilar()
+            except ValueError as e:
+                # Anidación que el compilador de Python no admite
+                print(e)
+            else:
+                programa.ejecutar(valores_entrada(sys.stdin), sys.stdout)
+        elif args.perfil or args.perfil_lineas:
+            perfilador = PerfiladorMEPA()
+            try:
+                perfilador.ejecutar(ProgramaMEPA.desde_generador(generador), valores_entrada(sys.stdin), sys.stdout)
+            finally:
+                if args.perfil:
+                    print(perfilador.perfil.reporte())
+                    output_file = os.path.splitext(input_file)[0] + ".perfil.json"
+                    perfilador.perfil.guardar_json(output_file)
+                    print(f"Profile saved to: {output_file}")
+                if args.perfil_lineas:
+                    with open(input_file) as f:
+                        print(perfilador.perfil.reporte_lineas(generador.mapa, f.read()))
+        elif args.ejecutar:
+            MaquinaMEPA().ejecutar(ProgramaMEPA.desde_generador(generador), valores_entrada(sys.stdin), sys.stdout)
+
+    except (SyntaxError, ErrorEjecucion) as e:
         print(e)
@@ -0,0 +1,57 @@
+"""
+Mapa de fuente del código MEPA: de cada instrucción a la posición en el
+fuente Pascal de la sentencia o expresión que la generó.
+
+GeneradorMEPA(mapa_fuente=True) lo arma mientras genera (ver
+GeneradorMEPA._recorrer_con_posiciones) y main.py --mapa lo guarda junto al
+.mepa en un .mepa.map: la línea i del mapa corresponde a la línea i del
+.mepa y tiene "linea columna", o "-" si la instrucción no viene de ningún
+nodo con posición.
+"""
+
+
+class MapaFuente:
+    """posiciones[i]: (linea, columna) de la instrucción i, o None."""
+
+    def __init__(self, posiciones=None):
+        self.posiciones = [] if posiciones is None else posiciones
+
+    def __len__(self):
+        return len(self.posiciones)
+
+    def posicion(self, i):
+        """(linea, columna) de la instrucción i, o None."""
+        return self.posiciones[i] if 0 <= i < len(self.posiciones) else None
+
+    def texto(self):
+        """Texto del .mepa.map (una línea por instrucción)."""
+        return "\n".join("-" if posicion is None else f"{posicion[0]} {posicion[1]}"
+                         for posicion in self.posiciones)
+
+    @classmethod
+    def desde_texto(cls, texto):
+        """Lee el texto de un .mepa.map."""
+        posiciones = []
+        for numero, linea in enumerate(texto.splitlines(), 1):
+            partes = linea.split()
+            if partes == ["-"]:
+                posiciones.append(None)
+            elif len(partes) == 2 and all(parte.isdigit() for parte in partes):
+                posiciones.append((int(partes[0]), int(partes[1])))
+            else:
+                raise ValueError(f"Línea {numero} del mapa de fuente inválida: {linea!r}")
+        return cls(posiciones)
+
+    def por_linea(self, cuentas):
+        """
+        Agrupa por línea del fuente las ejecuciones de cada instrucción
+        (cuentas[i]): {linea: (veces, instrucciones)}, con veces las
+        ejecuciones de la instrucción más ejecutada de la línea e
+        instrucciones el total ejecutado por ella.
+        """
+        lineas = {}
+        for posicion, cuenta in zip(self.posiciones, cuentas):
+            if posicion is not None:
+                veces, instrucciones = lineas.get(posicion[0], (0, 0))
+                lineas[posicion[0]] = (max(veces, cuenta), instrucciones + cuenta)
+        return lineas
@@ -0,0 +1,324 @@
+"""
+Máquina virtual MEPA.
+
+Ejecuta el código que produce GeneradorMEPA sin volver a parsear texto: el
+programa se decodifica una sola vez (ProgramaMEPA) en arreglos de opcodes y
+operandos enteros, con los operandos de DSVS/DSVF/LLPR ya resueltos a la
+dirección de su etiqueta. La máquina (MaquinaMEPA) guarda la pila en un
+array de enteros y los registros de base de cada nivel léxico (el display D)
+en otro, así que APVL/ALVL, ENPR/RTPR y LLPR cuestan lo mismo para cualquier
+nivel. Los saltos apuntan a la instrucción que sigue a la NADA de la
+etiqueta, así que las etiquetas no cuestan un despacho.
+
+También ejecuta las superinstrucciones del dialecto extendido (INCR, DCVV,
+DCVC; ver superinstrucciones.py), con sus operandos decodificados aparte.
+
+Uso: python3 mepa_vm.py <archivo.mepa> (lee de la entrada estándar los
+enteros de read y escribe cada write en una línea).
+"""
+import operator
+import sys
+from array import array
+
+from codigo_mepa import CodigoMEPA, Instruccion, OPERANDOS, ETIQUETA, dividir
+
+(NADA, INPP, PARA, RMEM, LMEM, APCT, APVL, ALVL, SUMA, SUST, MULT, DIVI, UMEN,
+ CONJ, DISJ, NEGA, CMME, CMMA, CMIG, CMDG, CMNI, CMYI, DSVS, DSVF, LEER, IMPR,
+ LLPR, ENPR, RTPR, INCR, DCVV, DCVC) = Instruccion
+
+TAMANIO_PILA = 1 << 20  # Palabras de la pila de la máquina
+
+# Instrucciones que desapilan dos valores y apilan el resultado
+BINARIAS = frozenset((SUMA, SUST, MULT, DIVI, CONJ, DISJ, CMME, CMMA, CMIG, CMDG, CMNI, CMYI))
+
+# Comparación de DCVV/DCVC como función
+COMPARAR = {
+    CMME: operator.lt,
+    CMMA: operator.gt,
+    CMIG: operator.eq,
+    CMDG: operator.ne,
+    CMNI: operator.le,
+    CMYI: operator.ge,
+}
+
+
+class ErrorEjecucion(RuntimeError):
+    """Error del programa MEPA durante la ejecución (no del compilador)."""
+
+
+class ProgramaMEPA:
+    """
+    Código MEPA decodificado para ejecutar: opcodes[i], op1[i], op2[i] con
+    los saltos y llamadas apuntando a índices de instrucción. Los operandos
+    de una superinstrucción están en superoperandos[i].
+    """
+
+    def __init__(self, codigo: CodigoMEPA):
+        self.opcodes = opcodes = array('B', codigo.opcodes)
+        self.op1 = op1 = codigo.resolver_etiquetas()
+        self.op2 = array('q', codigo.op2)
+        for i, opcode in enumerate(opcodes):
+            if opcode != NADA and OPERANDOS[opcode] == ETIQUETA:
+                op1[i] = self._saltear_etiquetas(op1[i])
+        self.superoperandos = [None] * len(opcodes)
+        for i, opcode in enumerate(opcodes):
+            if opcode == INCR:
+                self.superoperandos[i] = codigo.superoperandos[op1[i]]
+            elif opcode == DCVV or opcode == DCVC:
+                # (nivel, offset, nivel|constante..., comparación, dirección del salto)
+                comparacion, *operandos, etiqueta = codigo.superoperandos[op1[i]]
+                destino = self._saltear_etiquetas(codigo.direcciones[etiqueta])
+                self.superoperandos[i] = (*operandos, COMPARAR[comparacion], destino)
+        self.etiquetas = {}  # map: {dirección: nombre de la etiqueta}
+        for nombre, direccion in zip(codigo.etiquetas, codigo.direcciones):
+            self.etiquetas.setdefault(direccion, nombre)
+        self.codigo = codigo
+
+        # Registros del display: uno por nivel léxico usado por el programa
+        niveles = [op1 for opcode, op1 in zip(self.opcodes, self.op1) if opcode in (APVL, ALVL, ENPR, RTPR)]
+        for opcode, operandos in zip(opcodes, self.superoperandos):
+            if opcode == INCR or opcode == DCVC:
+                niveles.append(operandos[0])
+            elif opcode == DCVV:
+                niveles.extend(operandos[0:3:2])
+        self.niveles = max(niveles, default=0) + 1
+
+    def _saltear_etiquetas(self, direccion):
+        """Primera instrucción desde direccion que no es la NADA de una etiqueta."""
+        while direccion < len(self.opcodes) and self.opcodes[direccion] == NADA:
+            direccion += 1
+        return direccion
+
+    @classmethod
+    def desde_texto(cls, texto):
+        """Decodifica el texto de un archivo .mepa."""
+        return cls(CodigoMEPA.desde_texto(texto))
+
+    @classmethod
+    def desde_generador(cls, generador):
+        """Decodifica el código de un GeneradorMEPA que generó en memoria (sin salida)."""
+        if not isinstance(generador.codigo, CodigoMEPA):
+            raise ValueError("El generador escribió el código en un archivo: no hay código en memoria para ejecutar")
+        return cls(generador.codigo)
+
+    def __len__(self):
+        return len(self.opcodes)
+
+
+def valores_entrada(archivo):
+    """Palabras (los enteros de read) separadas por blancos en archivo, a medida que se leen."""
+    for linea in archivo:
+        for palabra in linea.split():
+            yield palabra
+
+
+class MaquinaMEPA:
+    """
+    Intérprete de ProgramaMEPA. ejecutar() corre el programa hasta PARA
+    leyendo de entrada (cualquier iterable de enteros, o de textos que los
+    representen) y escribiendo cada IMPR en una línea de salida; sin salida,
+    los valores impresos se devuelven en una lista.
+    """
+
+    def __init__(self, tamanio_pila=TAMANIO_PILA):
+        self.tamanio_pila = tamanio_pila
+        self.pila = None     # Memoria M de la última ejecución
+        self.display = None  # Registros D de la última ejecución
+
+    def ejecutar(self, programa: ProgramaMEPA, entrada=(), salida=None):
+        return self._ejecutar(programa, entrada, salida)
+
+    def _ejecutar(self, programa, entrada, salida, perfilar=None):
+        """
+        Ciclo de ejecución de la máquina. Con perfilar, además cuenta las
+        ejecuciones de cada instrucción, los pasos de cada llamada y la
+        profundidad máxima de la pila, y al terminar (también con error)
+        llama a perfilar(programa, cuentas, inclusivas, pila_maxima): ver
+        perfilador_mepa.py. Sin perfilar, contar cuesta una comparación por
+        instrucción.
+        """
+        opcodes, operandos1, operandos2 = programa.opcodes, programa.op1, programa.op2
+        superoperandos = programa.superoperandos
+        M = self.pila = array('q', bytes(8 * self.tamanio_pila))
+        D = self.display = array('q', bytes(8 * programa.niveles))
+        leer = iter(entrada).__next__
+        impresos = []
+        imprimir = impresos.append if salida is None else (lambda valor: salida.write(f"{valor}\n"))
+
+        if perfilar:
+            cuentas = array('q', bytes(8 * len(programa)))      # Ejecuciones de cada instrucción
+            inclusivas = array('q', bytes(8 * len(programa)))   # Pasos por dirección de entrada
+            activas = array('q', bytes(8 * len(programa)))      # Llamadas en curso por entrada
+            llamadas = []  # Pila de (dirección de entrada, pasos al llamar)
+            pasos = 0
+            maximo = -1
+
+        s = -1  # Tope de la pila
+        i = 0   # Instrucción actual
+        try:
+            while True:
+                opcode = opcodes[i]
+                if perfilar:
+                    cuentas[i] += 1
+                    pasos += 1
+                    if s > maximo:
+                        maximo = s
+                # Las instrucciones más frecuentes primero
+                if opcode == APVL:
+                    s += 1
+                    M[s] = M[D[operandos1[i]] + operandos2[i]]
+                    i += 1
+                elif opcode == APCT:
+                    s += 1
+                    M[s] = operandos1[i]
+                    i += 1
+                elif opcode == ALVL:
+                    M[D[operandos1[i]] + operandos2[i]] = M[s]
+                    s -= 1
+                    i += 1
+                elif opcode in BINARIAS:
+                    b = M[s]
+                    s -= 1
+                    a = M[s]
+                    if opcode == SUMA:
+                        M[s] = a + b
+                    elif opcode == SUST:
+                        M[s] = a - b
+                    elif opcode == MULT:
+                        M[s] = a * b
+                    elif opcode == DIVI:
+                        M[s] = dividir(a, b)
+                    elif opcode == CMME:
+                        M[s] = a < b
+                    elif opcode == CMMA:
+                        M[s] = a > b
+                    elif opcode == CMIG:
+                        M[s] = a == b
+                    elif opcode == CMDG:
+                        M[s] = a != b
+                    elif opcode == CMNI:
+                        M[s] = a <= b
+                    elif opcode == CMYI:
+                        M[s] = a >= b
+                    elif opcode == CONJ:
+                        M[s] = a == 1 and b == 1
+                    else:  # DISJ
+                        M[s] = a == 1 or b == 1
+                    i += 1
+                elif opcode == DSVF:
+                    i = operandos1[i] if not M[s] else i + 1
+                    s -= 1
+                elif opcode == DSVS:
+                    i = operandos1[i]
+                elif opcode == DCVV:
+                    nivel1, offset1, nivel2, offset2, comparar, destino = superoperandos[i]
+                    i = i + 1 if comparar(M[D[nivel1] + offset1], M[D[nivel2] + offset2]) else destino
+                elif opcode == DCVC:
+                    nivel, offset, constante, comparar, destino = superoperandos[i]
+                    i = i + 1 if comparar(M[D[nivel] + offset], constante) else destino
+                elif opcode == INCR:
+                    nivel, offset, constante = superoperandos[i]
+                    M[D[nivel] + offset] += constante
+                    i += 1
+                elif opcode == NADA:
+                    i += 1
+                elif opcode == LLPR:
+                    # Apila la dirección de retorno
+                    s += 1
+                    M[s] = i + 1
+                    i = operandos1[i]
+                    if perfilar:
+                        activas[i] += 1
+                        llamadas.append((i, pasos))
+                elif opcode == ENPR:
+                    # Guarda el registro del nivel k y lo apunta a la base del nuevo marco
+                    k = operandos1[i]
+                    s += 1
+                    M[s] = D[k]
+                    D[k] = s + 1
+                    i += 1
+                elif opcode == RTPR:
+                    # Restaura D[k], vuelve y desapila registro, retorno y n parámetros
+                    k, n = operandos1[i], operandos2[i]
+                    D[k] = M[s]
+                    i = M[s - 1]
+                    s -= n + 2
+                    if perfilar:
+                        # Una llamada recursiva ya está contada en la más externa
+                        entrada_llamada, pasos_llamada = llamadas.pop()
+                        activas[entrada_llamada] -= 1
+                        if not activas[entrada_llamada]:
+                            inclusivas[entrada_llamada] += pasos - pasos_llamada
+                elif opcode == UMEN:
+                    M[s] = -M[s]
+                    i += 1
+                elif opcode == NEGA:
+                    M[s] = 1 - M[s]
+                    i += 1
+                elif opcode == RMEM:
+                    s += operandos1[i]
+                    i += 1
+                elif opcode == LMEM:
+                    s -= operandos1[i]
+                    i += 1
+                elif opcode == LEER:
+                    s += 1
+                    M[s] = int(leer())
+                    i += 1
+                elif opcode == IMPR:
+                    imprimir(M[s])
+                    s -= 1
+                    i += 1
+                elif opcode == INPP:
+                    s = -1
+                    D[0] = 0
+                    i += 1
+                elif opcode == PARA:
+                    break
+                else:
+                    raise self._error(programa, i, f"unknown opcode {opcode}")
+        except ZeroDivisionError:
+            raise self._error(programa, i, "division by zero") from None
+        except OverflowError:
+            raise self._error(programa, i, "integer overflow") from None
+        except IndexError:
+            raise self._error(programa, i, "stack overflow or invalid address") from None
+        except StopIteration:
+            raise self._error(programa, i, "read past the end of the input") from None
+        except ValueError:
+            raise self._error(programa, i, "input is not an integer") from None
+        finally:
+            if perfilar:
+                perfilar(programa, cuentas, inclusivas, maximo + 1)
+        return impresos if salida is None else None
+
+    @staticmethod
+    def _error(programa, i, mensaje):
+        return ErrorEjecucion(f"Runtime error at instruction {i} ({programa.codigo.linea(i)}): {mensaje}")
+
+
+def ejecutar(origen, entrada=(), salida=None):
+    """
+    Ejecuta un programa MEPA: origen es texto .mepa, un CodigoMEPA o un
+    GeneradorMEPA que generó en memoria.
+    """
+    if isinstance(origen, str):
+        programa = ProgramaMEPA.desde_texto(origen)
+    elif isinstance(origen, CodigoMEPA):
+        programa = ProgramaMEPA(origen)
+    else:
+        programa = ProgramaMEPA.desde_generador(origen)
+    return MaquinaMEPA().ejecutar(programa, entrada, salida)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python3 mepa_vm.py <file.mepa>")
+        sys.exit(1)
+    with open(sys.argv[1]) as f:
+        programa = ProgramaMEPA.desde_texto(f.read())
+    try:
+        MaquinaMEPA().ejecutar(programa, valores_entrada(sys.stdin), sys.stdout)
+    except ErrorEjecucion as e:
+        print(e)
+        sys.exit(1)
@@ -0,0 +1,523 @@
+"""
+Optimizaciones sobre el AST, entre el análisis (sintactico()) y la generación
+de código (GeneradorMEPA.generar).
+
+PlegadorConstantes reemplaza las subexpresiones formadas sólo por literales
+por su valor (2*3+4, not true, 5 > 3) y aplica identidades algebraicas
+(x*1, x+0, x*0, +x, b and true, b or false, not not b). Usa los tipos (.tipo) que
+dejó el análisis semántico para armar los literales nuevos.
+
+Nunca elimina un error en tiempo de ejecución ni un efecto: una división
+entre constantes con divisor 0 o una operación entre constantes cuyo
+resultado no cabe en un entero MEPA de 64 bits no se pliega (falla en
+ejecución), - -x no se simplifica (desborda con el menor entero), y x*0,
+b and false y b or true sólo se reducen a la constante si x/b es pura (sin
+llamadas a función ni operaciones que puedan dividir por 0 o desbordar),
+porque MEPA evalúa los dos operandos.
+
+EliminadorCodigoMuerto, que corre después del plegado, borra las ramas de un
+if con condición constante, los while false y las sentencias que siguen a un
+while true (el lenguaje no tiene forma de salir de él).
+
+EliminadorNoUsados arma el grafo de llamadas desde el bloque principal
+(GrafoLlamadas) y borra las subrutinas a las que no se llega, anidadas
+incluidas, y las variables que ningún código alcanzable usa, renumerando los
+offsets para que RMEM/LMEM reserven sólo las que quedan.
+"""
+import operator
+
+from ast import *
+from codigo_mepa import dividir, ENTERO_MINIMO, ENTERO_MAXIMO
+
+# Operaciones plegables entre constantes (los booleanos como bool de Python)
+OPERACIONES = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    'div': dividir,
+    'and': lambda a, b: a and b,
+    'or': lambda a, b: a or b,
+    '=': operator.eq,
+    '<>': operator.ne,
+    '<': operator.lt,
+    '>': operator.gt,
+    '<=': operator.le,
+    '>=': operator.ge,
+}
+OPERACIONES_UNARIAS = {
+    '+': operator.pos,
+    '-': operator.neg,
+    'not': operator.not_,
+}
+
+# Elemento neutro de cada operador por lado: {operador: (a izquierda, a derecha)}
+NEUTROS = {
+    '+': (0, 0),
+    '-': (None, 0),
+    '*': (1, 1),
+    'div': (None, 1),
+    'and': (True, True),
+    'or': (False, False),
+}
+# Elemento absorbente (de cualquier lado): {operador: constante}
+ABSORBENTES = {
+    '*': 0,
+    'and': False,
+    'or': True,
+}
+
+
+def sin_parentesis(nodo):
+    """La expresión dentro de los NodoExpresion (paréntesis) que envuelven a nodo."""
+    while type(nodo) is NodoExpresion:
+        nodo = nodo.expresion
+    return nodo
+
+
+def valor_constante(nodo):
+    """Valor de nodo si es un literal (int, o bool para true/false), None si no."""
+    nodo = sin_parentesis(nodo)
+    if type(nodo) is NodoNumero:
+        return nodo.valor
+    if type(nodo) is NodoBooleano:
+        return nodo.valor == 'true'
+    return None
+
+
+def en_rango(valor):
+    """Si valor cabe en un entero MEPA (los bool siempre): si no, la operación desborda en ejecución."""
+    return ENTERO_MINIMO <= valor <= ENTERO_MAXIMO
+
+
+def literal(valor, tipo, nodo):
+    """Literal del tipo dado con el valor, en la posición de nodo."""
+    if tipo == 'boolean':
+        nuevo = NodoBooleano('true' if valor else 'false', nodo.linea, nodo.columna)
+    else:
+        nuevo = NodoNumero(valor, nodo.linea, nodo.columna)
+    nuevo.tipo = tipo
+    return nuevo
+
+
+class PlegadorConstantes(Visitante):
+    """
+    Plegado de constantes y simplificación algebraica. Reescribe el AST en el
+    lugar (plegar() devuelve la misma raíz). Como GeneradorMEPA, recorre con
+    la pila explícita de Visitante: cada expresión deja en resultados su
+    versión plegada y si es pura, y la sentencia que la contiene la toma de ahí.
+    """
+    prefijo = 'plegar_'
+
+    def __init__(self):
+        self.resultados = []     # Pila de (expresión plegada, es pura)
+        self.plegadas = 0        # Operaciones reemplazadas por su valor
+        self.simplificadas = 0   # Identidades algebraicas aplicadas
+
+    def plegar(self, raiz):
+        self.recorrer(raiz)
+        return raiz
+
+    def reporte(self):
+        return f"Constant folding: {self.plegadas} operations folded, {self.simplificadas} simplified"
+
+    # --- Sentencias: se pliegan sus expresiones en el lugar ---
+
+    def plegar_programa(self, nodo):
+        self.programar(*(nodo.declaraciones or ()), nodo.bloque)
+
+    def plegar_declaracion_procedimiento(self, nodo):
+        self.programar(*(nodo.declaraciones_internas or ()), nodo.bloque_cuerpo)
+
+    plegar_declaracion_funcion = plegar_declaracion_procedimiento
+
+    def plegar_bloque(self, nodo):
+        self.programar(*nodo.sentencias)
+
+    def plegar_asignacion(self, nodo):
+        self.programar(nodo.expresion, (self._reemplazar, nodo, 'expresion'))
+
+    def plegar_if(self, nodo):
+        self.programar(nodo.condicion, (self._reemplazar, nodo, 'condicion'),
+                       nodo.cuerpo_true, nodo.cuerpo_false)
+
+    def plegar_while(self, nodo):
+        self.programar(nodo.condicion, (self._reemplazar, nodo, 'condicion'), nodo.cuerpo)
+
+    def plegar_write(self, nodo):
+        self.programar(nodo.expresion, (self._reemplazar, nodo, 'expresion'))
+
+    def plegar_read(self, nodo):
+        pass
+
+    def plegar_llamada_procedimiento(self, nodo):
+        self.programar(*nodo.parametros, (self._reemplazar_parametros, nodo))
+
+    def _reemplazar(self, nodo, campo):
+        setattr(nodo, campo, self.resultados.pop()[0])
+
+    def _reemplazar_parametros(self, nodo):
+        if nodo.parametros:
+            resultados = self.resultados
+            nodo.parametros = [expresion for expresion, _ in resultados[-len(nodo.parametros):]]
+            del resultados[-len(nodo.parametros):]
+
+    # --- Expresiones: cada una deja (expresión plegada, es pura) en resultados ---
+
+    def plegar_numero(self, nodo):
+        self.resultados.append((nodo, True))
+
+    plegar_booleano = plegar_numero
+    plegar_identificador = plegar_numero
+
+    def plegar_expresion(self, nodo):
+        self.programar(nodo.expresion, (self._plegar_parentesis, nodo))
+
+    def _plegar_parentesis(self, nodo):
+        expresion, pura = self.resultados[-1]
+        # Los paréntesis alrededor de un literal o una variable no hacen falta
+        if type(expresion) not in (NodoNumero, NodoBooleano, NodoIdentificador):
+            nodo.expresion = expresion
+            self.resultados[-1] = (nodo, pura)
+
+    def plegar_llamada_funcion(self, nodo):
+        self.programar(*nodo.parametros, (self._plegar_llamada, nodo))
+
+    def _plegar_llamada(self, nodo):
+        self._reemplazar_parametros(nodo)
+        self.resultados.append((nodo, False))  # La función puede tener efectos
+
+    def plegar_operacion_unaria(self, nodo):
+        self.programar(nodo.operando, (self._plegar_unaria, nodo))
+
+    def _plegar_unaria(self, nodo):
+        operando, pura = self.resultados.pop()
+        nodo.operando = operando
+        if nodo.operador == '+':
+            # +x = x
+            self.simplificadas += 1
+            self.resultados.append((operando, pura))
+            return
+        valor = valor_constante(operando)
+        if valor is not None and nodo.operador in OPERACIONES_UNARIAS:
+            resultado = OPERACIONES_UNARIAS[nodo.operador](valor)
+            if en_rango(resultado):
+                self.plegadas += 1
+                self.resultados.append((literal(resultado, nodo.tipo, nodo), True))
+                return
+        interna = sin_parentesis(operando)
+        if nodo.operador == 'not' and type(interna) is NodoOperacionUnaria and interna.operador == 'not':
+            # not not b = b (- -x no: -x desborda con el menor entero)
+            self.simplificadas += 1
+            self.resultados.append((interna.operando, pura))
+            return
+        self.resultados.append((nodo, pura and nodo.operador == 'not'))
+
+    def plegar_operacion_binaria(self, nodo):
+        self.programar(nodo.izquierda, nodo.derecha, (self._plegar_binaria, nodo))
+
+    def _plegar_binaria(self, nodo):
+        derecha, pura_derecha = self.resultados.pop()
+        izquierda, pura_izquierda = self.resultados.pop()
+        nodo.izquierda, nodo.derecha = izquierda, derecha
+        operador = nodo.operador
+        a, b = valor_constante(izquierda), valor_constante(derecha)
+
+        if a is not None and b is not None:
+            resultado = None if operador == 'div' and b == 0 else OPERACIONES[operador](a, b)
+            if resultado is None or not en_rango(resultado):
+                # Se deja para que la división por cero o el desborde fallen en ejecución, como sin plegar
+                self.resultados.append((nodo, False))
+                return
+            self.plegadas += 1
+            self.resultados.append((literal(resultado, nodo.tipo, nodo), True))
+            return
+
+        # Con un operando variable + - * pueden desbordar, y div dividir por 0 o desbordar (menor entero div -1)
+        pura = pura_izquierda and pura_derecha and operador not in ('+', '-', '*') and \
+            not (operador == 'div' and b in (None, 0, -1))
+        neutro = NEUTROS.get(operador)
+        if neutro is not None:
+            # 'is not None' y comparación de tipo: True == 1 y False == 0 en Python
+            if b is not None and type(b) is type(neutro[1]) and b == neutro[1]:
+                self.simplificadas += 1
+                self.resultados.append((izquierda, pura_izquierda))
+                return
+            if a is not None and type(a) is type(neutro[0]) and a == neutro[0]:
+                self.simplificadas += 1
+                self.resultados.append((derecha, pura_derecha))
+                return
+        absorbente = ABSORBENTES.get(operador)
+        if absorbente is not None:
+            if (b is not None and b == absorbente and pura_izquierda) or \
+               (a is not None and a == absorbente and pura_derecha):
+                self.simplificadas += 1
+                self.resultados.append((literal(absorbente, nodo.tipo, nodo), True))
+                return
+        self.resultados.append((nodo, pura))
+
+
+def contar_sentencias(nodo):
+    """Sentencias (sin contar los bloques begin...end) en el subárbol de nodo."""
+    cantidad = 0
+    pendientes = [nodo]
+    while pendientes:
+        nodo = pendientes.pop()
+        if nodo is None:
+            continue
+        if type(nodo) is NodoBloque:
+            pendientes.extend(nodo.sentencias)
+            continue
+        cantidad += 1
+        if type(nodo) is NodoIf:
+            pendientes.append(nodo.cuerpo_true)
+            pendientes.append(nodo.cuerpo_false)
+        elif type(nodo) is NodoWhile:
+            pendientes.append(nodo.cuerpo)
+    return cantidad
+
+
+class EliminadorCodigoMuerto(Visitante):
+    """
+    Eliminación de ramas y código inalcanzable. Reescribe el AST en el lugar
+    (podar() devuelve la misma raíz); cada sentencia deja en resultados su
+    reemplazo (None si se borra) y si la ejecución puede seguir después de ella.
+    """
+    prefijo = 'podar_'
+
+    def __init__(self):
+        self.resultados = []   # Pila de (sentencia podada o None, puede continuar)
+        self.eliminadas = 0    # Sentencias borradas
+
+    def podar(self, raiz):
+        self.recorrer(raiz)
+        return raiz
+
+    def reporte(self):
+        return f"Dead code: {self.eliminadas} statements removed"
+
+    def _eliminar(self, nodo):
+        self.eliminadas += contar_sentencias(nodo)
+
+    def podar_programa(self, nodo):
+        self.programar(*(nodo.declaraciones or ()), nodo.bloque, (self._reemplazar, nodo, 'bloque'))
+
+    def podar_declaracion_procedimiento(self, nodo):
+        self.programar(*(nodo.declaraciones_internas or ()), nodo.bloque_cuerpo,
+                       (self._reemplazar, nodo, 'bloque_cuerpo'))
+
+    podar_declaracion_funcion = podar_declaracion_procedimiento
+
+    def _reemplazar(self, nodo, campo):
+        setattr(nodo, campo, self.resultados.pop()[0])
+
+    def podar_bloque(self, nodo):
+        self.programar(*nodo.sentencias, (self._podar_bloque, nodo))
+
+    def _podar_bloque(self, nodo):
+        resultados = self.resultados
+        podadas = resultados[len(resultados) - len(nodo.sentencias):]
+        del resultados[len(resultados) - len(nodo.sentencias):]
+        sentencias = []
+        continua = True
+        for sentencia, sigue in podadas:
+            if not continua:
+                # Después de un while true: inalcanzable
+                self._eliminar(sentencia)
+                continue
+            if sentencia is not None:
+                sentencias.append(sentencia)
+            continua = sigue
+        nodo.sentencias = sentencias
+        resultados.append((nodo, continua))
+
+    def podar_if(self, nodo):
+        if nodo.cuerpo_false is None:
+            self.programar(nodo.cuerpo_true, (self._podar_if, nodo))
+        else:
+            self.programar(nodo.cuerpo_true, nodo.cuerpo_false, (self._podar_if, nodo))
+
+    def _podar_if(self, nodo):
+        resultados = self.resultados
+        cuerpo_false, sigue_false = resultados.pop() if nodo.cuerpo_false is not None else (None, True)
+        cuerpo_true, sigue_true = resultados.pop()
+        valor = valor_constante(nodo.condicion)
+        if valor is True:
+            self.eliminadas += 1
+            self._eliminar(cuerpo_false)
+            resultados.append((cuerpo_true, sigue_true))
+        elif valor is False:
+            self.eliminadas += 1
+            self._eliminar(cuerpo_true)
+            resultados.append((cuerpo_false, sigue_false))
+        else:
+            nodo.cuerpo_true = cuerpo_true if cuerpo_true is not None else NodoBloque([], nodo.linea, nodo.columna)
+            nodo.cuerpo_false = cuerpo_false
+            resultados.append((nodo, sigue_true or sigue_false))
+
+    def podar_while(self, nodo):
+        self.programar(nodo.cuerpo, (self._podar_while, nodo))
+
+    def _podar_while(self, nodo):
+        cuerpo, _ = self.resultados.pop()
+        valor = valor_constante(nodo.condicion)
+        if valor is False:
+            self.eliminadas += 1
+            self._eliminar(cuerpo)
+            self.resultados.append((None, True))
+            return
+        nodo.cuerpo = cuerpo if cuerpo is not None else NodoBloque([], nodo.linea, nodo.columna)
+        # De un while true no se sale: lo que sigue es inalcanzable
+        self.resultados.append((nodo, valor is not True))
+
+    def podar_asignacion(self, nodo):
+        self.resultados.append((nodo, True))
+
+    podar_read = podar_asignacion
+    podar_write = podar_asignacion
+    podar_llamada_procedimiento = podar_asignacion
+
+
+def declaraciones_de(nodo):
+    """Subrutinas declaradas directamente en nodo (programa o subrutina)."""
+    if type(nodo) is NodoPrograma:
+        return nodo.declaraciones or []
+    return nodo.declaraciones_internas or []
+
+
+class GrafoLlamadas(Visitante):
+    """
+    Grafo de llamadas del programa desde el bloque principal: qué subrutinas
+    se alcanzan (por el Ambito de cada una), quién llama a quién y qué
+    símbolos (por su clave) usa el código alcanzable. El código de una
+    subrutina se recorre sólo la primera vez que se la alcanza.
+    """
+    prefijo = 'usos_'
+
+    def __init__(self, raiz: NodoPrograma):
+        self.declaracion = {}     # map: {Ambito: nodo de declaración}
+        pendientes = [raiz]
+        while pendientes:
+            for declaracion in declaraciones_de(pendientes.pop()):
+                self.declaracion[declaracion.ambito] = declaracion
+                pendientes.append(declaracion)
+
+        self.alcanzadas = set()   # Ámbitos de las subrutinas alcanzadas
+        self.llamadas = {}        # map: {Ambito llamador (None: principal): {Ambito llamado}}
+        self.usados = set()       # Claves de los símbolos usados
+        self.llamador = None
+        self.recorrer(raiz.bloque)
+
+    def _llamar(self, nodo):
+        ambito = nodo.simbolo['ambito_interno']
+        self.llamadas.setdefault(self.llamador, set()).add(ambito)
+        if ambito not in self.alcanzadas:
+            self.alcanzadas.add(ambito)
+            self.programar((self._entrar, ambito), self.declaracion[ambito].bloque_cuerpo,
+                           (self._entrar, self.llamador))
+
+    def _entrar(self, llamador):
+        self.llamador = llamador
+
+    def usos_bloque(self, nodo):
+        self.programar(*nodo.sentencias)
+
+    def usos_asignacion(self, nodo):
+        self.usados.add(nodo.variable.simbolo['clave'])
+        self.programar(nodo.expresion)
+
+    def usos_if(self, nodo):
+        self.programar(nodo.condicion, nodo.cuerpo_true, nodo.cuerpo_false)
+
+    def usos_while(self, nodo):
+        self.programar(nodo.condicion, nodo.cuerpo)
+
+    def usos_read(self, nodo):
+        self.usados.add(nodo.variable.simbolo['clave'])
+
+    def usos_write(self, nodo):
+        self.programar(nodo.expresion)
+
+    def usos_llamada_procedimiento(self, nodo):
+        self._llamar(nodo)
+        self.programar(*nodo.parametros)
+
+    usos_llamada_funcion = usos_llamada_procedimiento
+
+    def usos_identificador(self, nodo):
+        self.usados.add(nodo.simbolo['clave'])
+
+    def usos_numero(self, nodo):
+        pass
+
+    usos_booleano = usos_numero
+
+    def usos_expresion(self, nodo):
+        self.programar(nodo.expresion)
+
+    def usos_operacion_binaria(self, nodo):
+        self.programar(nodo.izquierda, nodo.derecha)
+
+    def usos_operacion_unaria(self, nodo):
+        self.programar(nodo.operando)
+
+
+class EliminadorNoUsados:
+    """
+    Borra del AST las subrutinas que no se alcanzan desde el bloque principal
+    y de la tabla de símbolos las variables locales (o globales) que no usa
+    ningún código alcanzable. Las variables que quedan en cada ámbito se
+    renumeran a offsets 0..n-1 en sus símbolos, que comparten los nodos, y
+    num_locales baja a n: el generador reserva sólo esas. Los parámetros no
+    se tocan (los apila el llamador).
+    """
+
+    def __init__(self):
+        self.subrutinas = []   # Nombres (con los de las que las contienen) de las subrutinas borradas
+        self.variables = []    # Nombres (ámbito.variable) de las variables borradas
+        self.memoria = []      # (ámbito, posiciones antes, después) de cada ámbito reducido
+
+    def eliminar(self, raiz: NodoPrograma, tabla_simbolos):
+        grafo = GrafoLlamadas(raiz)
+
+        # Subrutinas: se filtran las listas de declaraciones de lo que queda
+        pendientes = [(raiz, "")]
+        while pendientes:
+            nodo, prefijo = pendientes.pop()
+            quedan = []
+            for declaracion in declaraciones_de(nodo):
+                if declaracion.ambito in grafo.alcanzadas:
+                    quedan.append(declaracion)
+                    pendientes.append((declaracion, f"{prefijo}{declaracion.nombre}."))
+                else:
+                    self.subrutinas.append(f"{prefijo}{declaracion.nombre}")
+            if type(nodo) is NodoPrograma:
+                nodo.declaraciones = quedan
+            else:
+                nodo.declaraciones_internas = quedan
+
+        # Variables de los ámbitos que siguen en el programa
+        for ambito in [tabla_simbolos.global_, *grafo.alcanzadas]:
+            locales = [simbolo for simbolo in ambito.simbolos.values()
+                       if simbolo['categoria'] == 'variable' and simbolo['offset'] >= 0]
+            usadas = [simbolo for simbolo in locales if simbolo['clave'] in grafo.usados]
+            if len(usadas) == len(locales):
+                continue
+            for simbolo in locales:
+                if simbolo['clave'] not in grafo.usados:
+                    del ambito.simbolos[simbolo['id']]
+                    self.variables.append(f"{ambito.nombre}.{simbolo['nombre']}")
+            for offset, simbolo in enumerate(sorted(usadas, key=lambda simbolo: simbolo['offset'])):
+                simbolo['offset'] = offset
+            self.memoria.append((ambito.nombre, ambito.num_locales, len(usadas)))
+            ambito.num_locales = len(usadas)
+        return raiz
+
+    def reporte(self):
+        lineas = [f"Unused code: {len(self.subrutinas)} subroutines, {len(self.variables)} variables removed"]
+        if self.subrutinas:
+            lineas.append(f"  subroutines: {', '.join(self.subrutinas)}")
+        if self.variables:
+            lineas.append(f"  variables: {', '.join(self.variables)}")
+        for nombre, antes, despues in self.memoria:
+            lineas.append(f"  RMEM {nombre}: {antes} -> {despues}")
+        return "\n".join(lineas)
@@ -0,0 +1,246 @@
+"""
+Optimizador de mirilla (peephole) sobre el código MEPA generado.
+
+Recorre las instrucciones de un CodigoMEPA con una ventana corta (las últimas
+instrucciones ya aceptadas) y aplica reglas locales que no cambian el
+resultado del programa. Repite pasadas hasta que ninguna regla cambie nada
+(punto fijo) y cuenta, por regla, cuántas veces se aplicó y cuántas
+instrucciones ahorró.
+
+Reglas:
+    cadenas_saltos       DSVS/DSVF a una etiqueta cuya primera instrucción es
+                         otro DSVS saltan directo al destino final.
+    etiquetas_repetidas  Dos etiquetas seguidas se unen en la primera.
+    salto_siguiente      Se borra un DSVS a la etiqueta que lo sigue.
+    inalcanzable         Se borra el código entre DSVS/RTPR/PARA y la
+                         siguiente etiqueta.
+    etiquetas_sin_uso    Se borra la NADA de una etiqueta a la que no salta ni
+                         llama nadie.
+    neutros              APCT 0; SUMA|SUST y APCT 1; MULT|DIVI no hacen nada.
+    dobles_negaciones    NEGA; NEGA no hace nada (UMEN; UMEN sí: desborda
+                         con el menor entero, así que se deja).
+    reservas             RMEM a; RMEM b pasa a RMEM a+b (ídem LMEM): las
+                         llamadas a función anidadas reservan su retorno juntas.
+"""
+from codigo_mepa import CodigoMEPA, Instruccion
+
+(NADA, INPP, PARA, RMEM, LMEM, APCT, APVL, ALVL, SUMA, SUST, MULT, DIVI, UMEN,
+ CONJ, DISJ, NEGA, CMME, CMMA, CMIG, CMDG, CMNI, CMYI, DSVS, DSVF, LEER, IMPR,
+ LLPR, ENPR, RTPR, INCR, DCVV, DCVC) = Instruccion
+
+REGLAS = ('cadenas_saltos', 'etiquetas_repetidas', 'salto_siguiente', 'inalcanzable',
+          'etiquetas_sin_uso', 'neutros', 'dobles_negaciones', 'reservas')
+
+REFERENCIAS = (DSVS, DSVF, LLPR)  # Instrucciones cuyo operando es una etiqueta
+TERMINALES = (DSVS, RTPR, PARA)   # Después de ellas sólo se llega por una etiqueta
+
+# Constante con la que la operación no hace nada: {opcode: constante}
+NEUTRO = {SUMA: 0, SUST: 0, MULT: 1, DIVI: 1}
+INVOLUCIONES = (NEGA,)  # UMEN no: -x desborda con el menor entero
+ACUMULABLES = (RMEM, LMEM)
+
+
+def _destino_final(redireccion, etiqueta):
+    """Sigue las redirecciones desde etiqueta hasta una que no se redirige."""
+    vistas = {etiqueta}
+    while etiqueta in redireccion and redireccion[etiqueta] not in vistas:
+        etiqueta = redireccion[etiqueta]
+        vistas.add(etiqueta)
+    return etiqueta
+
+
+class OptimizadorMirilla:
+    """
+    Optimizador de mirilla configurable: reglas elige cuáles de REGLAS se
+    aplican (todas por defecto). optimizar() devuelve un CodigoMEPA nuevo.
+    """
+
+    def __init__(self, reglas=REGLAS):
+        desconocidas = [regla for regla in reglas if regla not in REGLAS]
+        if desconocidas:
+            raise ValueError(f"Unknown peephole rule(s) {desconocidas}, expected any of {REGLAS}")
+        self.reglas = frozenset(reglas)
+        self.aplicaciones = dict.fromkeys(REGLAS, 0)  # map: {regla: veces aplicada}
+        self.ahorro = dict.fromkeys(REGLAS, 0)        # map: {regla: instrucciones eliminadas}
+        self.pasadas = 0
+        self.instrucciones_antes = 0
+        self.instrucciones_despues = 0
+
+    def optimizar(self, codigo: CodigoMEPA) -> CodigoMEPA:
+        """Aplica las reglas hasta un punto fijo y devuelve el código optimizado."""
+        if codigo.superoperandos:
+            raise ValueError("The peephole optimizer works on standard MEPA: lower the superinstructions first")
+        instrucciones = list(zip(codigo.opcodes, codigo.op1, codigo.op2))
+        self.instrucciones_antes = len(instrucciones)
+        num_etiquetas = len(codigo.etiquetas)
+        while True:
+            self.pasadas += 1
+            instrucciones, cambios = self._pasada(instrucciones, num_etiquetas)
+            if not cambios:
+                break
+        self.instrucciones_despues = len(instrucciones)
+        return self._armar(instrucciones, codigo.etiquetas)
+
+    def _aplicar(self, regla, eliminadas=0):
+        self.aplicaciones[regla] += 1
+        self.ahorro[regla] += eliminadas
+
+    # --- Pasada ---
+
+    def _pasada(self, instrucciones, num_etiquetas):
+        """Una pasada de todas las reglas; devuelve (instrucciones, hubo cambios)."""
+        reglas = self.reglas
+        cambios = 0
+
+        # Etiquetas que se unen a la anterior (su NADA se borra) y saltos que
+        # se redirigen: {etiqueta: etiqueta que la reemplaza}
+        unidas = {}
+        if 'etiquetas_repetidas' in reglas:
+            for i in range(1, len(instrucciones)):
+                opcode, etiqueta, _ = instrucciones[i]
+                if opcode == NADA and instrucciones[i - 1][0] == NADA:
+                    primera = instrucciones[i - 1][1]
+                    unidas[etiqueta] = unidas.get(primera, primera)
+        redireccion = dict(unidas)
+        if 'cadenas_saltos' in reglas:
+            self._cadenas_saltos(instrucciones, redireccion)
+        if redireccion:
+            destino = {etiqueta: _destino_final(redireccion, etiqueta) for etiqueta in redireccion}
+            redirigidas = []
+            for opcode, op1, op2 in instrucciones:
+                if opcode in REFERENCIAS and op1 in destino:
+                    # Un salto a una etiqueta unida no cuenta como cadena
+                    if destino[op1] != _destino_final(unidas, op1):
+                        self._aplicar('cadenas_saltos')
+                        cambios += 1
+                    op1 = destino[op1]
+                redirigidas.append((opcode, op1, op2))
+            instrucciones = redirigidas
+
+        referencias = [0] * num_etiquetas
+        for opcode, op1, _ in instrucciones:
+            if opcode in REFERENCIAS:
+                referencias[op1] += 1
+
+        # Recorrido con la ventana: las reglas miran el final de salida
+        salida = []
+        inalcanzable = False
+        for instruccion in instrucciones:
+            opcode, op1, op2 = instruccion
+
+            if opcode == NADA:
+                if op1 in unidas:
+                    self._aplicar('etiquetas_repetidas', 1)
+                    cambios += 1
+                    continue
+                if referencias[op1] == 0 and 'etiquetas_sin_uso' in reglas:
+                    self._aplicar('etiquetas_sin_uso', 1)
+                    cambios += 1
+                    continue
+                inalcanzable = False
+                if 'salto_siguiente' in reglas and self._salto_siguiente(salida, op1, referencias):
+                    cambios += 1
+                salida.append(instruccion)
+                continue
+
+            if inalcanzable and 'inalcanzable' in reglas:
+                if opcode in REFERENCIAS:
+                    referencias[op1] -= 1
+                self._aplicar('inalcanzable', 1)
+                cambios += 1
+                continue
+
+            if salida:
+                anterior = salida[-1]
+                if opcode in NEUTRO and 'neutros' in reglas and anterior[0] == APCT and anterior[1] == NEUTRO[opcode]:
+                    salida.pop()
+                    self._aplicar('neutros', 2)
+                    cambios += 1
+                    continue
+                if opcode in INVOLUCIONES and 'dobles_negaciones' in reglas and anterior[0] == opcode:
+                    salida.pop()
+                    self._aplicar('dobles_negaciones', 2)
+                    cambios += 1
+                    continue
+                if opcode in ACUMULABLES and 'reservas' in reglas and anterior[0] == opcode:
+                    salida[-1] = (opcode, anterior[1] + op1, 0)
+                    self._aplicar('reservas', 1)
+                    cambios += 1
+                    continue
+
+            salida.append(instruccion)
+            if opcode in TERMINALES:
+                inalcanzable = True
+        return salida, cambios
+
+    def _cadenas_saltos(self, instrucciones, redireccion):
+        """
+        Agrega a redireccion las etiquetas cuya primera instrucción es un DSVS,
+        apuntando al destino final de la cadena.
+        """
+        siguiente = {}  # map: {etiqueta: destino del DSVS que la sigue}
+        for i, (opcode, etiqueta, _) in enumerate(instrucciones):
+            if opcode != NADA:
+                continue
+            j = i + 1
+            while j < len(instrucciones) and instrucciones[j][0] == NADA:
+                j += 1
+            if j < len(instrucciones) and instrucciones[j][0] == DSVS and instrucciones[j][1] != etiqueta:
+                siguiente[etiqueta] = instrucciones[j][1]
+
+        for etiqueta in siguiente:
+            if etiqueta in redireccion:
+                continue
+            # Seguir la cadena; un ciclo de saltos (bucle infinito) se deja como está
+            destino, vistas = siguiente[etiqueta], {etiqueta}
+            while destino in siguiente and destino not in vistas:
+                vistas.add(destino)
+                destino = siguiente[destino]
+            if destino in vistas:
+                continue
+            redireccion[etiqueta] = destino
+
+    def _salto_siguiente(self, salida, etiqueta, referencias):
+        """
+        Antes de agregar la NADA de etiqueta: si salida termina en un DSVS a
+        ella (o a una de las etiquetas que la preceden sin código en el
+        medio), ese salto sobra y se borra.
+        """
+        i = len(salida) - 1
+        etiquetas = {etiqueta}
+        while i >= 0 and salida[i][0] == NADA:
+            etiquetas.add(salida[i][1])
+            i -= 1
+        if i >= 0 and salida[i][0] == DSVS and salida[i][1] in etiquetas:
+            referencias[salida[i][1]] -= 1
+            del salida[i]
+            self._aplicar('salto_siguiente', 1)
+            return True
+        return False
+
+    # --- Resultado ---
+
+    def _armar(self, instrucciones, nombres):
+        """CodigoMEPA con las instrucciones, renumerando las etiquetas que quedaron definidas."""
+        codigo = CodigoMEPA()
+        nuevas = {}  # map: {etiqueta vieja: etiqueta nueva}
+        for opcode, op1, _ in instrucciones:
+            if opcode == NADA:
+                nuevas[op1] = codigo.etiqueta(nombres[op1])
+        for opcode, op1, op2 in instrucciones:
+            if opcode == NADA:
+                codigo.definir(nuevas[op1])
+            elif opcode in REFERENCIAS:
+                codigo.agregar(opcode, nuevas[op1])
+            else:
+                codigo.agregar(opcode, op1, op2)
+        return codigo
+
+    def reporte(self):
+        """Texto con las instrucciones ahorradas por cada regla."""
+        lineas = [f"Peephole: {self.instrucciones_antes} -> {self.instrucciones_despues} instructions "
+                  f"({self.instrucciones_antes - self.instrucciones_despues} saved, {self.pasadas} passes)"]
+        for regla in REGLAS:
+            if regla in self.reglas:
+                lineas.append(f"  {regla:20} {self.aplicaciones[regla]:6} applied  {self.ahorro[regla]:6} saved")
+        return "\n".join(lineas)
@@ -0,0 +1,19 @@
+program Anidadas;
+var r: integer;
+procedure externo(n: integer);
+var k: integer;
+    procedure interno(m: integer);
+    begin
+        k := k + m
+    end
+begin
+    k := 0;
+    interno(n);
+    interno(n);
+    r := k
+end
+
+begin
+    externo(3);
+    write(r)
+end.
@@ -0,0 +1,9 @@
+program Signos;
+var x, y: integer;
+begin
+    read(y);
+    x := +5;
+    y := +y + (+(x - 2));
+    x := -x + y;
+    write(x)
+end.
@@ -0,0 +1,189 @@
+"""
+Perfilador de ejecución de programas MEPA.
+
+PerfiladorMEPA es una MaquinaMEPA que, además de ejecutar, cuenta cuántas
+veces se ejecutó cada instrucción, los pasos de cada llamada y la
+profundidad máxima de la pila. Usa el ciclo de ejecución de MaquinaMEPA,
+que cuenta cuando se lo pide el perfilador: los dos ejecutan igual.
+
+Durante la ejecución sólo se cuenta por dirección; al terminar, Perfil
+agrupa las cuentas por opcode, por etiqueta y por subrutina. Cada subrutina
+va de la etiqueta de su ENPR hasta el RTPR que lo cierra (las subrutinas
+anidadas quedan adentro y se descuentan de las exclusivas); lo que no está
+en ninguna es el programa principal.
+
+Con el MapaFuente del código (ver mapa_fuente.py), reporte_lineas() muestra
+el fuente Pascal con las ejecuciones de cada línea.
+
+Uso: python3 perfilador_mepa.py <archivo.mepa> [archivo.json] (lee de la
+entrada estándar los enteros de read, escribe cada write en una línea y
+después el reporte; con archivo.json guarda además el perfil en JSON).
+"""
+import json
+import sys
+
+from codigo_mepa import Instruccion
+from mepa_vm import MaquinaMEPA, ProgramaMEPA, ErrorEjecucion, NADA, ENPR, RTPR, TAMANIO_PILA, valores_entrada
+
+PRINCIPAL = "(main)"  # Nombre del programa principal en el perfil
+
+
+def subrutinas(programa: ProgramaMEPA):
+    """
+    Subrutinas de programa: devuelve (nombres, entradas, propietario), con
+    nombres[0] el programa principal, entradas {dirección del ENPR: índice}
+    y propietario[i] el índice de la subrutina más interna que contiene la
+    instrucción i.
+    """
+    nombres = [PRINCIPAL]
+    entradas = {}
+    propietario = [0] * len(programa)
+    abiertas = [0]  # Pila de subrutinas en las que está la instrucción actual
+    etiqueta = None  # Primera etiqueta de las NADA que preceden a la instrucción
+    for i, opcode in enumerate(programa.opcodes):
+        if opcode == NADA:
+            if etiqueta is None:
+                etiqueta = programa.etiquetas.get(i)
+            propietario[i] = abiertas[-1]
+            continue
+        if opcode == ENPR:
+            entradas[i] = len(nombres)
+            abiertas.append(len(nombres))
+            nombres.append(etiqueta if etiqueta is not None else f"@{i}")
+            # Las NADA de la etiqueta son de la subrutina
+            j = i - 1
+            while j >= 0 and programa.opcodes[j] == NADA:
+                propietario[j] = abiertas[-1]
+                j -= 1
+        propietario[i] = abiertas[-1]
+        if opcode == RTPR and len(abiertas) > 1:
+            abiertas.pop()
+        etiqueta = None
+    return nombres, entradas, propietario
+
+
+class Perfil:
+    """
+    Resultado de una ejecución perfilada: cuentas[i] son las ejecuciones de
+    la instrucción i e inclusivas[i] los pasos de las llamadas a la
+    subrutina que entra en i (contando sus llamadas, sin contar dos veces
+    las recursivas).
+    """
+
+    def __init__(self, programa: ProgramaMEPA, cuentas, inclusivas, pila_maxima):
+        self.programa = programa
+        self.cuentas = cuentas
+        self.instrucciones = sum(cuentas)
+        self.pila_maxima = pila_maxima  # Palabras
+
+        self.opcodes = {}  # map: {nombre del opcode: ejecuciones}
+        for opcode, cuenta in zip(programa.opcodes, cuentas):
+            if cuenta:
+                nombre = Instruccion(opcode).name
+                self.opcodes[nombre] = self.opcodes.get(nombre, 0) + cuenta
+
+        # Veces que se pasó por cada etiqueta: ejecuciones de su primera instrucción
+        self.etiquetas = {}  # map: {nombre de la etiqueta: pasadas}
+        for direccion, nombre in sorted(programa.etiquetas.items()):
+            while direccion < len(cuentas) and programa.opcodes[direccion] == NADA:
+                direccion += 1
+            self.etiquetas[nombre] = cuentas[direccion] if direccion < len(cuentas) else 0
+
+        nombres, entradas, propietario = subrutinas(programa)
+        exclusivas = [0] * len(nombres)
+        for indice, cuenta in zip(propietario, cuentas):
+            exclusivas[indice] += cuenta
+        llamadas = [1] + [0] * (len(nombres) - 1)
+        totales = [self.instrucciones] + [0] * (len(nombres) - 1)
+        for direccion, indice in entradas.items():
+            llamadas[indice] = cuentas[direccion]
+            totales[indice] = inclusivas[direccion]
+        self.procedimientos = {  # map: {nombre: {calls, exclusive, inclusive}}
+            nombre: {"calls": llamadas[k], "exclusive": exclusivas[k], "inclusive": totales[k]}
+            for k, nombre in enumerate(nombres)
+        }
+
+    def reporte(self):
+        """Texto con las instrucciones ejecutadas por opcode y por subrutina."""
+        total = self.instrucciones or 1
+        lineas = [f"Profile: {self.instrucciones} instructions executed, "
+                  f"max stack depth {self.pila_maxima} words",
+                  "  opcode          executed      %"]
+        for nombre, cuenta in sorted(self.opcodes.items(), key=lambda par: -par[1]):
+            lineas.append(f"  {nombre:10} {cuenta:13} {100 * cuenta / total:6.1f}")
+        lineas.append("  procedure          calls     exclusive      %     inclusive      %")
+        for nombre, datos in sorted(self.procedimientos.items(), key=lambda par: -par[1]["exclusive"]):
+            lineas.append(f"  {nombre:14} {datos['calls']:9} {datos['exclusive']:13} "
+                          f"{100 * datos['exclusive'] / total:6.1f} {datos['inclusive']:13} "
+                          f"{100 * datos['inclusive'] / total:6.1f}")
+        return "\n".join(lineas)
+
+    def reporte_lineas(self, mapa, fuente):
+        """
+        Texto del fuente Pascal (fuente, el texto completo) con, por línea,
+        las veces que se ejecutó (su instrucción más ejecutada) y las
+        instrucciones que ejecutó en total.
+        """
+        por_linea = mapa.por_linea(self.cuentas)
+        lineas = [f"Line profile: {self.instrucciones} instructions executed",
+                  "      times  instructions  line"]
+        for numero, texto in enumerate(fuente.splitlines(), 1):
+            if numero in por_linea:
+                veces, instrucciones = por_linea[numero]
+                lineas.append(f"{veces:11} {instrucciones:13} {numero:5}  {texto}")
+            else:
+                lineas.append(f"{'':11} {'':13} {numero:5}  {texto}")
+        return "\n".join(lineas)
+
+    def a_json(self):
+        """Diccionario serializable con todo el perfil."""
+        return {
+            "instructions": self.instrucciones,
+            "max_stack_depth": self.pila_maxima,
+            "opcodes": self.opcodes,
+            "labels": self.etiquetas,
+            "procedures": self.procedimientos,
+            "counts": list(self.cuentas),
+        }
+
+    def guardar_json(self, archivo):
+        with open(archivo, "w") as f:
+            json.dump(self.a_json(), f, indent=1)
+
+
+class PerfiladorMEPA(MaquinaMEPA):
+    """
+    MaquinaMEPA que perfila: ejecutar() hace lo mismo que la de la máquina
+    y deja en self.perfil el Perfil de la ejecución (también si termina con
+    un ErrorEjecucion, con lo ejecutado hasta el error).
+    """
+
+    def __init__(self, tamanio_pila=TAMANIO_PILA):
+        super().__init__(tamanio_pila)
+        self.perfil = None
+
+    def ejecutar(self, programa: ProgramaMEPA, entrada=(), salida=None):
+        return self._ejecutar(programa, entrada, salida, self._perfilar)
+
+    def _perfilar(self, programa, cuentas, inclusivas, pila_maxima):
+        self.perfil = Perfil(programa, cuentas, inclusivas, pila_maxima)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3):
+        print("Usage: python3 perfilador_mepa.py <file.mepa> [profile.json]")
+        sys.exit(1)
+    with open(sys.argv[1]) as f:
+        programa = ProgramaMEPA.desde_texto(f.read())
+    perfilador = PerfiladorMEPA()
+    try:
+        perfilador.ejecutar(programa, valores_entrada(sys.stdin), sys.stdout)
+        error = None
+    except ErrorEjecucion as e:
+        error = e
+        print(e)
+    print(perfilador.perfil.reporte())
+    if len(sys.argv) == 3:
+        perfilador.perfil.guardar_json(sys.argv[2])
+    if error:
+        sys.exit(1)
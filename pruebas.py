@@ -0,0 +1,28 @@
+"""
+Ejecución de las pruebas de los test_*.py, que no corren bajo pytest (ast.py
+tapa al módulo ast de la biblioteca estándar). Cada uno termina con
+
+    if __name__ == "__main__":
+        correr(globals())
+
+y se corre con python3 test_x.py desde la raíz del repositorio.
+"""
+import sys
+
+
+def correr(globales):
+    """
+    Corre las funciones test_* de globales (los globals() del módulo de
+    pruebas), imprime las que fallan y cuántas pasaron, y termina el proceso
+    con código 1 si falló alguna.
+    """
+    pruebas = [(nombre, prueba) for nombre, prueba in globales.items() if nombre.startswith("test_")]
+    fallidas = 0
+    for nombre, prueba in pruebas:
+        try:
+            prueba()
+        except AssertionError as e:
+            fallidas += 1
+            print(f"FAIL {nombre}: {e}")
+    print(f"{len(pruebas) - fallidas}/{len(pruebas)} tests passed")
+    sys.exit(1 if fallidas else 0)
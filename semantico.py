@@ -1,4 +1,5 @@
 from tabla_simbolos import TablaSimbolos
+from codigo_mepa import ENTERO_MAXIMO
 
 class AnalizadorSemantico:
     def __init__(self):
@@ -12,14 +13,26 @@ class AnalizadorSemantico:
         if tipo not in ['integer', 'boolean']:
             raise SyntaxError(f"Semantic error at line {row}, column {col}: type '{tipo}' not valid")
             
-    def verificar_declaracion(self, row, col, nombre, categoria=None):
-        simbolo = self.tabla_simbolos.buscar(nombre)
+    def verificar_declaracion(self, row, col, nombre_id, categoria=None):
+        simbolo = self.tabla_simbolos.buscar(nombre_id)
         if simbolo is None:
-            raise SyntaxError(f"Semantic error at line {row}, column {col}: '{nombre}' not declared")
+            raise SyntaxError(f"Semantic error at line {row}, column {col}: '{self.tabla_simbolos.nombres[nombre_id]}' not declared")
         if categoria and simbolo['categoria'] != categoria:
-            raise SyntaxError(f"Semantic error at line {row}, column {col}: '{nombre}' is not a {categoria}")
+            raise SyntaxError(f"Semantic error at line {row}, column {col}: '{simbolo['nombre']}' is not a {categoria}")
         return simbolo
         
+    def valor_numero(self, row, col, lexema):
+        # El léxico acepta como dígito todo lo que acepta isdigit(), también los que int() no convierte ('²')
+        if not lexema.isdecimal():
+            raise SyntaxError(f"Semantic error at line {row}, column {col}: '{lexema}' is not a decimal integer constant")
+        return int(lexema)
+
+    def verificar_numero(self, row, col, valor):
+        # Una constante tiene que caber en un entero MEPA de 64 bits (el signo es un operador aparte)
+        if valor > ENTERO_MAXIMO:
+            raise SyntaxError(f"Semantic error at line {row}, column {col}: integer constant {valor} out of range (maximum {ENTERO_MAXIMO})")
+        return 'integer'
+
     def verificar_asignacion(self, row, col, variable, expresion_tipo):
         if variable['tipo'] != expresion_tipo:
             raise SyntaxError(f"Semantic error at line {row}, column {col}: can not assign '{expresion_tipo}' to variable '{variable['nombre']}' type '{variable['tipo']}'")
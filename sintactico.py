@@ -1,4 +1,5 @@
 from semantico import AnalizadorSemantico
+from lexico import TipoToken, NOMBRE_TOKEN, TIPO_POR_NOMBRE
 from ast import (
     NodoAsignacion, NodoBloque, NodoIf, NodoWhile,
     NodoLlamadaProcedimiento, NodoLlamadaFuncion,
@@ -8,638 +9,750 @@ from ast import (
     NodoDeclaracionProcedimiento, NodoDeclaracionFuncion
 )
 
-semantico = AnalizadorSemantico()
-ast_raiz = None
+# Tipos de token como constantes del módulo: comparar lookahead contra una global
+# es mucho más barato que acceder a TipoToken.X en cada paso del análisis
+(FIN, ERROR, IDENT, NUMERO, PROGRAM, VAR, PROCEDURE, FUNCTION, INTEGER, BOOLEAN, BEGIN, END,
+ IF, THEN, ELSE, WHILE, DO, READ, WRITE, OR, AND, NOT, TRUE, FALSE, DIV,
+ PUNTO_COMA, COMA, PUNTO, PARENTESIS_IZQ, PARENTESIS_DER, ASIGNACION, ASIGNACION_DE_TIPO,
+ MAS, MENOS, POR, IGUAL, DISTINTO, MENOR, MENOR_IGUAL, MAYOR, MAYOR_IGUAL) = TipoToken
+
+# Niveles de precedencia de los operadores binarios (a mayor número, mayor precedencia)
+NIVEL_RELACIONAL, NIVEL_ADITIVO, NIVEL_MULTIPLICATIVO = 1, 2, 3
+
+# Precedencia de cada tipo de token, indexada por TipoToken (0 si no es operador binario)
+PRECEDENCIA = [0] * len(TipoToken)
+for _tipo in (IGUAL, DISTINTO, MENOR, MAYOR, MENOR_IGUAL, MAYOR_IGUAL):
+    PRECEDENCIA[_tipo] = NIVEL_RELACIONAL
+for _tipo in (MAS, MENOS, OR):
+    PRECEDENCIA[_tipo] = NIVEL_ADITIVO
+for _tipo in (POR, DIV, AND):
+    PRECEDENCIA[_tipo] = NIVEL_MULTIPLICATIVO
+PRECEDENCIA = tuple(PRECEDENCIA)
+
+EXPRESIONES = ('precedencia', 'recursivo')
+
+class AnalizadorSintactico:
+    """
+    Analizador sintáctico descendente recursivo con análisis semántico integrado.
+    Cada instancia es dueña de su analizador léxico, del estado del lookahead y
+    de su AnalizadorSemantico (y por lo tanto de su tabla de símbolos), así que
+    varias compilaciones independientes pueden correr a la vez en distintos hilos.
+    """
+    def __init__(self, lexer, expresiones='precedencia'):
+        if expresiones not in EXPRESIONES:
+            raise ValueError(f"Unknown expression parser '{expresiones}', expected one of {EXPRESIONES}")
+        self.lexer = lexer
+        self.semantico = AnalizadorSemantico()
+        self.tokens = None   # BufferTokens con el archivo completo, consumido por índice
+        self.cursor = 0      # Índice del token actual (lookahead) en tokens
+        self.valor_actual = None  # Valor e id del lookahead al pedir los tokens de a uno
+        self.id_actual = -1
+        self.lookahead = None
+        self.lookahead_line = None
+        self.lookahead_col = None
+        self.ast_raiz = None
+        # Analizador de expresiones: por precedencia de operadores (iterativo) o la
+        # cadena recursiva original <expresion simple>/<resto ...> de la gramática
+        self.expresion = getattr(self, f"expresion_{expresiones}")
+
+    def analizar(self):
+        """
+        Tokenize the whole input, parse it and return the AST root. A
+        memory-mapped input is not tokenized up front: the parser pulls one
+        token at a time from next_token(), so no token buffer grows with the file.
+        """
+        if self.lexer.motor == 'mapeado':
+            self.avanzar = self._avanzar_flujo
+            self.valor_lookahead = self._valor_flujo
+            self.id_lookahead = self._id_flujo
+        else:
+            self.tokens = self.lexer.tokenize_all()
+        # La tabla de símbolos usa los ids de los identificadores internados por el léxico
+        self.semantico.tabla_simbolos.nombres = self.lexer.nombres
+        self.cursor = -1
+        self.avanzar()
+        self.ast_raiz = self.programa()
+        return self.ast_raiz
+
+    def avanzar(self):
+        """Move the cursor to the next token of the buffer and load it as lookahead."""
+        self.cursor += 1
+        self.lookahead = self.tokens.tipos[self.cursor]
+        self.lookahead_line = self.tokens.lineas[self.cursor]
+        self.lookahead_col = self.tokens.columnas[self.cursor]
+        if self.lookahead == ERROR:
+            raise self.tokens.error
+
+    def valor_lookahead(self):
+        """Return the value (lexeme) of the lookahead token."""
+        return self.tokens.valor(self.cursor)
+
+    def id_lookahead(self):
+        """Return the interned name id of the lookahead identifier."""
+        return self.tokens.ids[self.cursor]
+
+    def _avanzar_flujo(self):
+        """avanzar() pulling the next token from the lexer (a lexical error is raised here too)."""
+        self.cursor += 1
+        tipo, valor, self.lookahead_line, self.lookahead_col = self.lexer.next_token()
+        self.lookahead = TIPO_POR_NOMBRE[tipo]
+        self.valor_actual = valor
+        self.id_actual = self.lexer.nombres.interna(valor) if self.lookahead == IDENT else -1
+
+    def _valor_flujo(self):
+        return self.valor_actual
+
+    def _id_flujo(self):
+        return self.id_actual
+
+    def match(self, expected):
+        """Match the lookahead token with the expected terminal."""
+        if self.lookahead == expected:
+            self.avanzar()
+        else:
+            raise SyntaxError(
+                f"Syntax error at line {self.lookahead_line}, column {self.lookahead_col}: "
+                f"expected '{NOMBRE_TOKEN[expected]}', found '{NOMBRE_TOKEN[self.lookahead]}'"
+            )
 
-def inferir_tipo(nodo):
-    """Infiere el tipo de un nodo AST."""
-    if nodo is None:
-        return None
-    
-    # Si el nodo ya tiene un atributo tipo, usarlo
-    if hasattr(nodo, 'tipo'):
-        return nodo.tipo
-    
-    # Inferir según el tipo de nodo
-    if nodo.tipo_nodo == 'identificador':
-        # Buscar en tabla de símbolos
-        simbolo = semantico.tabla_simbolos.buscar(nodo.nombre)
-        if simbolo:
-            return simbolo['tipo']
-        return None
-    elif nodo.tipo_nodo == 'numero':
-        return 'integer'
-    elif nodo.tipo_nodo == 'booleano':
-        return 'boolean'
-    elif nodo.tipo_nodo == 'operacion_binaria':
-        # Inferir desde los operandos
-        tipo_izq = inferir_tipo(nodo.izquierda)
-        tipo_der = inferir_tipo(nodo.derecha)
-        if tipo_izq and tipo_der:
-            # Usar verificación semántica para obtener el tipo resultante
-            try:
-                return semantico.verificar_operacion_binaria(0, 0, nodo.operador, tipo_izq, tipo_der)
-            except:
-                return None
-    elif nodo.tipo_nodo == 'operacion_unaria':
-        tipo_op = inferir_tipo(nodo.operando)
-        if tipo_op:
-            try:
-                return semantico.verificar_operacion_unaria(0, 0, nodo.operador, tipo_op)
-            except:
-                return None
-    elif nodo.tipo_nodo == 'expresion':
-        return inferir_tipo(nodo.expresion)
-    elif nodo.tipo_nodo == 'llamada_funcion':
-        # El tipo ya debería estar en el nodo
-        if hasattr(nodo, 'tipo'):
-            return nodo.tipo
+    def programa(self):
+        """<programa> ::= program <identificador> ; <bloque> ."""
+        linea, columna = self.lookahead_line, self.lookahead_col
+        self.match(PROGRAM)
+        program_name = self.valor_lookahead()
+        program_id = self.id_lookahead()
+        self.match(IDENT)
+        self.semantico.tabla_simbolos.insertar(program_id, 'program', 'programa', self.lookahead_col, self.lookahead_line)
+        self.match(PUNTO_COMA)
+        declaraciones_sub, nodo_bloque_principal = self.bloque()
+        self.match(PUNTO)
+        return NodoPrograma(program_name, declaraciones_sub, nodo_bloque_principal, linea, columna)
+
+    def bloque(self):
+        """<bloque> ::= <parte declaraciones variables> <parte declaraciones subrutinas> <sentencia compuesta>
+           <bloque> ::= <parte declaraciones variables> <sentencia compuesta>
+           <bloque> ::= <parte declaraciones subrutinas> <sentencia compuesta>
+           <bloque> ::= <sentencia compuesta>"""
+        declaraciones_subrutinas = []
+
+        if self.lookahead == VAR:
+            self.parte_declaraciones_variables()
+            if self.lookahead in (PROCEDURE, FUNCTION):
+                declaraciones_subrutinas = self.parte_declaraciones_subrutinas() 
+        elif self.lookahead in (PROCEDURE, FUNCTION):
+            declaraciones_subrutinas = self.parte_declaraciones_subrutinas()
+
+        nodo_sentencia_compuesta = self.sentencia_compuesta()
+
+        return declaraciones_subrutinas, nodo_sentencia_compuesta
+
+    def parte_declaraciones_variables(self):
+        """<parte declaraciones variables> ::= var <declaracion de variables> <mas declaraciones>"""
+        self.match(VAR)
+        self.declaracion_de_variables()
+        self.mas_declaraciones()
+
+    def mas_declaraciones(self):
+        """<mas declaraciones> ::= ; <declaracion de variables> <mas declaraciones> | ;"""
+        self.match(PUNTO_COMA)
+        while self.lookahead == IDENT:
+            self.declaracion_de_variables()
+            self.match(PUNTO_COMA)
+
+    def declaracion_de_variables(self):
+        """<declaracion de variables> ::= <lista identificadores> : <tipo>"""
+        variables = self.lista_identificadores()
+        self.match(ASIGNACION_DE_TIPO)
+        tipo_var = self.tipo()
+
+        for var in variables:
+            self.semantico.tabla_simbolos.insertar(var, tipo_var, 'variable', self.lookahead_col, self.lookahead_line)
+
+    def lista_identificadores(self):
+        """<lista identificadores> ::= <identificador> <mas identificadores>"""
+        variables = [self.id_lookahead()]
+        self.match(IDENT)
+        variables.extend(self.mas_identificadores())
+        return variables
+
+    def mas_identificadores(self):
+        """<mas identificadores> ::= , <identificador> <mas identificadores> | λ"""
+        variables = []
+        while self.lookahead == COMA:
+            self.match(COMA)
+            variables.append(self.id_lookahead())
+            self.match(IDENT)
+        return variables
+
+    def tipo(self):
+        """<tipo> ::= integer | boolean"""
+        if self.lookahead in (INTEGER, BOOLEAN):
+            tipo_val = NOMBRE_TOKEN[self.lookahead]
+            self.avanzar()
+            return tipo_val
+        else:
+            raise SyntaxError(
+                f"Syntax error at line {self.lookahead_line}, column {self.lookahead_col}: "
+                "expected 'integer' or 'boolean'"
+            )
+
+    def parte_declaraciones_subrutinas(self):
+        """<parte declaraciones subrutinas> ::= <declaracion de subrutina> <mas subrutinas>"""
+        nodos = [self.declaracion_de_subrutina()]
+        nodos.extend(self.mas_subrutinas())
+        return nodos
+
+    def mas_subrutinas(self):
+        """<mas subrutinas> ::= ; <declaracion de subrutina> <mas subrutinas> | λ"""
+        nodos = []
+        while self.lookahead == PUNTO_COMA:
+            self.match(PUNTO_COMA)
+            nodos.append(self.declaracion_de_subrutina())
+        return nodos
+
+    def declaracion_de_subrutina(self):
+        """<declaracion de subrutina> ::= <declaracion de procedimiento> | <declaracion de funcion>"""
+        if self.lookahead == PROCEDURE:
+            return self.declaracion_de_procedimiento()
+        elif self.lookahead == FUNCTION:
+            return self.declaracion_de_funcion()
+        else:
+            raise SyntaxError(
+                f"Syntax error at line {self.lookahead_line}, column {self.lookahead_col}: "
+                "expected 'procedure' or 'function'"
+            )
+
+    def declaracion_de_procedimiento(self):
+        """<declaracion de procedimiento> ::= procedure <identificador> <parte parametros formales> ; <bloque>"""
+        linea, columna = self.lookahead_line, self.lookahead_col
+        self.match(PROCEDURE)
+        proc_name = self.valor_lookahead()
+        proc_id = self.id_lookahead()
+        self.match(IDENT)
+
+        # Entrar nuevo ámbito; la subrutina se declara en el ámbito que la contiene
+        ambito_padre = self.semantico.tabla_simbolos.ambito
+        ambito = self.semantico.tabla_simbolos.entrar_ambito(proc_name)
+        self.semantico.funcion_actual = proc_name
+
+        # Procesar parámetros
+        parametros = self.parte_parametros_formales()
+        self.semantico.tabla_simbolos.fijar_parametros()
+        self.semantico.tabla_simbolos.insertar(proc_id, 'void', 'procedimiento', self.lookahead_col, self.lookahead_line, ambito_padre, parametros, ambito)
+
+        self.match(PUNTO_COMA)
+
+        # bloque() ahora devuelve una tupla
+        declaraciones_internas, nodo_bloque_proc = self.bloque()
+
+        # Salir ámbito
+        self.semantico.tabla_simbolos.salir_ambito()
+        self.semantico.funcion_actual = None
+
+        # Crear y devolver el nuevo nodo AST
+        return NodoDeclaracionProcedimiento(proc_name, parametros, declaraciones_internas, nodo_bloque_proc, ambito, linea, columna)
+
+    def declaracion_de_funcion(self):
+        """<declaracion de funcion> ::= function <identificador> <parte parametros formales> : <tipo> ; <bloque>"""
+        linea, columna = self.lookahead_line, self.lookahead_col
+        self.match(FUNCTION)
+        func_name = self.valor_lookahead()
+        func_id = self.id_lookahead()
+        self.match(IDENT)
+
+        # Entrar nuevo ámbito; la subrutina se declara en el ámbito que la contiene
+        ambito_padre = self.semantico.tabla_simbolos.ambito
+        ambito = self.semantico.tabla_simbolos.entrar_ambito(func_name)
+        self.semantico.funcion_actual = func_name
+
+        # Procesar parámetros
+        parametros = self.parte_parametros_formales()
+        self.semantico.tabla_simbolos.fijar_parametros()
+        self.match(ASIGNACION_DE_TIPO)
+        return_type = self.tipo()
+        self.semantico.verificar_tipo(return_type, self.lookahead_col, self.lookahead_line)
+
+        # Store return type for verification
+        self.semantico.tipo_retorno_actual = return_type
+        self.semantico.retorno_encontrado = False  # Track if return assignment was found
+
+        self.semantico.tabla_simbolos.insertar(func_id, return_type, 'funcion', self.lookahead_col, self.lookahead_line, ambito_padre, parametros, ambito)
+
+        self.match(PUNTO_COMA)
+
+        declaraciones_internas, nodo_bloque_func = self.bloque()    
+
+        # Verify that return assignment was found
+        if not self.semantico.retorno_encontrado:
+            raise SyntaxError(f"Semantic error: function '{func_name}' must assign a value to its name for return")
+
+        # Salir ámbito
+        self.semantico.tabla_simbolos.salir_ambito()
+        self.semantico.funcion_actual = None
+        self.semantico.tipo_retorno_actual = None
+
+        return NodoDeclaracionFuncion(func_name, parametros, return_type, declaraciones_internas, nodo_bloque_func, ambito, linea, columna)
+
+    def parte_parametros_formales(self):
+        """<parte parametros formales> ::= ( <seccion de parametros formales> <mas secciones parametros> ) | λ"""
+        parametros = []
+        if self.lookahead == PARENTESIS_IZQ:
+            self.match(PARENTESIS_IZQ)
+            parametros.extend(self.seccion_de_parametros_formales())
+            parametros.extend(self.mas_secciones_parametros())
+            self.match(PARENTESIS_DER)
+        return parametros
+
+    def mas_secciones_parametros(self):
+        """<mas secciones parametros> ::= ; <seccion de parametros formales> <mas secciones parametros> | λ"""
+        parametros = []
+        while self.lookahead == PUNTO_COMA:
+            self.match(PUNTO_COMA)
+            parametros.extend(self.seccion_de_parametros_formales())
+        return parametros
+
+    def seccion_de_parametros_formales(self):
+        """<seccion de parametros formales> ::= <lista de identificadores> : <tipo>"""
+        variables = self.lista_identificadores()
+        self.match(ASIGNACION_DE_TIPO)
+        tipo_param = self.tipo()
+
+        parametros = []
+        for var in variables:
+            self.semantico.tabla_simbolos.insertar(var, tipo_param, 'variable', self.lookahead_col, self.lookahead_line)
+            parametros.append({'nombre': self.semantico.tabla_simbolos.nombres[var], 'tipo': tipo_param})
+
+        return parametros
+
+    def sentencia_compuesta(self):
+        """<sentencia compuesta> ::= begin <sentencia> <mas sentencias> end"""
+        linea, columna = self.lookahead_line, self.lookahead_col
+        self.match(BEGIN)
+        sentencias = [self.sentencia()]
+        sentencias.extend(self.mas_sentencias())
+        self.match(END)
+        return NodoBloque(sentencias, linea, columna)
+
+    def mas_sentencias(self):
+        """<mas sentencias> ::= ; <sentencia> <mas sentencias> | λ"""
+        sentencias = []
+        while self.lookahead == PUNTO_COMA:
+            self.match(PUNTO_COMA)
+            if self.lookahead == END:  # No hay más sentencias si encontramos 'end'
+                break
+            sentencias.append(self.sentencia())
+        return sentencias
+
+    def sentencia(self):
+        """<sentencia> ::= <asignacion> | <llamada a procedimiento> | <sentencia compuesta> | 
+                           <sentencia condicional> | <sentencia repetitiva> | <sentencia lectura> | 
+                           <sentencia escritura>"""
+        if self.lookahead == IDENT:
+            return self.sentencia_ident()
+        elif self.lookahead == BEGIN:
+            return self.sentencia_compuesta()
+        elif self.lookahead == IF:
+            return self.sentencia_condicional()
+        elif self.lookahead == WHILE:
+            return self.sentencia_repetitiva()
+        elif self.lookahead == READ:
+            return self.sentencia_lectura()
+        elif self.lookahead == WRITE:
+            return self.sentencia_escritura()
+        else:
+            raise SyntaxError(
+                f"Syntax error at line {self.lookahead_line}, column {self.lookahead_col}: "
+                f"invalid statement, found '{NOMBRE_TOKEN[self.lookahead]}'"
+            )
+
+    def sentencia_ident(self):
+        """<sentencia ident> ::= := <expresion> | <parte de parametros actuales>"""
+        linea, columna = self.lookahead_line, self.lookahead_col
+        ident_name = self.valor_lookahead()
+        ident_id = self.id_lookahead()
+        self.match(IDENT)
+
+        if self.lookahead == ASIGNACION:
+            # Function return assignment (e.g., f := expr inside function f)
+            if self.semantico.funcion_actual and ident_name == self.semantico.funcion_actual:
+                # Function return assignment
+                self.match(ASIGNACION)
+                simbolo_var = self.semantico.verificar_declaracion(self.lookahead_line, self.lookahead_col, ident_id, 'funcion')
+                simbolo_var['nombre_original_funcion'] = self.semantico.funcion_actual
+                nodo_expr = self.expresion()
+                expr_type = nodo_expr.tipo
+                self.semantico.verificar_retorno_funcion(self.lookahead_line, self.lookahead_col, expr_type)
+                nodo_ident = NodoIdentificador(ident_name, ident_id, simbolo_var, linea, columna)
+                nodo_ident.tipo = simbolo_var['tipo']
+                return NodoAsignacion(nodo_ident, nodo_expr, linea, columna)
+            else:
+                # Regular variable assignment
+                variable = self.semantico.verificar_declaracion(self.lookahead_line, self.lookahead_col, ident_id, 'variable')
+                self.match(ASIGNACION)
+                nodo_expr = self.expresion()
+                expr_type = nodo_expr.tipo
+                self.semantico.verificar_asignacion(
+                    self.lookahead_line, self.lookahead_col, variable, expr_type
+                )
+                nodo_ident = NodoIdentificador(ident_name, ident_id, variable, linea, columna)
+                nodo_ident.tipo = variable['tipo']
+                return NodoAsignacion(nodo_ident, nodo_expr, linea, columna)
+        else:
+            # Es una llamada a procedimiento/función
+            funcion = self.semantico.verificar_declaracion(self.lookahead_line, self.lookahead_col, ident_id)
+            if funcion['categoria'] not in ['procedimiento', 'funcion']:
+                raise SyntaxError(
+                    f"Semantic error at line {self.lookahead_line}, column {self.lookahead_col}: "
+                    f"'{ident_name}' is not a procedure or function"
+                )
+
+            # Get parameter nodes
+            nodos_parametros = self.parte_parametros_actuales()
+            parametros_tipos = [p.tipo for p in nodos_parametros]
+
+            if funcion['categoria'] == 'funcion':
+                self.semantico.verificar_llamada_funcion(
+                    self.lookahead_line, self.lookahead_col, funcion, parametros_tipos
+                )
+                nodo = NodoLlamadaFuncion(ident_name, nodos_parametros, ident_id, funcion, linea, columna)
+                nodo.tipo = funcion['tipo']
+                return nodo
+            else:
+                self.semantico.verificar_llamada_procedimiento(
+                    self.lookahead_line, self.lookahead_col, funcion, parametros_tipos
+                )
+                return NodoLlamadaProcedimiento(ident_name, nodos_parametros, ident_id, funcion, linea, columna)
+
+
+    def sentencia_condicional(self):
+        """<sentencia condicional> ::= if <expresion> then <sentencia> <parte else>"""
+        linea, columna = self.lookahead_line, self.lookahead_col
+        self.match(IF)
+        nodo_condicion = self.expresion()
+        expr_type = nodo_condicion.tipo
+        if expr_type != 'boolean':
+            raise SyntaxError(f"Semantic error at line {self.lookahead_line}, column {self.lookahead_col}: the 'if' condition must be boolean")
+        self.match(THEN)
+        nodo_cuerpo_true = self.sentencia()
+        nodo_cuerpo_false = self.parte_else()
+        return NodoIf(nodo_condicion, nodo_cuerpo_true, nodo_cuerpo_false, linea, columna)
+
+    def parte_else(self):
+        """<parte else> ::= else <sentencia> | λ"""
+        if self.lookahead == ELSE:
+            self.match(ELSE)
+            return self.sentencia()
         return None
-    
-    return None
 
-# Variables globales para almacenar información del token actual
-lexer = None
-lookahead = None
-lookahead_value = None
-lookahead_line = None
-lookahead_col = None
+    def sentencia_repetitiva(self):
+        """<sentencia repetitiva> ::= while <expresion> do <sentencia>"""
+        linea, columna = self.lookahead_line, self.lookahead_col
+        self.match(WHILE)
+        nodo_condicion = self.expresion()
+        expr_type = nodo_condicion.tipo
+        if expr_type != 'boolean':
+            raise SyntaxError(f"Semantic error at line {self.lookahead_line}, column {self.lookahead_col}: the 'while' condition must be boolean")
+        self.match(DO)
+        nodo_cuerpo = self.sentencia()
+        return NodoWhile(nodo_condicion, nodo_cuerpo, linea, columna)
+
+    def sentencia_lectura(self):
+        """<sentencia lectura> ::= read ( <identificador> )"""
+        linea, columna = self.lookahead_line, self.lookahead_col
+        self.match(READ)
+        self.match(PARENTESIS_IZQ)
+        linea_var, columna_var = self.lookahead_line, self.lookahead_col
+        var_name = self.valor_lookahead()
+        var_id = self.id_lookahead()
+        self.match(IDENT)
+        variable = self.semantico.verificar_declaracion(self.lookahead_line, self.lookahead_col, var_id, 'variable')
+        if variable['tipo'] != 'integer':
+            raise SyntaxError(f"Semantic error at line {self.lookahead_line}, column {self.lookahead_col}: only integer variables can be read, '{var_name}' is {variable['tipo']} type")
+        self.match(PARENTESIS_DER)
+        nodo_ident = NodoIdentificador(var_name, var_id, variable, linea_var, columna_var)
+        nodo_ident.tipo = variable['tipo']
+        return NodoRead(nodo_ident, linea, columna)
+
+    def sentencia_escritura(self):
+        """<sentencia escritura> ::= write ( <identificador> | <numero> )"""
+        linea, columna = self.lookahead_line, self.lookahead_col
+        self.match(WRITE)
+        self.match(PARENTESIS_IZQ)
+        linea_expr, columna_expr = self.lookahead_line, self.lookahead_col
+
+        if self.lookahead == IDENT:
+            var_name = self.valor_lookahead()
+            var_id = self.id_lookahead()
+            self.match(IDENT)
+            variable = self.semantico.verificar_declaracion(self.lookahead_line, self.lookahead_col, var_id, 'variable')
+            nodo_expr = NodoIdentificador(var_name, var_id, variable, linea_expr, columna_expr)
+            nodo_expr.tipo = variable['tipo']
+        elif self.lookahead == NUMERO:
+            num_value = self.valor_lookahead()
+            self.match(NUMERO)
+            nodo_expr = NodoNumero(self.semantico.valor_numero(linea_expr, columna_expr, num_value), linea_expr, columna_expr)
+            nodo_expr.tipo = self.semantico.verificar_numero(linea_expr, columna_expr, nodo_expr.valor)
+        else:
+            raise SyntaxError(f"Se esperaba identificador o número en línea {self.lookahead_line}, columna {self.lookahead_col}")
 
-def sintactico(lexer_instance):
-    """Initialize the global lexer and start parsing."""
-    global lexer, lookahead, lookahead_value, lookahead_line, lookahead_col, ast_raiz
-    lexer = lexer_instance
-    token_info = next_token()
-    lookahead, lookahead_value, lookahead_line, lookahead_col = token_info
-    ast_raiz = programa()
-    return ast_raiz
+        self.match(PARENTESIS_DER)
+        return NodoWrite(nodo_expr, linea, columna)
+
+    def parte_parametros_actuales(self):
+        """<parte parametros actuales> ::= ( <resto parametros actuales> | λ"""
+        if self.lookahead == PARENTESIS_IZQ:
+            self.match(PARENTESIS_IZQ)
+            return self.resto_parametros_actuales()
+        return []
 
-def next_token():
-    """Fetch the next token from the global lexer."""
-    global lexer
-    return lexer.next_token()
-
-def match(expected):
-    """Match the lookahead token with the expected terminal."""
-    global lookahead, lookahead_value, lookahead_line, lookahead_col
-    if lookahead == expected:
-        token_info = next_token()
-        lookahead, lookahead_value, lookahead_line, lookahead_col = token_info
-    else:
-        raise SyntaxError(
-            f"Syntax error at line {lookahead_line}, column {lookahead_col}: "
-            f"expected '{expected}', found '{lookahead}'"
-        )
-
-def programa():
-    """<programa> ::= program <identificador> ; <bloque> ."""
-    match('program')
-    program_name = lookahead_value
-    match('ident')
-    semantico.tabla_simbolos.insertar(program_name, 'program', 'programa', lookahead_col, lookahead_line)
-    match('punto_coma')
-    declaraciones_sub, nodo_bloque_principal = bloque()
-    match('punto')
-    return NodoPrograma(program_name, declaraciones_sub, nodo_bloque_principal)
-
-def bloque():
-    """<bloque> ::= <parte declaraciones variables> <parte declaraciones subrutinas> <sentencia compuesta>
-       <bloque> ::= <parte declaraciones variables> <sentencia compuesta>
-       <bloque> ::= <parte declaraciones subrutinas> <sentencia compuesta>
-       <bloque> ::= <sentencia compuesta>"""
-    declaraciones_subrutinas = []
-    
-    if lookahead == 'var':
-        parte_declaraciones_variables()
-        if lookahead in ['procedure', 'function']:
-            declaraciones_subrutinas = parte_declaraciones_subrutinas() 
-    elif lookahead in ['procedure', 'function']:
-        declaraciones_subrutinas = parte_declaraciones_subrutinas()
-    
-    nodo_sentencia_compuesta = sentencia_compuesta()
-    
-    return declaraciones_subrutinas, nodo_sentencia_compuesta
-
-def parte_declaraciones_variables():
-    """<parte declaraciones variables> ::= var <declaracion de variables> <mas declaraciones>"""
-    match('var')
-    declaracion_de_variables()
-    mas_declaraciones()
-
-def mas_declaraciones():
-    """<mas declaraciones> ::= ; <declaracion de variables> <mas declaraciones> | ;"""
-    match('punto_coma')
-    if lookahead == 'ident':
-        declaracion_de_variables()
-        mas_declaraciones()
-
-def declaracion_de_variables():
-    """<declaracion de variables> ::= <lista identificadores> : <tipo>"""
-    variables = lista_identificadores()
-    match('asignacion_de_tipo')
-    tipo_var = tipo()
-    
-    for var in variables:
-        semantico.tabla_simbolos.insertar(var, tipo_var, 'variable', lookahead_col, lookahead_line)
-
-def lista_identificadores():
-    """<lista identificadores> ::= <identificador> <mas identificadores>"""
-    variables = [lookahead_value]
-    match('ident')
-    variables.extend(mas_identificadores())
-    return variables
-
-def mas_identificadores():
-    """<mas identificadores> ::= , <identificador> <mas identificadores> | λ"""
-    variables = []
-    if lookahead == 'coma':
-        match('coma')
-        variables.append(lookahead_value)
-        match('ident')
-        variables.extend(mas_identificadores())
-    return variables
-
-def tipo():
-    """<tipo> ::= integer | boolean"""
-    if lookahead in ['integer', 'boolean']:
-        tipo_val = lookahead
-        match(lookahead)
-        return tipo_val
-    else:
-        raise SyntaxError(
-            f"Syntax error at line {lookahead_line}, column {lookahead_col}: "
-            "expected 'integer' or 'boolean'"
-        )
-
-def parte_declaraciones_subrutinas():
-    """<parte declaraciones subrutinas> ::= <declaracion de subrutina> <mas subrutinas>"""
-    nodos = [declaracion_de_subrutina()]
-    nodos.extend(mas_subrutinas())
-    return nodos
-
-def mas_subrutinas():
-    """<mas subrutinas> ::= ; <declaracion de subrutina> <mas subrutinas> | λ"""
-    nodos = []
-    if lookahead == 'punto_coma':
-        match('punto_coma')
-        nodos.append(declaracion_de_subrutina())
-        nodos.extend(mas_subrutinas())
-    return nodos
-
-def declaracion_de_subrutina():
-    """<declaracion de subrutina> ::= <declaracion de procedimiento> | <declaracion de funcion>"""
-    if lookahead == 'procedure':
-        return declaracion_de_procedimiento()
-    elif lookahead == 'function':
-        return declaracion_de_funcion()
-    else:
-        raise SyntaxError(
-            f"Syntax error at line {lookahead_line}, column {lookahead_col}: "
-            "expected 'procedure' or 'function'"
-        )
-
-def declaracion_de_procedimiento():
-    """<declaracion de procedimiento> ::= procedure <identificador> <parte parametros formales> ; <bloque>"""
-    match('procedure')
-    proc_name = lookahead_value
-    match('ident')
-    
-    # Entrar nuevo ámbito
-    semantico.tabla_simbolos.entrar_ambito(proc_name)
-    semantico.funcion_actual = proc_name
-    
-    # Procesar parámetros
-    parametros = parte_parametros_formales()
-    semantico.tabla_simbolos.insertar(proc_name, 'void', 'procedimiento', lookahead_col, lookahead_line, 'global', parametros)
-
-    match('punto_coma')
-    
-    # bloque() ahora devuelve una tupla
-    declaraciones_internas, nodo_bloque_proc = bloque()
-    
-    # Salir ámbito
-    semantico.tabla_simbolos.salir_ambito()
-    semantico.funcion_actual = None
-    
-    # Crear y devolver el nuevo nodo AST
-    return NodoDeclaracionProcedimiento(proc_name, parametros, declaraciones_internas, nodo_bloque_proc)
-
-def declaracion_de_funcion():
-    """<declaracion de funcion> ::= function <identificador> <parte parametros formales> : <tipo> ; <bloque>"""
-    match('function')
-    func_name = lookahead_value
-    match('ident')
-    
-    # Entrar nuevo ámbito
-    semantico.tabla_simbolos.entrar_ambito(func_name)
-    semantico.funcion_actual = func_name
-    
-    # Procesar parámetros
-    parametros = parte_parametros_formales()
-    match('asignacion_de_tipo')
-    return_type = tipo()
-    semantico.verificar_tipo(return_type, lookahead_col, lookahead_line)
-    
-    # Store return type for verification
-    semantico.tipo_retorno_actual = return_type
-    semantico.retorno_encontrado = False  # Track if return assignment was found
-    
-    semantico.tabla_simbolos.insertar(func_name, return_type, 'funcion', lookahead_col, lookahead_line, 'global', parametros)
-
-    match('punto_coma')
-
-    declaraciones_internas, nodo_bloque_func = bloque()    
-
-    # Verify that return assignment was found
-    if not semantico.retorno_encontrado:
-        raise SyntaxError(f"Semantic error: function '{func_name}' must assign a value to its name for return")
-    
-    # Salir ámbito
-    semantico.tabla_simbolos.salir_ambito()
-    semantico.funcion_actual = None
-    semantico.tipo_retorno_actual = None
-
-    return NodoDeclaracionFuncion(func_name, parametros, return_type, declaraciones_internas, nodo_bloque_func)
-
-def parte_parametros_formales():
-    """<parte parametros formales> ::= ( <seccion de parametros formales> <mas secciones parametros> ) | λ"""
-    parametros = []
-    if lookahead == 'parentesis_izq':
-        match('parentesis_izq')
-        parametros.extend(seccion_de_parametros_formales())
-        parametros.extend(mas_secciones_parametros())
-        match('parentesis_der')
-    return parametros
-
-def mas_secciones_parametros():
-    """<mas secciones parametros> ::= ; <seccion de parametros formales> <mas secciones parametros> | λ"""
-    parametros = []
-    while lookahead == 'punto_coma':
-        match('punto_coma')
-        parametros.extend(seccion_de_parametros_formales())
-    return parametros
-
-def seccion_de_parametros_formales():
-    """<seccion de parametros formales> ::= <lista de identificadores> : <tipo>"""
-    variables = lista_identificadores()
-    match('asignacion_de_tipo')
-    tipo_param = tipo()
-    
-    parametros = []
-    for var in variables:
-        semantico.tabla_simbolos.insertar(var, tipo_param, 'variable', lookahead_col, lookahead_line)
-        parametros.append({'nombre': var, 'tipo': tipo_param})
-    
-    return parametros
-
-def sentencia_compuesta():
-    """<sentencia compuesta> ::= begin <sentencia> <mas sentencias> end"""
-    match('begin')
-    sentencias = [sentencia()]
-    sentencias.extend(mas_sentencias())
-    match('end')
-    return NodoBloque(sentencias)
-
-def mas_sentencias():
-    """<mas sentencias> ::= ; <sentencia> <mas sentencias> | λ"""
-    sentencias = []
-    if lookahead == 'punto_coma':
-        match('punto_coma')
-        if lookahead != 'end':  # No hay más sentencias si encontramos 'end'
-            sentencias.append(sentencia())
-            sentencias.extend(mas_sentencias())
-    return sentencias
-
-def sentencia():
-    """<sentencia> ::= <asignacion> | <llamada a procedimiento> | <sentencia compuesta> | 
-                       <sentencia condicional> | <sentencia repetitiva> | <sentencia lectura> | 
-                       <sentencia escritura>"""
-    if lookahead == 'ident':
-        return sentencia_ident()
-    elif lookahead == 'begin':
-        return sentencia_compuesta()
-    elif lookahead == 'if':
-        return sentencia_condicional()
-    elif lookahead == 'while':
-        return sentencia_repetitiva()
-    elif lookahead == 'read':
-        return sentencia_lectura()
-    elif lookahead == 'write':
-        return sentencia_escritura()
-    else:
-        raise SyntaxError(
-            f"Syntax error at line {lookahead_line}, column {lookahead_col}: "
-            f"invalid statement, found '{lookahead}'"
-        )
-
-def sentencia_ident():
-    """<sentencia ident> ::= := <expresion> | <parte de parametros actuales>"""
-    ident_name = lookahead_value
-    match('ident')
-
-    if lookahead == 'asignacion':
-        # Function return assignment (e.g., f := expr inside function f)
-        if semantico.funcion_actual and ident_name == semantico.funcion_actual:
-            # Function return assignment
-            match('asignacion')
-            simbolo_var = semantico.verificar_declaracion(lookahead_line, lookahead_col, ident_name, 'funcion')
-            simbolo_var['nombre_original_funcion'] = semantico.funcion_actual
-            nodo_expr = expresion()
-            expr_type = getattr(nodo_expr, 'tipo', inferir_tipo(nodo_expr))
-            semantico.verificar_retorno_funcion(lookahead_line, lookahead_col, expr_type)
-            return NodoAsignacion(NodoIdentificador(ident_name), nodo_expr)
+    def resto_parametros_actuales(self):
+        """<resto parametros actuales> ::= ) | <lista de expresiones> )"""
+        if self.lookahead == PARENTESIS_DER:
+            self.match(PARENTESIS_DER)
+            return []
         else:
-            # Regular variable assignment
-            variable = semantico.verificar_declaracion(lookahead_line, lookahead_col, ident_name, 'variable')
-            match('asignacion')
-            nodo_expr = expresion()
-            expr_type = getattr(nodo_expr, 'tipo', inferir_tipo(nodo_expr))
-            semantico.verificar_asignacion(
-                lookahead_line, lookahead_col, variable, expr_type
+            nodos_parametros = self.lista_de_expresiones()
+            self.match(PARENTESIS_DER)
+            return nodos_parametros
+
+    def lista_de_expresiones(self):
+        """<lista de expresiones> ::= <expresion> <mas expresiones>"""
+        nodos = [self.expresion()]
+        nodos.extend(self.mas_expresiones())
+        return nodos
+
+    def mas_expresiones(self):
+        """<mas expresiones> ::= , <expresion> <mas expresiones> | λ"""
+        nodos = []
+        while self.lookahead == COMA:
+            self.match(COMA)
+            nodos.append(self.expresion())
+        return nodos
+
+    def expresion_precedencia(self, minima=NIVEL_RELACIONAL):
+        """
+        <expresion> por precedencia de operadores (precedence climbing). Las cadenas
+        de operadores de un mismo nivel se recorren con un ciclo y sólo se recursiona
+        al subir de nivel, así que la profundidad de llamadas no depende del largo de
+        la expresión. Construye el mismo AST y hace las mismas verificaciones que
+        expresion_recursivo.
+        """
+        semantico = self.semantico
+        if minima <= NIVEL_ADITIVO and self.lookahead in (MAS, MENOS):
+            # <signo> <termino>: el signo afecta a todo el primer término
+            linea, columna = self.lookahead_line, self.lookahead_col
+            op = self.signo()
+            nodo_term = self.expresion_precedencia(NIVEL_MULTIPLICATIVO)
+            tipo_term = nodo_term.tipo
+            tipo_final = semantico.verificar_operacion_unaria(self.lookahead_line, self.lookahead_col, op, tipo_term)
+            nodo = NodoOperacionUnaria(op, nodo_term, linea, columna)
+            nodo.tipo = tipo_final
+        else:
+            nodo = self.factor()
+
+        while True:
+            nivel = PRECEDENCIA[self.lookahead]
+            if nivel < minima:
+                return nodo
+            op = NOMBRE_TOKEN[self.lookahead]
+            linea, columna = self.lookahead_line, self.lookahead_col
+            self.avanzar()
+            # El operando derecho sólo toma operadores de mayor precedencia: asociatividad izquierda
+            nodo_der = self.expresion_precedencia(nivel + 1)
+            tipo_izq = nodo.tipo
+            tipo_der = nodo_der.tipo
+            tipo_resultado = semantico.verificar_operacion_binaria(self.lookahead_line, self.lookahead_col, op, tipo_izq, tipo_der)
+            nodo = NodoOperacionBinaria(nodo, op, nodo_der, linea, columna)
+            nodo.tipo = tipo_resultado
+            if nivel == NIVEL_RELACIONAL:
+                # <parte relacion> admite un único operador relacional
+                return nodo
+
+    def expresion_recursivo(self):
+        """<expresion> ::= <expresion simple> <parte relacion>"""
+        nodo_simple = self.expresion_simple()
+        return self.parte_relacion(nodo_simple)
+
+    def parte_relacion(self, nodo_izq):
+        """<parte relacion> ::= <relacion> <expresion simple> | λ"""
+        if self.lookahead in (IGUAL, DISTINTO, MENOR, MAYOR, MENOR_IGUAL, MAYOR_IGUAL):
+            linea, columna = self.lookahead_line, self.lookahead_col
+            op = self.relacion()
+            nodo_der = self.expresion_simple()
+            tipo_izq = nodo_izq.tipo
+            tipo_der = nodo_der.tipo
+            tipo_resultado = self.semantico.verificar_operacion_binaria(self.lookahead_line, self.lookahead_col, op, tipo_izq, tipo_der)
+            nodo_resultado = NodoOperacionBinaria(nodo_izq, op, nodo_der, linea, columna)
+            nodo_resultado.tipo = tipo_resultado
+            return nodo_resultado
+        return nodo_izq
+
+    def relacion(self):
+        """<relacion> ::= = | <> | < | > | <= | >="""
+        if self.lookahead in (IGUAL, DISTINTO, MENOR, MAYOR, MENOR_IGUAL, MAYOR_IGUAL):
+            op = NOMBRE_TOKEN[self.lookahead]
+            self.avanzar()
+            return op
+        else:
+            raise SyntaxError(
+                f"Syntax error at line {self.lookahead_line}, column {self.lookahead_col}: "
+                f"expected relational operator"
             )
-            return NodoAsignacion(NodoIdentificador(ident_name), nodo_expr)
-    else:
-        # Es una llamada a procedimiento/función
-        funcion = semantico.verificar_declaracion(lookahead_line, lookahead_col, ident_name)
-        if funcion['categoria'] not in ['procedimiento', 'funcion']:
+
+    def expresion_simple(self):
+        """<expresion simple> ::= <signo> <termino> <resto expresion simple> | <termino> <resto expresion simple>"""
+        if self.lookahead in (MAS, MENOS):
+            linea, columna = self.lookahead_line, self.lookahead_col
+            op = self.signo()
+            nodo_term = self.termino()
+            tipo_term = nodo_term.tipo
+            tipo_final = self.semantico.verificar_operacion_unaria(self.lookahead_line, self.lookahead_col, op, tipo_term)
+            nodo_unario = NodoOperacionUnaria(op, nodo_term, linea, columna)
+            nodo_unario.tipo = tipo_final
+            nodo_final = nodo_unario
+        else:
+            nodo_final = self.termino()
+
+        return self.resto_expresion_simple(nodo_final)
+
+    def signo(self):
+        """<signo> ::= + | -"""
+        if self.lookahead in (MAS, MENOS):
+            op = NOMBRE_TOKEN[self.lookahead]
+            self.avanzar()
+            return op
+        else:
             raise SyntaxError(
-                f"Semantic error at line {lookahead_line}, column {lookahead_col}: "
-                f"'{ident_name}' is not a procedure or function"
+                f"Syntax error at line {self.lookahead_line}, column {self.lookahead_col}: "
+                "expected '+' or '-'"
             )
 
-        # Get parameter nodes
-        nodos_parametros = parte_parametros_actuales()
-        parametros_tipos = [inferir_tipo(p) for p in nodos_parametros]
+    def resto_expresion_simple(self, nodo_actual):
+        """<resto expresion simple> ::= <op aditivo> <termino> <resto expresion simple> | λ"""
+        if self.lookahead in (MAS, MENOS, OR):
+            linea, columna = self.lookahead_line, self.lookahead_col
+            op = self.op_aditivo()
+            nodo_term = self.termino()
+            tipo_actual = nodo_actual.tipo
+            tipo_term = nodo_term.tipo
+            nuevo_tipo = self.semantico.verificar_operacion_binaria(self.lookahead_line, self.lookahead_col, op, tipo_actual, tipo_term)
+            nodo_binario = NodoOperacionBinaria(nodo_actual, op, nodo_term, linea, columna)
+            nodo_binario.tipo = nuevo_tipo
+            return self.resto_expresion_simple(nodo_binario)
+        return nodo_actual
+
+    def op_aditivo(self):
+        """<op aditivo> ::= + | - | or"""
+        if self.lookahead in (MAS, MENOS, OR):
+            op = NOMBRE_TOKEN[self.lookahead]
+            self.avanzar()
+            return op
+        else:
+            raise SyntaxError(
+                f"Syntax error at line {self.lookahead_line}, column {self.lookahead_col}: "
+                "expected additive operator"
+            )
 
-        if funcion['categoria'] == 'funcion':
-            semantico.verificar_llamada_funcion(
-                lookahead_line, lookahead_col, funcion, parametros_tipos
+    def termino(self):
+        """<termino> ::= <factor> <resto termino>"""
+        nodo_fact = self.factor()
+        return self.resto_termino(nodo_fact)
+
+    def resto_termino(self, nodo_actual):
+        """<resto termino> ::= <op multiplicativo> <factor> <resto termino> | λ"""
+        if self.lookahead in (POR, DIV, AND):
+            linea, columna = self.lookahead_line, self.lookahead_col
+            op = self.op_multiplicativo()
+            nodo_fact = self.factor()
+            tipo_actual = nodo_actual.tipo
+            tipo_fact = nodo_fact.tipo
+            nuevo_tipo = self.semantico.verificar_operacion_binaria(self.lookahead_line, self.lookahead_col, op, tipo_actual, tipo_fact)
+            nodo_binario = NodoOperacionBinaria(nodo_actual, op, nodo_fact, linea, columna)
+            nodo_binario.tipo = nuevo_tipo
+            return self.resto_termino(nodo_binario)
+        return nodo_actual
+
+    def op_multiplicativo(self):
+        """<op multiplicativo> ::= * | div | and"""
+        if self.lookahead in (POR, DIV, AND):
+            op = NOMBRE_TOKEN[self.lookahead]
+            self.avanzar()
+            return op
+        else:
+            raise SyntaxError(
+                f"Syntax error at line {self.lookahead_line}, column {self.lookahead_col}: "
+                "expected multiplicative operator"
             )
-            return NodoLlamadaFuncion(ident_name, nodos_parametros)
+
+    def factor(self):
+        """<factor> ::= <identificador> <factor identificador> | numero | ( <expresion> ) | not <factor> | true | false"""
+        linea, columna = self.lookahead_line, self.lookahead_col
+        if self.lookahead == IDENT:
+            ident_name = self.valor_lookahead()
+            ident_id = self.id_lookahead()
+            self.match(IDENT)
+            return self.factor_identificador(ident_name, ident_id, linea, columna)
+        elif self.lookahead == NUMERO:
+            num_value = self.valor_lookahead()
+            self.match(NUMERO)
+            nodo = NodoNumero(self.semantico.valor_numero(linea, columna, num_value), linea, columna)
+            nodo.tipo = self.semantico.verificar_numero(linea, columna, nodo.valor)
+            return nodo
+        elif self.lookahead == PARENTESIS_IZQ:
+            self.match(PARENTESIS_IZQ)
+            nodo_expr = self.expresion()
+            self.match(PARENTESIS_DER)
+            nodo = NodoExpresion(nodo_expr, linea, columna)
+            nodo.tipo = nodo_expr.tipo
+            return nodo
+        elif self.lookahead == NOT:
+            self.match(NOT)
+            nodo_fact = self.factor()
+            tipo_fact = nodo_fact.tipo
+            tipo_resultado = self.semantico.verificar_operacion_unaria(self.lookahead_line, self.lookahead_col, 'not', tipo_fact)
+            nodo_unario = NodoOperacionUnaria('not', nodo_fact, linea, columna)
+            nodo_unario.tipo = tipo_resultado
+            return nodo_unario
+        elif self.lookahead in (TRUE, FALSE):
+            valor = NOMBRE_TOKEN[self.lookahead]
+            self.avanzar()
+            nodo = NodoBooleano(valor, linea, columna)
+            nodo.tipo = 'boolean'
+            return nodo
         else:
-            semantico.verificar_llamada_procedimiento(
-                lookahead_line, lookahead_col, funcion, parametros_tipos
+            raise SyntaxError(
+                f"Syntax error at line {self.lookahead_line}, column {self.lookahead_col}: "
+                "invalid factor"
             )
-            return NodoLlamadaProcedimiento(ident_name, nodos_parametros)
-
-
-def sentencia_condicional():
-    """<sentencia condicional> ::= if <expresion> then <sentencia> <parte else>"""
-    match('if')
-    nodo_condicion = expresion()
-    expr_type = inferir_tipo(nodo_condicion)
-    if expr_type != 'boolean':
-        raise SyntaxError(f"Semantic error at line {lookahead_line}, column {lookahead_col}: the 'if' condition must be boolean")
-    match('then')
-    nodo_cuerpo_true = sentencia()
-    nodo_cuerpo_false = parte_else()
-    return NodoIf(nodo_condicion, nodo_cuerpo_true, nodo_cuerpo_false)
-
-def parte_else():
-    """<parte else> ::= else <sentencia> | λ"""
-    if lookahead == 'else':
-        match('else')
-        return sentencia()
-    return None
-
-def sentencia_repetitiva():
-    """<sentencia repetitiva> ::= while <expresion> do <sentencia>"""
-    match('while')
-    nodo_condicion = expresion()
-    expr_type = inferir_tipo(nodo_condicion)
-    if expr_type != 'boolean':
-        raise SyntaxError(f"Semantic error at line {lookahead_line}, column {lookahead_col}: the 'while' condition must be boolean")
-    match('do')
-    nodo_cuerpo = sentencia()
-    return NodoWhile(nodo_condicion, nodo_cuerpo)
-
-def sentencia_lectura():
-    """<sentencia lectura> ::= read ( <identificador> )"""
-    match('read')
-    match('parentesis_izq')
-    var_name = lookahead_value
-    match('ident')
-    variable = semantico.verificar_declaracion(lookahead_line, lookahead_col, var_name, 'variable')
-    if variable['tipo'] != 'integer':
-        raise SyntaxError(f"Semantic error at line {lookahead_line}, column {lookahead_col}: only integer variables can be read, '{var_name}' is {variable['tipo']} type")
-    match('parentesis_der')
-    return NodoRead(NodoIdentificador(var_name))
-
-def sentencia_escritura():
-    """<sentencia escritura> ::= write ( <identificador> | <numero> )"""
-    match('write')
-    match('parentesis_izq')
-
-    if lookahead == 'ident':
-        var_name = lookahead_value
-        match('ident')
-        semantico.verificar_declaracion(lookahead_line, lookahead_col, var_name, 'variable')
-        nodo_expr = NodoIdentificador(var_name)
-    elif lookahead == 'numero':
-        num_value = lookahead_value
-        match('numero')
-        nodo_expr = NodoNumero(int(num_value))
-    else:
-        raise SyntaxError(f"Se esperaba identificador o número en línea {lookahead_line}, columna {lookahead_col}")
-
-    match('parentesis_der')
-    return NodoWrite(nodo_expr)
-
-def parte_parametros_actuales():
-    """<parte parametros actuales> ::= ( <resto parametros actuales> | λ"""
-    if lookahead == 'parentesis_izq':
-        match('parentesis_izq')
-        return resto_parametros_actuales()
-    return []
-
-def resto_parametros_actuales():
-    """<resto parametros actuales> ::= ) | <lista de expresiones> )"""
-    if lookahead == 'parentesis_der':
-        match('parentesis_der')
-        return []
-    else:
-        nodos_parametros = lista_de_expresiones()
-        match('parentesis_der')
-        return nodos_parametros
-
-def lista_de_expresiones():
-    """<lista de expresiones> ::= <expresion> <mas expresiones>"""
-    nodos = [expresion()]
-    nodos.extend(mas_expresiones())
-    return nodos
-
-def mas_expresiones():
-    """<mas expresiones> ::= , <expresion> <mas expresiones> | λ"""
-    nodos = []
-    if lookahead == 'coma':
-        match('coma')
-        nodos.append(expresion())
-        nodos.extend(mas_expresiones())
-    return nodos
-
-def expresion():
-    """<expresion> ::= <expresion simple> <parte relacion>"""
-    nodo_simple = expresion_simple()
-    return parte_relacion(nodo_simple)
-
-def parte_relacion(nodo_izq):
-    """<parte relacion> ::= <relacion> <expresion simple> | λ"""
-    if lookahead in ['=', '<>', '<', '>', '<=', '>=']:
-        op = relacion()
-        nodo_der = expresion_simple()
-        tipo_izq = inferir_tipo(nodo_izq)
-        tipo_der = inferir_tipo(nodo_der)
-        tipo_resultado = semantico.verificar_operacion_binaria(lookahead_line, lookahead_col, op, tipo_izq, tipo_der)
-        nodo_resultado = NodoOperacionBinaria(nodo_izq, op, nodo_der)
-        nodo_resultado.tipo = tipo_resultado
-        return nodo_resultado
-    return nodo_izq
-
-def relacion():
-    """<relacion> ::= = | <> | < | > | <= | >="""
-    if lookahead in ['=', '<>', '<', '>', '<=', '>=']:
-        op = lookahead
-        match(lookahead)
-        return op
-    else:
-        raise SyntaxError(
-            f"Syntax error at line {lookahead_line}, column {lookahead_col}: "
-            f"expected relational operator"
-        )
-
-def expresion_simple():
-    """<expresion simple> ::= <signo> <termino> <resto expresion simple> | <termino> <resto expresion simple>"""
-    if lookahead in ['+', '-']:
-        op = signo()
-        nodo_term = termino()
-        tipo_term = inferir_tipo(nodo_term)
-        tipo_final = semantico.verificar_operacion_unaria(lookahead_line, lookahead_col, op, tipo_term)
-        nodo_unario = NodoOperacionUnaria(op, nodo_term)
-        nodo_unario.tipo = tipo_final
-        nodo_final = nodo_unario
-    else:
-        nodo_final = termino()
-        
-    return resto_expresion_simple(nodo_final)
-
-def signo():
-    """<signo> ::= + | -"""
-    if lookahead in ['+', '-']:
-        op = lookahead
-        match(lookahead)
-        return op
-    else:
-        raise SyntaxError(
-            f"Syntax error at line {lookahead_line}, column {lookahead_col}: "
-            "expected '+' or '-'"
-        )
-
-def resto_expresion_simple(nodo_actual):
-    """<resto expresion simple> ::= <op aditivo> <termino> <resto expresion simple> | λ"""
-    if lookahead in ['+', '-', 'or']:
-        op = op_aditivo()
-        nodo_term = termino()
-        tipo_actual = inferir_tipo(nodo_actual)
-        tipo_term = inferir_tipo(nodo_term)
-        nuevo_tipo = semantico.verificar_operacion_binaria(lookahead_line, lookahead_col, op, tipo_actual, tipo_term)
-        nodo_binario = NodoOperacionBinaria(nodo_actual, op, nodo_term)
-        nodo_binario.tipo = nuevo_tipo
-        return resto_expresion_simple(nodo_binario)
-    return nodo_actual
-
-def op_aditivo():
-    """<op aditivo> ::= + | - | or"""
-    if lookahead in ['+', '-', 'or']:
-        op = lookahead
-        match(lookahead)
-        return op
-    else:
-        raise SyntaxError(
-            f"Syntax error at line {lookahead_line}, column {lookahead_col}: "
-            "expected additive operator"
-        )
-
-def termino():
-    """<termino> ::= <factor> <resto termino>"""
-    nodo_fact = factor()
-    return resto_termino(nodo_fact)
-
-def resto_termino(nodo_actual):
-    """<resto termino> ::= <op multiplicativo> <factor> <resto termino> | λ"""
-    if lookahead in ['*', 'div', 'and']:
-        op = op_multiplicativo()
-        nodo_fact = factor()
-        tipo_actual = inferir_tipo(nodo_actual)
-        tipo_fact = inferir_tipo(nodo_fact)
-        nuevo_tipo = semantico.verificar_operacion_binaria(lookahead_line, lookahead_col, op, tipo_actual, tipo_fact)
-        nodo_binario = NodoOperacionBinaria(nodo_actual, op, nodo_fact)
-        nodo_binario.tipo = nuevo_tipo
-        return resto_termino(nodo_binario)
-    return nodo_actual
-
-def op_multiplicativo():
-    """<op multiplicativo> ::= * | div | and"""
-    if lookahead in ['*', 'div', 'and']:
-        op = lookahead
-        match(lookahead)
-        return op
-    else:
-        raise SyntaxError(
-            f"Syntax error at line {lookahead_line}, column {lookahead_col}: "
-            "expected multiplicative operator"
-        )
-
-def factor():
-    """<factor> ::= <identificador> <factor identificador> | numero | ( <expresion> ) | not <factor> | true | false"""
-    if lookahead == 'ident':
-        ident_name = lookahead_value
-        match('ident')
-        return factor_identificador(ident_name)
-    elif lookahead == 'numero':
-        num_value = lookahead_value
-        match('numero')
-        nodo = NodoNumero(int(num_value))
-        nodo.tipo = 'integer'
-        return nodo
-    elif lookahead == 'parentesis_izq':
-        match('parentesis_izq')
-        nodo_expr = expresion()
-        match('parentesis_der')
-        return NodoExpresion(nodo_expr)
-    elif lookahead == 'not':
-        match('not')
-        nodo_fact = factor()
-        tipo_fact = inferir_tipo(nodo_fact)
-        tipo_resultado = semantico.verificar_operacion_unaria(lookahead_line, lookahead_col, 'not', tipo_fact)
-        nodo_unario = NodoOperacionUnaria('not', nodo_fact)
-        nodo_unario.tipo = tipo_resultado
-        return nodo_unario
-    elif lookahead in ['true', 'false']:
-        valor = lookahead
-        match(lookahead)
-        nodo = NodoBooleano(valor)
-        nodo.tipo = 'boolean'
-        return nodo
-    else:
-        raise SyntaxError(
-            f"Syntax error at line {lookahead_line}, column {lookahead_col}: "
-            "invalid factor"
-        )
-
-def factor_identificador(ident_name):
-    """<factor identificador> ::= <parte parametros actuales> | λ"""
-    if lookahead == 'parentesis_izq':
-        # Es una llamada a función
-        funcion = semantico.verificar_declaracion(lookahead_line, lookahead_col, ident_name, 'funcion')
-        nodos_parametros = parte_parametros_actuales()
-        parametros_tipos = [inferir_tipo(p) for p in nodos_parametros]
-        tipo_resultado = semantico.verificar_llamada_funcion(lookahead_line, lookahead_col, funcion, parametros_tipos)
-        nodo = NodoLlamadaFuncion(ident_name, nodos_parametros)
-        nodo.tipo = tipo_resultado
-        return nodo
-    else:
-        # Es una variable
-        variable = semantico.verificar_declaracion(lookahead_line, lookahead_col, ident_name, 'variable')
-        nodo = NodoIdentificador(ident_name)
-        nodo.tipo = variable['tipo']
-        return nodo
\ No newline at end of file
+
+    def factor_identificador(self, ident_name, ident_id, linea=None, columna=None):
+        """<factor identificador> ::= <parte parametros actuales> | λ"""
+        if self.lookahead == PARENTESIS_IZQ:
+            # Es una llamada a función
+            funcion = self.semantico.verificar_declaracion(self.lookahead_line, self.lookahead_col, ident_id, 'funcion')
+            nodos_parametros = self.parte_parametros_actuales()
+            parametros_tipos = [p.tipo for p in nodos_parametros]
+            tipo_resultado = self.semantico.verificar_llamada_funcion(self.lookahead_line, self.lookahead_col, funcion, parametros_tipos)
+            nodo = NodoLlamadaFuncion(ident_name, nodos_parametros, ident_id, funcion, linea, columna)
+            nodo.tipo = tipo_resultado
+            return nodo
+        else:
+            # Es una variable
+            variable = self.semantico.verificar_declaracion(self.lookahead_line, self.lookahead_col, ident_id, 'variable')
+            nodo = NodoIdentificador(ident_name, ident_id, variable, linea, columna)
+            nodo.tipo = variable['tipo']
+            return nodo
+
+
+# Analizador semántico y AST de la última llamada a sintactico(), para el código
+# que todavía los lee como globales del módulo
+semantico = None
+ast_raiz = None
+
+def sintactico(lexer_instance):
+    """Parse with a fresh AnalizadorSintactico (compatibility wrapper)."""
+    global semantico, ast_raiz
+    parser = AnalizadorSintactico(lexer_instance)
+    semantico = parser.semantico
+    ast_raiz = parser.analizar()
+    return ast_raiz
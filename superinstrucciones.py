@@ -0,0 +1,137 @@
+"""
+Dialecto MEPA extendido con superinstrucciones.
+
+En los bucles del código generado dominan unas pocas secuencias cortas; cada
+superinstrucción hace en un solo despacho de la máquina lo mismo que la
+secuencia estándar que reemplaza:
+
+    INCR n, o, c                 APVL n, o; APCT c; SUMA; ALVL n, o
+                                 (con SUST, c negativa)
+    DCVV CMxx, n1, o1, n2, o2, L APVL n1, o1; APVL n2, o2; CMxx; DSVF L
+    DCVC CMxx, n, o, c, L        APVL n, o; APCT c; CMxx; DSVF L
+
+Cada secuencia deja la pila como la encontró, así que reemplazarla no depende
+del código que la rodea; nunca se fusiona a través de una etiqueta (su NADA
+está en el medio), así que ningún salto cae dentro de una superinstrucción.
+
+El dialecto sólo lo ejecuta la máquina de mepa_vm: CodigoFusionado es el
+CodigoMEPA en el que GeneradorMEPA(superinstrucciones=True) emite, fusionar()
+aplica lo mismo a un código ya generado (ej: después del optimizador de
+mirilla) y bajar() lo vuelve a MEPA estándar para otras máquinas.
+
+Uso: python3 superinstrucciones.py <archivo.mepa> (escribe en la salida
+estándar el código bajado a MEPA estándar).
+"""
+import sys
+
+from codigo_mepa import CodigoMEPA, Instruccion, OPERANDOS, SUPEROPERANDOS
+
+(NADA, INPP, PARA, RMEM, LMEM, APCT, APVL, ALVL, SUMA, SUST, MULT, DIVI, UMEN,
+ CONJ, DISJ, NEGA, CMME, CMMA, CMIG, CMDG, CMNI, CMYI, DSVS, DSVF, LEER, IMPR,
+ LLPR, ENPR, RTPR, INCR, DCVV, DCVC) = Instruccion
+
+SUPERINSTRUCCIONES = (INCR, DCVV, DCVC)
+COMPARACIONES = (CMME, CMMA, CMIG, CMDG, CMNI, CMYI)
+
+
+class CodigoFusionado(CodigoMEPA):
+    """
+    CodigoMEPA que fusiona las secuencias de superinstrucciones a medida que
+    se agregan: al llegar el ALVL o el DSVF que cierra una, reemplaza las tres
+    instrucciones anteriores.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.fusionadas = dict.fromkeys(SUPERINSTRUCCIONES, 0)  # map: {superinstrucción: veces armada}
+
+    def agregar(self, opcode, op1=0, op2=0):
+        if (opcode == ALVL or opcode == DSVF) and len(self.opcodes) >= 3 and self._fusionar(opcode, op1, op2):
+            return
+        super().agregar(opcode, op1, op2)
+
+    def _fusionar(self, opcode, op1, op2):
+        """Si las tres últimas instrucciones y esta forman una secuencia, la reemplaza."""
+        primera, segunda, tercera = self.opcodes[-3:]
+        a1, a2 = self.op1[-3], self.op1[-2]  # Operandos de la primera y la segunda
+        b1, b2 = self.op2[-3], self.op2[-2]
+        if opcode == ALVL:
+            # x := x + c, x := x - c, x := c + x
+            if primera == APVL and segunda == APCT and (tercera == SUMA or tercera == SUST) and (a1, b1) == (op1, op2):
+                constante = a2 if tercera == SUMA else -a2
+            elif primera == APCT and segunda == APVL and tercera == SUMA and (a2, b2) == (op1, op2):
+                constante = a1
+            else:
+                return False
+            self._reemplazar(INCR, op1, op2, constante)
+            return True
+        if primera != APVL or tercera not in COMPARACIONES:
+            return False
+        if segunda == APVL:
+            self._reemplazar(DCVV, tercera, a1, b1, a2, b2, op1)
+        elif segunda == APCT:
+            self._reemplazar(DCVC, tercera, a1, b1, a2, op1)
+        else:
+            return False
+        return True
+
+    def _reemplazar(self, superinstruccion, *operandos):
+        del self.opcodes[-3:]
+        del self.op1[-3:]
+        del self.op2[-3:]
+        self.agregar_superinstruccion(superinstruccion, *operandos)
+        self.fusionadas[superinstruccion] += 1
+
+    def reporte(self):
+        return "Superinstructions: " + ", ".join(f"{Instruccion(opcode).name} {veces}"
+                                                 for opcode, veces in self.fusionadas.items())
+
+
+def _copiar(codigo, destino, expandir):
+    """Pasa las instrucciones de codigo a destino (con las mismas etiquetas), expandiendo o no las superinstrucciones."""
+    for nombre in codigo.etiquetas:
+        destino.etiqueta(nombre)
+    for opcode, op1, op2 in zip(codigo.opcodes, codigo.op1, codigo.op2):
+        if opcode == NADA:
+            destino.definir(op1)
+        elif OPERANDOS[opcode] != SUPEROPERANDOS:
+            destino.agregar(opcode, op1, op2)
+        elif expandir:
+            for instruccion in expandir(opcode, codigo.superoperandos[op1]):
+                destino.agregar(*instruccion)
+        else:
+            destino.agregar_superinstruccion(opcode, *codigo.superoperandos[op1])
+    return destino
+
+
+def secuencia(opcode, operandos):
+    """Instrucciones (opcode, op1, op2) de MEPA estándar equivalentes a una superinstrucción."""
+    if opcode == INCR:
+        nivel, offset, constante = operandos
+        operacion = (APCT, constante), (SUMA,)
+        if constante < 0:
+            operacion = (APCT, -constante), (SUST,)
+        return (APVL, nivel, offset), *operacion, (ALVL, nivel, offset)
+    if opcode == DCVV:
+        comparacion, nivel1, offset1, nivel2, offset2, etiqueta = operandos
+        return (APVL, nivel1, offset1), (APVL, nivel2, offset2), (comparacion,), (DSVF, etiqueta)
+    comparacion, nivel, offset, constante, etiqueta = operandos
+    return (APVL, nivel, offset), (APCT, constante), (comparacion,), (DSVF, etiqueta)
+
+
+def fusionar(codigo: CodigoMEPA) -> CodigoFusionado:
+    """Código en el dialecto extendido equivalente a codigo."""
+    return _copiar(codigo, CodigoFusionado(), None)
+
+
+def bajar(codigo: CodigoMEPA) -> CodigoMEPA:
+    """Código en MEPA estándar equivalente a codigo (sin superinstrucciones)."""
+    return _copiar(codigo, CodigoMEPA(), secuencia)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python3 superinstrucciones.py <file.mepa>")
+        sys.exit(1)
+    with open(sys.argv[1]) as f:
+        print(bajar(CodigoMEPA.desde_texto(f.read())).texto())
@@ -1,54 +1,99 @@
+from lexico import TablaNombres
+
+class Ambito:
+    """Ámbito léxico: sus símbolos (por id de nombre) y un enlace al ámbito que lo contiene."""
+    __slots__ = ('nombre', 'id', 'padre', 'nivel', 'simbolos', 'num_locales', 'num_params')
+
+    def __init__(self, nombre, id_ambito, padre=None):
+        self.nombre = nombre
+        self.id = id_ambito
+        self.padre = padre
+        self.nivel = padre.nivel + 1 if padre is not None else 0
+        self.simbolos = {}  # map: {id_nombre: simbolo}
+        self.num_locales = 0 # Variables locales (offsets MEPA 0..n-1)
+        self.num_params = 0  # Parámetros formales (offsets MEPA negativos)
+
+    def __repr__(self):
+        return f"Ambito({self.nombre!r}, nivel={self.nivel})"
+
+
 class TablaSimbolos:
-    def __init__(self):
-        self.tabla = {}
-        self.ambito_actual = "global"
-        self.ambitos = ["global"]
-        
-    def insertar(self, nombre, tipo, categoria, column, row, ambito=None, parametros=None):
+    def __init__(self, nombres=None):
+        # Identificadores internados por el analizador léxico: cada ámbito
+        # guarda sus símbolos por id de nombre, sin armar strings por búsqueda
+        self.nombres = nombres if nombres is not None else TablaNombres()
+        self.global_ = Ambito("global", 0)
+        self.ambito = self.global_         # Ámbito abierto actualmente
+        self.todos_ambitos = [self.global_] # map: [id_ambito] -> Ambito
+
+    @property
+    def ambito_actual(self):
+        return self.ambito.nombre
+
+    def insertar(self, nombre_id, tipo, categoria, column, row, ambito=None, parametros=None, ambito_interno=None):
         if ambito is None:
-            ambito = self.ambito_actual
+            ambito = self.ambito
 
-        clave = f"{ambito}.{nombre}" if ambito != "global" else nombre
+        nombre = self.nombres[nombre_id]
 
-        if clave in self.tabla:
-            raise SyntaxError(f"Semantic error at line {row}, column {column}: '{nombre}' it already declared in '{ambito}' (col {column}, row {row})")
-            
-        self.tabla[clave] = {
+        if nombre_id in ambito.simbolos:
+            raise SyntaxError(f"Semantic error at line {row}, column {column}: '{nombre}' it already declared in '{ambito.nombre}' (col {column}, row {row})")
+
+        # Dirección MEPA (nivel léxico, offset), fija desde la declaración
+        if categoria == 'variable':
+            nivel, offset = ambito.nivel, ambito.num_locales
+            ambito.num_locales += 1
+        elif categoria == 'funcion':
+            # Slot del valor de retorno, reservado por el llamador: -(n+3)
+            nivel, offset = ambito_interno.nivel, -(ambito_interno.num_params + 3)
+        else:
+            nivel = offset = None
+
+        simbolo = ambito.simbolos[nombre_id] = {
             'nombre': nombre,               # Nombre del símbolo: ej 'x', 'miFuncion'
+            'id': nombre_id,                # Id del nombre en la tabla de nombres
+            'clave': (ambito.id, nombre_id),# Clave única (id_ambito, id_nombre)
             'tipo': tipo,                   # Tipo del símbolo (integer, boolean, etc.)
             'categoria': categoria,         # Categoría (variable, funcion, procedimiento)
-            'ambito': ambito,               # Ámbito (global, local, etc.)
+            'ambito': ambito,               # Ámbito donde se declaró
+            'nivel': nivel,                 # MEPA: nivel léxico
+            'offset': offset,               # MEPA: desplazamiento en el registro de activación
             'parametros': parametros or [], # Paraámetros si es función o procedimiento: ej p(a: integer) { 'nombre': 'a', 'tipo': 'integer' }
-            'nombre_original_funcion': None # MEPA: para identificar la asignación de retorno
+            'nombre_original_funcion': None,# MEPA: para identificar la asignación de retorno
+            'ambito_interno': ambito_interno # Ámbito propio si es función o procedimiento
         }
-        
-    def buscar(self, nombre, ambito=None):
+        return simbolo
+
+    def fijar_parametros(self):
+        """
+        Convierte las variables declaradas hasta ahora en el ámbito actual (sus
+        parámetros formales) a offsets de parámetro: -(n+3-i) para el i-ésimo.
+        """
+        ambito = self.ambito
+        num_params = ambito.num_locales
+        for i, simbolo in enumerate(ambito.simbolos.values()):
+            simbolo['offset'] = -(num_params + 3 - (i + 1))
+        ambito.num_params = num_params
+        ambito.num_locales = 0
+
+    def buscar(self, nombre_id, ambito=None):
+        # Recorre la cadena de ámbitos desde el indicado (o el actual) hacia
+        # afuera: el costo depende sólo de la profundidad de anidamiento
         if ambito is None:
-            ambito = self.ambito_actual
-            
-        # Buscar en el ámbito actual primero
-        clave = f"{ambito}.{nombre}"
-        if clave in self.tabla:
-            return self.tabla[clave]
-            
-        # Buscar en ámbitos padres
-        ambitos_padres = self.ambitos[:self.ambitos.index(ambito) + 1]
-        for ambito_padre in reversed(ambitos_padres):
-            clave_padre = f"{ambito_padre}.{nombre}" if ambito_padre != "global" else nombre
-            if clave_padre in self.tabla:
-                return self.tabla[clave_padre]
-                
-        # Buscar en global como último recurso
-        if nombre in self.tabla and self.tabla[nombre]['ambito'] == 'global':
-            return self.tabla[nombre]
-            
+            ambito = self.ambito
+        while ambito is not None:
+            simbolo = ambito.simbolos.get(nombre_id)
+            if simbolo is not None:
+                return simbolo
+            ambito = ambito.padre
         return None
-        
+
     def entrar_ambito(self, nombre):
-        self.ambito_actual = nombre
-        self.ambitos.append(nombre)
-        
+        ambito = Ambito(nombre, len(self.todos_ambitos), self.ambito)
+        self.todos_ambitos.append(ambito)
+        self.ambito = ambito
+        return ambito
+
     def salir_ambito(self):
-        if len(self.ambitos) > 1:
-            self.ambitos.pop()
-            self.ambito_actual = self.ambitos[-1]
\ No newline at end of file
+        if self.ambito.padre is not None:
+            self.ambito = self.ambito.padre
@@ -0,0 +1,351 @@
+"""
+Prueba diferencial de los motores de ejecución y las opciones de compilación.
+
+Cada programa se compila con todas las combinaciones de -O, --cortocircuito y
+--superinstrucciones (como main.py) y cada compilación se ejecuta en la
+máquina virtual MEPA, bajada a MEPA estándar (bajar()) y traducida a Python
+(GeneradorPython): todas tienen que escribir lo mismo, y terminar con el mismo
+error si lo hay, que el código MEPA sin optimizar con el mismo cortocircuito
+(que cambia el resultado si el operando que no evalúa llama a funciones con
+efectos).
+
+Los programas son los de pascal_test que compilan, y un caso chico por cada
+regla de mirilla y por cada superinstrucción que además verifica que la regla
+o la fusión se aplica.
+
+Uso: python3 test_diferencial.py (desde la raíz del repositorio: ast.py tapa
+al módulo ast de la biblioteca estándar, así que no corre bajo pytest).
+"""
+import glob
+import io
+import itertools
+import os
+import tempfile
+
+from lexico import AnalizadorLexico
+from sintactico import AnalizadorSintactico
+from generador_mepa import GeneradorMEPA
+from generador_python import GeneradorPython
+from mepa_vm import ErrorEjecucion, ejecutar
+from optimizador_ast import PlegadorConstantes, EliminadorCodigoMuerto, EliminadorNoUsados
+from optimizador_mepa import OptimizadorMirilla, REGLAS
+from superinstrucciones import SUPERINSTRUCCIONES, fusionar, bajar
+from codigo_mepa import Instruccion, ENTERO_MINIMO
+from pruebas import correr
+
+ENTRADA = [5, 3, 8, 1, 0, 2, 9, 4]  # Valores de read
+
+# (optimizar, cortocircuito, superinstrucciones)
+OPCIONES = tuple(itertools.product((False, True), repeat=3))
+
+
+def analizar(archivo):
+    """AST y tabla de símbolos de un fuente Pascal."""
+    analizador = AnalizadorLexico()
+    analizador.cargar_archivo(archivo)
+    parser = AnalizadorSintactico(analizador)
+    return parser.analizar(), parser.semantico.tabla_simbolos
+
+
+def compilar(archivo, optimizar, cortocircuito, superinstrucciones):
+    """Código MEPA y programa Python de archivo, compilado como lo hace main.py con esas opciones."""
+    raiz, tabla = analizar(archivo)
+    if optimizar:
+        PlegadorConstantes().plegar(raiz)
+        EliminadorCodigoMuerto().podar(raiz)
+        EliminadorNoUsados().eliminar(raiz, tabla)
+    generador = GeneradorMEPA(tabla, cortocircuito=cortocircuito,
+                              superinstrucciones=superinstrucciones and not optimizar)
+    generador.generar(raiz)
+    codigo = generador.codigo
+    if optimizar:
+        codigo = OptimizadorMirilla().optimizar(codigo)
+        if superinstrucciones:
+            codigo = fusionar(codigo)
+    generador_python = GeneradorPython(tabla, cortocircuito=cortocircuito)
+    generador_python.generar(raiz)
+    return codigo, generador_python.compilar()
+
+
+def resultado(ejecucion):
+    """Lo que escribe ejecucion(entrada, salida) y el mensaje del error de ejecución, si lo hay."""
+    salida = io.StringIO()
+    try:
+        ejecucion(ENTRADA, salida)
+    except ErrorEjecucion as e:
+        # Sin el prefijo, que según el motor da la instrucción o la línea
+        return salida.getvalue(), str(e).rsplit(": ", 1)[-1]
+    return salida.getvalue(), None
+
+
+def resultados(archivo):
+    """{(opciones, motor): resultado} de archivo con todas las opciones y motores."""
+    todos = {}
+    for opciones in OPCIONES:
+        codigo, programa = compilar(archivo, *opciones)
+        todos[opciones, 'mepa'] = resultado(lambda entrada, salida: ejecutar(codigo, entrada, salida))
+        todos[opciones, 'bajado'] = resultado(lambda entrada, salida: ejecutar(bajar(codigo), entrada, salida))
+        todos[opciones, 'python'] = resultado(programa.ejecutar)
+    return todos
+
+
+def verificar(archivo):
+    """
+    Todas las compilaciones y motores escriben lo mismo que el MEPA sin
+    optimizar; devuelve los resultados.
+    """
+    todos = resultados(archivo)
+    for (opciones, motor), obtenido in todos.items():
+        optimizar, cortocircuito, superinstrucciones = opciones
+        esperado = todos[(False, cortocircuito, False), 'mepa']
+        assert obtenido == esperado, f"{archivo} {opciones} {motor}: {obtenido} != {esperado}"
+    return todos
+
+
+def en_archivo(directorio, nombre, fuente):
+    archivo = os.path.join(directorio, f"{nombre}.pas")
+    with open(archivo, "w") as f:
+        f.write(fuente)
+    return archivo
+
+
+def fuentes_pascal_test():
+    """Los fuentes de pascal_test/ que compilan."""
+    archivos = []
+    for archivo in sorted(glob.glob("pascal_test/**/*", recursive=True)):
+        if not archivo.lower().endswith(".pas"):
+            continue
+        try:
+            analizar(archivo)
+        except SyntaxError:
+            continue
+        archivos.append(archivo)
+    return archivos
+
+
+# Un programa por regla de mirilla en el que la regla se aplica
+CASOS_MIRILLA = {
+    # El DSVS al final del if interno salta a la etiqueta del DSVS del externo
+    'cadenas_saltos': """program CadenasSaltos;
+var a: integer;
+begin
+    read(a);
+    if a > 2 then
+        if a > 4 then write(a) else a := 0
+    else
+        a := 1;
+    write(a)
+end.
+""",
+    # Los dos if terminan en el mismo lugar
+    'etiquetas_repetidas': """program EtiquetasRepetidas;
+var a: integer;
+begin
+    read(a);
+    if a > 2 then
+        if a > 4 then write(a);
+    write(a)
+end.
+""",
+    # Sin subrutinas, el salto al bloque principal va a la instrucción siguiente
+    'salto_siguiente': """program SaltoSiguiente;
+var a: integer;
+begin
+    read(a);
+    write(a)
+end.
+""",
+    # Nadie llama a nunca: su código queda después del salto al bloque principal
+    'inalcanzable': """program Inalcanzable;
+var a: integer;
+procedure nunca(n: integer);
+begin
+    write(n)
+end
+begin
+    read(a);
+    write(a)
+end.
+""",
+    # El else del cuerpo salta directo al comienzo del while y su etiqueta queda sin uso
+    'etiquetas_sin_uso': """program EtiquetasSinUso;
+var a: integer;
+begin
+    read(a);
+    while a > 0 do
+        if a > 3 then a := a - 2 else a := a - 1;
+    write(a)
+end.
+""",
+    # Junto a cada operación neutra, la misma con una constante que no lo es
+    'neutros': """program Neutros;
+var a: integer;
+begin
+    read(a);
+    a := a + 0;
+    a := a + 1;
+    a := a - 0;
+    a := a - 2;
+    a := a * 1;
+    a := a * 3;
+    a := a div 1;
+    a := a div 2;
+    write(a)
+end.
+""",
+    'dobles_negaciones': """program DoblesNegaciones;
+var a, b: integer; p: boolean;
+begin
+    read(a);
+    p := not (not (a > 2));
+    b := -(-a);
+    if p then write(b);
+    p := not (a > 2);
+    b := -a;
+    if p then write(b)
+end.
+""",
+    # La llamada anidada reserva su retorno junto con la externa
+    'reservas': """program Reservas;
+var a: integer;
+function f(n: integer): integer;
+begin
+    f := n + 1
+end
+begin
+    read(a);
+    a := f(f(a));
+    write(a)
+end.
+""",
+}
+
+# Un programa por superinstrucción en el que se fusiona
+CASOS_SUPERINSTRUCCIONES = {
+    Instruccion.INCR: """program Incr;
+var i, j: integer;
+begin
+    read(i);
+    i := i + 1;
+    j := i;
+    j := j - 2;
+    j := 3 + j;
+    write(i);
+    write(j)
+end.
+""",
+    Instruccion.DCVV: """program Dcvv;
+var i, n, s: integer;
+begin
+    read(n);
+    i := 0;
+    s := 0;
+    while i < n do
+    begin
+        s := s + i;
+        i := i + 1
+    end;
+    write(s)
+end.
+""",
+    Instruccion.DCVC: """program Dcvc;
+var i: integer;
+begin
+    read(i);
+    while i <= 10 do
+        i := i * 2;
+    if i = 16 then write(1) else write(i)
+end.
+""",
+}
+
+# and/or con llamadas que escriben: con cortocircuito el resultado cambia
+CORTOCIRCUITO = """program Cortocircuito;
+var i, n: integer; p: boolean;
+function caro(x: integer): boolean;
+begin
+    write(x);
+    caro := x > 2
+end
+begin
+    read(n);
+    i := 0;
+    while (i < n) and caro(i) do i := i + 1;
+    p := (i > 100) and caro(7);
+    if p or caro(1) or not (i = 0) then write(100) else write(200);
+    p := not ((i < 3) or caro(9));
+    if p then write(1)
+end.
+"""
+
+
+def test_corpus():
+    archivos = fuentes_pascal_test()
+    assert archivos
+    for archivo in archivos:
+        verificar(archivo)
+
+
+def test_cortocircuito():
+    with tempfile.TemporaryDirectory() as directorio:
+        archivo = en_archivo(directorio, "cortocircuito", CORTOCIRCUITO)
+        todos = verificar(archivo)
+    assert todos[(False, False, False), 'mepa'] != todos[(False, True, False), 'mepa']
+
+
+def test_reglas_mirilla():
+    assert sorted(CASOS_MIRILLA) == sorted(REGLAS)
+    with tempfile.TemporaryDirectory() as directorio:
+        for regla, fuente in CASOS_MIRILLA.items():
+            archivo = en_archivo(directorio, regla, fuente)
+            verificar(archivo)
+            raiz, tabla = analizar(archivo)
+            generador = GeneradorMEPA(tabla)
+            generador.generar(raiz)
+            esperado = resultado(lambda entrada, salida: ejecutar(generador.codigo, entrada, salida))
+            optimizador = OptimizadorMirilla()
+            codigo = optimizador.optimizar(generador.codigo)
+            assert optimizador.aplicaciones[regla], f"{regla}: no se aplicó"
+            assert resultado(lambda entrada, salida: ejecutar(codigo, entrada, salida)) == esperado, regla
+            # La regla sola tampoco cambia el resultado
+            codigo = OptimizadorMirilla((regla,)).optimizar(generador.codigo)
+            assert resultado(lambda entrada, salida: ejecutar(codigo, entrada, salida)) == esperado, regla
+
+
+def test_superinstrucciones():
+    assert sorted(CASOS_SUPERINSTRUCCIONES) == sorted(SUPERINSTRUCCIONES)
+    with tempfile.TemporaryDirectory() as directorio:
+        for superinstruccion, fuente in CASOS_SUPERINSTRUCCIONES.items():
+            archivo = en_archivo(directorio, superinstruccion.name, fuente)
+            verificar(archivo)
+            raiz, tabla = analizar(archivo)
+            generador = GeneradorMEPA(tabla, superinstrucciones=True)
+            generador.generar(raiz)
+            assert generador.codigo.fusionadas[superinstruccion], f"{superinstruccion.name}: no se fusionó"
+            # Fusionar después de generar arma las mismas superinstrucciones
+            estandar = bajar(generador.codigo)
+            assert fusionar(estandar).texto() == generador.codigo.texto(), superinstruccion.name
+
+
+# -(-x) desborda en la máquina con el menor entero (el backend Python no desborda)
+MENOS_MENOS = """program MenosMenos;
+var x: integer;
+begin
+    read(x);
+    x := -(-x);
+    write(x)
+end.
+"""
+
+
+def test_dobles_negaciones_desborde():
+    with tempfile.TemporaryDirectory() as directorio:
+        archivo = en_archivo(directorio, "menos_menos", MENOS_MENOS)
+        for optimizar in (False, True):
+            codigo, programa = compilar(archivo, optimizar, False, False)
+            obtenido = resultado(lambda entrada, salida: ejecutar(codigo, [ENTERO_MINIMO], salida))
+            assert obtenido == ("", "integer overflow"), (optimizar, obtenido)
+
+
+if __name__ == "__main__":
+    correr(globals())
@@ -0,0 +1,240 @@
+"""
+Pruebas del generador de código MEPA: el listado, el bytecode, la escritura a
+medida que se emite y el mapa de fuente.
+
+Uso: python3 test_generador_mepa.py (desde la raíz del repositorio: ast.py
+tapa al módulo ast de la biblioteca estándar, así que no corre bajo pytest).
+"""
+import glob
+import io
+import os
+import tempfile
+
+from lexico import AnalizadorLexico
+from sintactico import AnalizadorSintactico
+from generador_mepa import GeneradorMEPA
+from codigo_mepa import CodigoMEPA, ENTERO_MAXIMO
+from mapa_fuente import MapaFuente
+from mepa_vm import ProgramaMEPA
+from perfilador_mepa import PerfiladorMEPA
+from pruebas import correr
+
+
+def analizar(archivo):
+    """AST y tabla de símbolos de un fuente Pascal."""
+    analizador = AnalizadorLexico()
+    analizador.cargar_archivo(archivo)
+    parser = AnalizadorSintactico(analizador)
+    return parser.analizar(), parser.semantico.tabla_simbolos
+
+
+def analizar_fuente(fuente):
+    """analizar() de un fuente Pascal dado como texto."""
+    with tempfile.TemporaryDirectory() as directorio:
+        archivo = os.path.join(directorio, "prueba.pas")
+        with open(archivo, "w") as f:
+            f.write(fuente)
+        return analizar(archivo)
+
+
+def generador(archivo):
+    """GeneradorMEPA que generó en memoria el código de un fuente Pascal."""
+    raiz, tabla = analizar(archivo)
+    generador = GeneradorMEPA(tabla)
+    generador.generar(raiz)
+    return generador
+
+
+def generar(archivo):
+    """Texto MEPA de un fuente Pascal, generado en memoria."""
+    return generador(archivo).obtener_codigo()
+
+
+def fuentes_pascal_test():
+    """Los fuentes de pascal_test/ que compilan."""
+    archivos = []
+    for archivo in sorted(glob.glob("pascal_test/**/*", recursive=True)):
+        if not archivo.lower().endswith(".pas"):
+            continue
+        try:
+            analizar(archivo)
+        except SyntaxError:
+            continue
+        archivos.append(archivo)
+    return archivos
+
+
+def test_bytecode_ida_y_vuelta():
+    archivos = fuentes_pascal_test()
+    assert archivos
+    for archivo in archivos:
+        generado = generador(archivo)
+        datos = generado.obtener_bytecode()
+        codigo = CodigoMEPA.desde_bytes(datos)
+        assert codigo.texto() == generado.obtener_codigo(), archivo
+        assert codigo.a_bytes() == datos, archivo
+
+
+def test_escritor_igual_a_memoria():
+    # El .mepa escrito a medida que se emite es el mismo texto que el generado en memoria
+    for archivo in fuentes_pascal_test():
+        raiz, tabla = analizar(archivo)
+        salida = io.StringIO()
+        GeneradorMEPA(tabla, salida=salida).generar(raiz)
+        assert salida.getvalue() == generar(archivo), archivo
+
+
+# Una subrutina con subrutinas anidadas salta sobre ellas hasta su cuerpo
+# (L1): sin el DSVS, entrar a externo caía en el ENPR de interno
+ANIDADAS = """\
+INPP
+RMEM 1
+DSVS L0
+externo NADA
+ENPR 1
+RMEM 1
+DSVS L1
+interno NADA
+ENPR 2
+APVL 1, 0
+APVL 2, -3
+SUMA
+ALVL 1, 0
+RTPR 2, 1
+L1 NADA
+APCT 0
+ALVL 1, 0
+APVL 1, -3
+LLPR interno
+APVL 1, -3
+LLPR interno
+APVL 1, 0
+ALVL 0, 0
+LMEM 1
+RTPR 1, 1
+L0 NADA
+APCT 3
+LLPR externo
+APVL 0, 0
+IMPR
+LMEM 1
+PARA"""
+
+
+def test_subrutinas_anidadas():
+    assert generar("pascal_test/mepa/anidadas.pas") == ANIDADAS
+
+
+def test_sin_anidadas_no_salta():
+    # Sin subrutinas anidadas no hace falta el salto: fib entra directo a su cuerpo
+    lineas = generar("pascal_test/mepa/fib.pas").splitlines()
+    entrada = lineas.index("ENPR 1")
+    assert not lineas[entrada + 1].startswith("DSVS")
+
+
+def generador_con_mapa(archivo):
+    raiz, tabla = analizar(archivo)
+    generador = GeneradorMEPA(tabla, mapa_fuente=True)
+    generador.generar(raiz)
+    return generador
+
+
+def test_mapa_fuente():
+    for archivo in fuentes_pascal_test():
+        generado = generador_con_mapa(archivo)
+        # El mapa no cambia el código y tiene una posición por instrucción
+        assert generado.obtener_codigo() == generar(archivo), archivo
+        assert len(generado.mapa) == len(generado.codigo), archivo
+        assert MapaFuente.desde_texto(generado.mapa.texto()).posiciones == generado.mapa.posiciones, archivo
+        with open(archivo) as f:
+            num_lineas = len(f.read().splitlines())
+        assert all(1 <= linea <= num_lineas for linea, columna in filter(None, generado.mapa.posiciones)), archivo
+
+
+def test_mapa_fuente_sentencias():
+    generado = generador_con_mapa("pascal_test/mepa/anidadas.pas")
+    lineas = {}
+    for instruccion, posicion in zip(generado.obtener_codigo().splitlines(), generado.mapa.posiciones):
+        lineas.setdefault(posicion[0], []).append(instruccion)
+    assert lineas[7] == ["APVL 1, 0", "APVL 2, -3", "SUMA", "ALVL 1, 0"]  # k := k + m
+    assert lineas[11] == ["APVL 1, -3", "LLPR interno"]                   # interno(n)
+
+
+def test_reporte_lineas():
+    archivo = "pascal_test/mepa/anidadas.pas"
+    generado = generador_con_mapa(archivo)
+    perfilador = PerfiladorMEPA()
+    assert perfilador.ejecutar(ProgramaMEPA.desde_generador(generado)) == [6]
+    with open(archivo) as f:
+        reporte = perfilador.perfil.reporte_lineas(generado.mapa, f.read()).splitlines()
+    assert reporte[0] == "Line profile: 34 instructions executed"
+    # interno corre dos veces sus cuatro instrucciones; las líneas sin código quedan en blanco
+    assert reporte[2 + 7 - 1] == f"{2:11} {8:13} {7:5}          k := k + m"
+    assert reporte[2 + 8 - 1] == f"{'':11} {'':13} {8:5}      end"
+
+
+# El más unario no emite instrucciones: +5 es APCT 5 y +y es APVL 0, 1
+SIGNOS = """\
+INPP
+RMEM 2
+DSVS L0
+L0 NADA
+LEER
+ALVL 0, 1
+APCT 5
+ALVL 0, 0
+APVL 0, 1
+APVL 0, 0
+APCT 2
+SUST
+SUMA
+ALVL 0, 1
+APVL 0, 0
+UMEN
+APVL 0, 1
+SUMA
+ALVL 0, 0
+APVL 0, 0
+IMPR
+LMEM 2
+PARA"""
+
+
+def test_mas_unario():
+    assert generar("pascal_test/mepa/signos.pas") == SIGNOS
+
+
+# La mayor constante entera MEPA, en una asignación y en un write
+CONSTANTE_MAXIMA = """program Maxima;
+var x: integer;
+begin
+    x := 9223372036854775807;
+    write(9223372036854775807)
+end.
+"""
+
+
+def test_constante_maxima():
+    raiz, tabla = analizar_fuente(CONSTANTE_MAXIMA)
+    generado = GeneradorMEPA(tabla)
+    generado.generar(raiz)
+    assert f"APCT {ENTERO_MAXIMO}" in generado.obtener_codigo().splitlines()
+    assert CodigoMEPA.desde_bytes(generado.obtener_bytecode()).texto() == generado.obtener_codigo()
+
+
+def test_constante_fuera_de_rango():
+    # Antes, todo camino que arma el código en memoria terminaba en un OverflowError del array de operandos
+    casos = [("    x := 99999999999999999999;\n", 4, 30),
+             ("    write(9223372036854775808);\n", 4, 30)]
+    for sentencia, linea, columna in casos:
+        fuente = f"program Grande;\nvar x: integer;\nbegin\n{sentencia}    x := 1\nend.\n"
+        try:
+            analizar_fuente(fuente)
+        except SyntaxError as e:
+            assert str(e).startswith(f"Semantic error at line {linea}, column {columna}: integer constant "), str(e)
+        else:
+            assert False, f"{sentencia.strip()}: compiló"
+
+
+if __name__ == "__main__":
+    correr(globals())
@@ -0,0 +1,112 @@
+"""
+Pruebas del generador de Python: el programa traducido escribe lo mismo que el
+código MEPA en la máquina virtual.
+
+Uso: python3 test_generador_python.py (desde la raíz del repositorio: ast.py
+tapa al módulo ast de la biblioteca estándar, así que no corre bajo pytest).
+"""
+import io
+import os
+import sys
+import tempfile
+
+from lexico import AnalizadorLexico
+from sintactico import AnalizadorSintactico
+from generador_mepa import GeneradorMEPA
+from generador_python import GeneradorPython
+from mepa_vm import MaquinaMEPA, ProgramaMEPA
+from pruebas import correr
+
+
+def analizar(archivo):
+    """AST y tabla de símbolos de un fuente Pascal."""
+    analizador = AnalizadorLexico()
+    analizador.cargar_archivo(archivo)
+    parser = AnalizadorSintactico(analizador)
+    return parser.analizar(), parser.semantico.tabla_simbolos
+
+
+def analizar_fuente(fuente):
+    """analizar() de un fuente dado como texto."""
+    with tempfile.TemporaryDirectory() as directorio:
+        archivo = os.path.join(directorio, "prueba.pas")
+        with open(archivo, "w") as f:
+            f.write(fuente)
+        return analizar(archivo)
+
+
+def salida_mepa(raiz, tabla, entrada):
+    """Salida del programa en la máquina virtual MEPA."""
+    generador = GeneradorMEPA(tabla)
+    generador.generar(raiz)
+    salida = io.StringIO()
+    MaquinaMEPA().ejecutar(ProgramaMEPA.desde_generador(generador), entrada, salida)
+    return salida.getvalue()
+
+
+def salidas(archivo, entrada):
+    """Salida del programa en la máquina virtual MEPA y traducido a Python."""
+    raiz, tabla = analizar(archivo)
+    generador_python = GeneradorPython(tabla)
+    generador_python.generar(raiz)
+    salida_python = io.StringIO()
+    generador_python.compilar().ejecutar(entrada, salida_python)
+    return salida_mepa(raiz, tabla, entrada), salida_python.getvalue()
+
+
+def test_mas_unario():
+    # +x es x en los dos motores: 4 + (5 - 2) - 5
+    assert salidas("pascal_test/mepa/signos.pas", [4]) == ("2\n", "2\n")
+
+
+
+def anidados(profundidad):
+    """Programa con profundidad while anidados, que escribe profundidad."""
+    cuerpo = "write(i)"
+    for k in range(profundidad, 0, -1):
+        cuerpo = f"while i < {k} do begin i := i + 1; {cuerpo} end"
+    return f"program Anidados;\nvar i: integer;\nbegin\n    i := 0;\n    {cuerpo}\nend.\n"
+
+
+def test_anidamiento_excesivo():
+    # Python no admite más de 20 bloques anidados: compilar() lo informa con ValueError
+    raiz, tabla = analizar_fuente(anidados(25))
+    assert salida_mepa(raiz, tabla, []) == "25\n"
+    generador_python = GeneradorPython(tabla)
+    generador_python.generar(raiz)
+    try:
+        generador_python.compilar()
+    except ValueError as e:
+        assert "too deeply nested" in str(e), e
+    else:
+        assert False, "compiló 25 while anidados"
+
+
+RECURSION = """program Recursion;
+var n: integer;
+function f(n: integer): integer;
+begin
+    if n = 0 then f := 0 else f := f(n - 1) + 1
+end
+begin
+    read(n);
+    n := f(n);
+    write(n)
+end.
+"""
+
+
+def test_recursion_profunda():
+    # Más llamadas anidadas que el límite de recursión por defecto de Python
+    raiz, tabla = analizar_fuente(RECURSION)
+    limite = sys.getrecursionlimit()
+    generador_python = GeneradorPython(tabla)
+    generador_python.generar(raiz)
+    programa = generador_python.compilar()
+    assert salida_mepa(raiz, tabla, [5000]) == "5000\n"
+    assert programa.ejecutar([5000]) == [5000]
+    assert sys.getrecursionlimit() == limite
+
+
+if __name__ == "__main__":
+    correr(globals())
@@ -0,0 +1,159 @@
+"""
+Pruebas del analizador léxico: todos los motores, y el archivo mapeado en
+memoria, dan los mismos tokens.
+
+Uso: python3 test_lexico.py (desde la raíz del repositorio: ast.py tapa al
+módulo ast de la biblioteca estándar, así que no corre bajo pytest).
+"""
+import glob
+import os
+import tempfile
+
+from lexico import AnalizadorLexico, MOTORES
+from sintactico import AnalizadorSintactico
+from generador_mepa import GeneradorMEPA
+from pruebas import correr
+
+
+def fuentes_pascal_test():
+    """Todos los fuentes Pascal de pascal_test/ (.pas y .PAS)."""
+    return sorted(archivo for archivo in glob.glob("pascal_test/**/*", recursive=True)
+                  if archivo.lower().endswith(".pas"))
+
+
+def tokens(analizador):
+    """Tokens de next_token() hasta el fin, o hasta el error léxico (incluido su mensaje)."""
+    resultado = []
+    while True:
+        try:
+            token = analizador.next_token()
+        except SyntaxError as e:
+            resultado.append(("error", str(e)))
+            return resultado
+        resultado.append(token)
+        if token[0] is None:
+            return resultado
+
+
+def tokens_archivo(archivo, motor, mapear=False):
+    analizador = AnalizadorLexico(motor)
+    analizador.cargar_archivo(archivo, mapear=mapear)
+    return tokens(analizador)
+
+
+def tokens_todos(archivo):
+    """Tokens de archivo con cada motor y mapeado: {nombre: tokens}."""
+    resultado = {motor: tokens_archivo(archivo, motor) for motor in MOTORES}
+    resultado['mapeado'] = tokens_archivo(archivo, 'clasico', mapear=True)
+    return resultado
+
+
+def codigo_mepa(archivo, mapear):
+    """Texto MEPA de archivo, o el mensaje del error de compilación."""
+    analizador = AnalizadorLexico('regex')
+    analizador.cargar_archivo(archivo, mapear=mapear)
+    try:
+        parser = AnalizadorSintactico(analizador)
+        raiz = parser.analizar()
+    except SyntaxError as e:
+        return str(e)
+    generador = GeneradorMEPA(parser.semantico.tabla_simbolos)
+    generador.generar(raiz)
+    return generador.obtener_codigo()
+
+
+# Identificadores con letras no ASCII (los motores de texto las aceptan) y un
+# carácter no ASCII inválido al final
+NO_ASCII = """program Año;
+{ comentario con acentos: también }
+var señal, x2é: integer;
+begin
+    señal := 1; x2é := señal + 10;
+    write(x2é) € 
+end.
+"""
+
+# Caracteres en los que las clases de re difieren de isalpha() e isdigit() del
+# motor clásico: '²' es un dígito, '½' no es letra ni dígito, y la sigma final
+# se pasa a minúsculas carácter a carácter
+CLASES_NO_ASCII = """program Clases;
+var ΑΣ, x²: integer;
+begin
+    ΑΣ := ²;
+    x² := 1² + ΑΣ;
+    x² := ½
+end.
+"""
+
+
+def test_motor_por_defecto():
+    assert AnalizadorLexico().motor == 'clasico'
+
+
+def test_motores_corpus():
+    archivos = fuentes_pascal_test()
+    assert archivos
+    for archivo in archivos:
+        esperados = tokens_archivo(archivo, 'clasico')
+        for motor in MOTORES:
+            assert tokens_archivo(archivo, motor) == esperados, f"{archivo}: motor {motor}"
+
+
+def test_mapeado_corpus():
+    for archivo in fuentes_pascal_test():
+        todos = tokens_todos(archivo)
+        assert todos['mapeado'] == todos['clasico'], archivo
+
+
+def test_mapeado_no_ascii():
+    with tempfile.TemporaryDirectory() as directorio:
+        archivo = os.path.join(directorio, "no_ascii.pas")
+        with open(archivo, "w", encoding="utf-8") as f:
+            f.write(NO_ASCII)
+        todos = tokens_todos(archivo)
+    assert ('ident', 'señal', 3, 10) in todos['clasico']
+    assert todos['clasico'][-1][0] == "error"
+    for nombre, resultado in todos.items():
+        assert resultado == todos['clasico'], nombre
+
+
+def test_clases_no_ascii():
+    with tempfile.TemporaryDirectory() as directorio:
+        archivo = os.path.join(directorio, "clases.pas")
+        with open(archivo, "w", encoding="utf-8") as f:
+            f.write(CLASES_NO_ASCII)
+        todos = tokens_todos(archivo)
+        buffers = []
+        for motor in MOTORES:
+            analizador = AnalizadorLexico(motor)
+            analizador.cargar_archivo(archivo)
+            buffer = analizador.tokenize_all()
+            buffers.append([buffer.token(i) for i in range(len(buffer))])
+    clasico = todos['clasico']
+    for token in (('ident', 'ασ', 2, 7), ('ident', 'x²', 2, 11), ('numero', '²', 4, 12), ('numero', '1²', 5, 13)):
+        assert token in clasico, token
+    assert clasico[-1] == ("error", "Lexical error at line 6, column 11: invalid character '½'"), clasico[-1]
+    for nombre, resultado in todos.items():
+        assert resultado == clasico, nombre
+    assert all(buffer == buffers[0] for buffer in buffers)
+
+
+def test_analizar_mapeado():
+    # El analizador sintáctico pide los tokens de a uno al archivo mapeado: mismo código y mismos errores
+    for archivo in fuentes_pascal_test():
+        assert codigo_mepa(archivo, True) == codigo_mepa(archivo, False), archivo
+
+
+def test_motores_tokenize_all():
+    for archivo in fuentes_pascal_test():
+        buffers = []
+        for motor in MOTORES:
+            analizador = AnalizadorLexico(motor)
+            analizador.cargar_archivo(archivo)
+            buffer = analizador.tokenize_all()
+            buffers.append([buffer.token(i) for i in range(len(buffer))])
+        assert all(buffer == buffers[0] for buffer in buffers), archivo
+
+
+if __name__ == "__main__":
+    correr(globals())
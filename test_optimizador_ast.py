@@ -0,0 +1,119 @@
+"""
+Pruebas de las optimizaciones sobre el AST.
+
+Uso: python3 test_optimizador_ast.py (desde la raíz del repositorio: ast.py
+tapa al módulo ast de la biblioteca estándar, así que no corre bajo pytest).
+"""
+import io
+import os
+import tempfile
+
+from ast import NodoNumero, NodoIdentificador, NodoOperacionUnaria, NodoOperacionBinaria
+from lexico import AnalizadorLexico
+from sintactico import AnalizadorSintactico
+from generador_mepa import GeneradorMEPA
+from mepa_vm import MaquinaMEPA, ProgramaMEPA, ErrorEjecucion
+from codigo_mepa import ENTERO_MINIMO, ENTERO_MAXIMO
+from optimizador_ast import PlegadorConstantes
+from pruebas import correr
+
+
+def analizar(fuente):
+    """AST y tabla de símbolos de un fuente Pascal dado como texto."""
+    with tempfile.TemporaryDirectory() as directorio:
+        archivo = os.path.join(directorio, "prueba.pas")
+        with open(archivo, "w") as f:
+            f.write(fuente)
+        analizador = AnalizadorLexico()
+        analizador.cargar_archivo(archivo)
+        parser = AnalizadorSintactico(analizador)
+        return parser.analizar(), parser.semantico.tabla_simbolos
+
+
+def ejecutar(raiz, tabla, entrada):
+    """Salida de la máquina virtual MEPA para el AST dado."""
+    generador = GeneradorMEPA(tabla)
+    generador.generar(raiz)
+    salida = io.StringIO()
+    MaquinaMEPA().ejecutar(ProgramaMEPA.desde_generador(generador), entrada, salida)
+    return salida.getvalue()
+
+
+def resultado(raiz, tabla, entrada):
+    """Salida de ejecutar() y el mensaje del error de ejecución, o None."""
+    try:
+        return ejecutar(raiz, tabla, entrada), None
+    except ErrorEjecucion as e:
+        return None, str(e).rsplit(": ", 1)[-1]
+
+
+# Más unario sobre un literal, una variable y una expresión entre paréntesis
+MAS_UNARIO = """program MasUnario;
+var x, y: integer;
+begin
+    read(y);
+    x := +5;
+    y := +y + (+(x - 2));
+    write(x);
+    write(y)
+end.
+"""
+
+
+def test_mas_unario_literal():
+    raiz, tabla = analizar(MAS_UNARIO)
+    plegador = PlegadorConstantes()
+    plegador.plegar(raiz)
+    asignacion = raiz.bloque.sentencias[1]
+    assert type(asignacion.expresion) is NodoNumero and asignacion.expresion.valor == 5
+
+
+def test_mas_unario_identidad():
+    raiz, tabla = analizar(MAS_UNARIO)
+    PlegadorConstantes().plegar(raiz)
+    suma = raiz.bloque.sentencias[2].expresion
+    assert type(suma.izquierda) is NodoIdentificador
+    assert not isinstance(suma.derecha, NodoOperacionUnaria)
+    assert ejecutar(raiz, tabla, [4]) == "5\n7\n"
+
+
+def programa_asignacion(expresion):
+    return f"program Desborde;\nvar x: integer;\nbegin\n    read(x);\n    x := {expresion};\n    write(x)\nend.\n"
+
+
+def test_no_pliega_desbordes():
+    # Plegar no puede hacer desaparecer el "integer overflow" de la ejecución sin plegar
+    casos = [("9223372036854775807 + 1", 0),
+             ("-9223372036854775807 - 2", 0),
+             ("3037000500 * 3037000500", 0),
+             ("(-9223372036854775807 - 1) div (-1)", 0),
+             ("-(-9223372036854775807 - 1)", 0),
+             ("-(-x)", ENTERO_MINIMO),
+             ("(x + 1) * 0", ENTERO_MAXIMO),
+             ("(x - 1) * 0", ENTERO_MINIMO),
+             ("(x div (-1)) * 0", ENTERO_MINIMO)]
+    for expresion, entrada in casos:
+        raiz, tabla = analizar(programa_asignacion(expresion))
+        esperado = resultado(raiz, tabla, [entrada])
+        assert esperado == (None, "integer overflow"), expresion
+        raiz, tabla = analizar(programa_asignacion(expresion))
+        PlegadorConstantes().plegar(raiz)
+        assert resultado(raiz, tabla, [entrada]) == esperado, expresion
+
+
+def test_pliega_en_rango():
+    # El menor entero no se puede escribir como literal, pero sí plegar
+    raiz, tabla = analizar(programa_asignacion("-9223372036854775807 - 1"))
+    plegador = PlegadorConstantes()
+    plegador.plegar(raiz)
+    asignacion = raiz.bloque.sentencias[1]
+    assert type(asignacion.expresion) is NodoNumero and asignacion.expresion.valor == ENTERO_MINIMO
+    assert resultado(raiz, tabla, [0]) == (f"{ENTERO_MINIMO}\n", None)
+    # Con una variable pura, x*0 sigue siendo 0
+    raiz, tabla = analizar(programa_asignacion("x * 0"))
+    PlegadorConstantes().plegar(raiz)
+    assert type(raiz.bloque.sentencias[1].expresion) is NodoNumero
+
+
+if __name__ == "__main__":
+    correr(globals())
@@ -0,0 +1,156 @@
+"""
+Pruebas del perfilador MEPA: ejecuta igual que MaquinaMEPA (la misma salida y
+los mismos errores de ejecución) y deja el perfil también cuando hay error.
+
+Uso: python3 test_perfilador_mepa.py (desde la raíz del repositorio: ast.py
+tapa al módulo ast de la biblioteca estándar, así que no corre bajo pytest).
+"""
+import glob
+import io
+import os
+import tempfile
+
+from lexico import AnalizadorLexico
+from sintactico import AnalizadorSintactico
+from generador_mepa import GeneradorMEPA
+from mepa_vm import MaquinaMEPA, ProgramaMEPA, ErrorEjecucion
+from perfilador_mepa import PerfiladorMEPA
+from pruebas import correr
+
+ENTRADA = [5, 3, 8, 1, 0, 2, 9, 4]  # Valores de read
+
+TAMANIO_PILA = 1000  # Pila chica, para desbordarla rápido
+
+
+def analizar(archivo):
+    """AST y tabla de símbolos de un fuente Pascal."""
+    analizador = AnalizadorLexico()
+    analizador.cargar_archivo(archivo)
+    parser = AnalizadorSintactico(analizador)
+    return parser.analizar(), parser.semantico.tabla_simbolos
+
+
+def analizar_fuente(fuente):
+    """analizar() de un fuente Pascal dado como texto."""
+    with tempfile.TemporaryDirectory() as directorio:
+        archivo = os.path.join(directorio, "prueba.pas")
+        with open(archivo, "w") as f:
+            f.write(fuente)
+        return analizar(archivo)
+
+
+def programas(raiz, tabla):
+    """El ProgramaMEPA del AST en MEPA estándar y con superinstrucciones."""
+    for superinstrucciones in (False, True):
+        generador = GeneradorMEPA(tabla, superinstrucciones=superinstrucciones)
+        generador.generar(raiz)
+        yield ProgramaMEPA.desde_generador(generador)
+
+
+def resultado(maquina, programa, entrada):
+    """Lo que escribe programa en maquina y el mensaje del error de ejecución, si lo hay."""
+    salida = io.StringIO()
+    try:
+        maquina.ejecutar(programa, entrada, salida)
+    except ErrorEjecucion as e:
+        return salida.getvalue(), str(e)
+    return salida.getvalue(), None
+
+
+def comparar(programa, entrada):
+    """El perfilador da lo mismo que la máquina; devuelve su resultado y el perfilador."""
+    perfilador = PerfiladorMEPA(TAMANIO_PILA)
+    esperado = resultado(MaquinaMEPA(TAMANIO_PILA), programa, entrada)
+    obtenido = resultado(perfilador, programa, entrada)
+    assert obtenido == esperado, f"{obtenido} != {esperado}"
+    return obtenido, perfilador
+
+
+def fuentes_pascal_test():
+    """Los fuentes de pascal_test/ que compilan."""
+    archivos = []
+    for archivo in sorted(glob.glob("pascal_test/**/*", recursive=True)):
+        if not archivo.lower().endswith(".pas"):
+            continue
+        try:
+            analizar(archivo)
+        except SyntaxError:
+            continue
+        archivos.append(archivo)
+    return archivos
+
+
+def test_corpus():
+    archivos = fuentes_pascal_test()
+    assert archivos
+    for archivo in archivos:
+        for programa in programas(*analizar(archivo)):
+            _, perfilador = comparar(programa, ENTRADA)
+            assert perfilador.perfil.instrucciones > 0, archivo
+
+
+# Cada programa termina con el error de ejecución dado con su entrada
+ERRORES = {
+    "division by zero": ("""program DivisionPorCero;
+var a, b: integer;
+begin
+    read(a);
+    read(b);
+    write(a);
+    a := a div b;
+    write(a)
+end.
+""", [7, 0]),
+    "integer overflow": ("""program Desborde;
+var a: integer;
+begin
+    read(a);
+    while a > 0 do
+    begin
+        a := a * a;
+        write(a)
+    end
+end.
+""", [3]),
+    "read past the end of the input": ("""program FinDeEntrada;
+var a: integer;
+begin
+    read(a);
+    write(a);
+    read(a)
+end.
+""", [4]),
+    "input is not an integer": ("""program NoEntero;
+var a: integer;
+begin
+    read(a);
+    write(a);
+    read(a)
+end.
+""", [4, "x"]),
+    "stack overflow or invalid address": ("""program Recursion;
+var n: integer;
+function f(n: integer): integer;
+begin
+    f := f(n + 1)
+end
+begin
+    read(n);
+    write(n);
+    n := f(n)
+end.
+""", [1]),
+}
+
+
+def test_errores():
+    for mensaje, (fuente, entrada) in ERRORES.items():
+        for programa in programas(*analizar_fuente(fuente)):
+            (salida, error), perfilador = comparar(programa, entrada)
+            assert salida and error.endswith(f": {mensaje}"), (mensaje, salida, error)
+            # El perfil llega hasta la instrucción que falló
+            assert perfilador.perfil.instrucciones > 0, mensaje
+
+
+if __name__ == "__main__":
+    correr(globals())